@@ -14,4 +14,20 @@ AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 
 # Anthropic/Claude configuration
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "YOUR_ANTHROPIC_API_KEY")
-ANTHROPIC_ENDPOINT = os.getenv("ANTHROPIC_ENDPOINT", "https://api.anthropic.com")
\ No newline at end of file
+ANTHROPIC_ENDPOINT = os.getenv("ANTHROPIC_ENDPOINT", "https://api.anthropic.com")
+ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
+
+# Shared LLM HTTP connection pools (one per provider per process)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))   # seconds an idle connection is kept
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))                     # seconds per request
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+
+# LLM router: provider preference, per-provider limits, and hedging
+LLM_PROVIDER_ORDER = [p.strip() for p in os.getenv("LLM_PROVIDER_ORDER", "azure,anthropic").split(",") if p.strip()]
+LLM_AZURE_MAX_CONCURRENCY = int(os.getenv("LLM_AZURE_MAX_CONCURRENCY", "16"))
+LLM_AZURE_RATE_LIMIT = float(os.getenv("LLM_AZURE_RATE_LIMIT", "10"))          # requests per second
+LLM_ANTHROPIC_MAX_CONCURRENCY = int(os.getenv("LLM_ANTHROPIC_MAX_CONCURRENCY", "8"))
+LLM_ANTHROPIC_RATE_LIMIT = float(os.getenv("LLM_ANTHROPIC_RATE_LIMIT", "5"))   # requests per second
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "8"))   # seconds before hedging until p95 latency is known
@@ -1,5 +1,8 @@
 # internal
-from ai_models.config import ANTHROPIC_API_KEY, ANTHROPIC_ENDPOINT
+from ai_models.config import ANTHROPIC_API_KEY, ANTHROPIC_ENDPOINT, ANTHROPIC_MODEL
+from ai_models.services import llm_router
+from ai_models.services.client_registry import ClientRegistry, build_http_client
+from ai_models.services.streaming import sse_response
 
 # external
 import anthropic
@@ -9,6 +12,7 @@ import uuid
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+import time
 
 # Import the agent functionality
 try:
@@ -19,6 +23,16 @@ except ImportError as e:
     AGENT_AVAILABLE = False
     AGENT_IMPORT_ERROR = str(e)
 
+def _build_anthropic_client(api_key):
+    return anthropic.Anthropic(api_key=api_key, http_client=build_http_client())
+
+# Global Anthropic client registry
+anthropic_clients = ClientRegistry(_build_anthropic_client)
+
+def get_anthropic_client() -> anthropic.Anthropic:
+    """Shared Anthropic client for the configured key"""
+    return anthropic_clients.get(api_key=ANTHROPIC_API_KEY)
+
 @csrf_exempt
 def claude_api(request):
     """Get simplified Claude response"""
@@ -33,16 +47,15 @@ def claude_api(request):
             if not ANTHROPIC_API_KEY:
                 return JsonResponse({'error': 'Claude not configured'}, status=500)
             
-            client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-            
-            response = client.messages.create(
-                model="claude-3-sonnet-20240229",
+            response = llm_router.generate(
+                [{"role": "user", "content": prompt}],
+                model=ANTHROPIC_MODEL,
                 max_tokens=1000,
-                messages=[{"role": "user", "content": prompt}]
+                provider='anthropic'
             )
             
             return JsonResponse({
-                'response': response.content[0].text
+                'response': response
             })
             
         except json.JSONDecodeError:
@@ -50,4 +63,31 @@ def claude_api(request):
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
-    return JsonResponse({'error': 'POST required'}, status=400)
\ No newline at end of file
+    return JsonResponse({'error': 'POST required'}, status=400)
+
+@csrf_exempt
+def claude_stream_api(request):
+    """Stream a Claude response as server-sent events"""
+    started = time.monotonic()
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=400)
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    prompt = data.get('prompt', '').strip()
+    if not prompt:
+        return JsonResponse({'error': 'Prompt required'}, status=400)
+    
+    if not ANTHROPIC_API_KEY:
+        return JsonResponse({'error': 'Claude not configured'}, status=500)
+    
+    chunks = llm_router.stream(
+        [{"role": "user", "content": prompt}],
+        model=ANTHROPIC_MODEL,
+        max_tokens=1000,
+        provider='anthropic'
+    )
+    return sse_response(request, 'claude', chunks, started)
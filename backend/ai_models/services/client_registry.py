@@ -0,0 +1,90 @@
+# internal
+from ai_models.config import (
+    AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT,
+    LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY,
+    LLM_TIMEOUT, LLM_CONNECT_TIMEOUT
+)
+
+# external
+from openai import AzureOpenAI
+import httpx
+
+# built-in
+import os
+import threading
+
+AZURE_OPENAI_API_VERSION = "2023-05-15"
+
+
+def build_http_client(max_connections: int = LLM_MAX_CONNECTIONS,
+                      max_keepalive_connections: int = LLM_MAX_KEEPALIVE_CONNECTIONS,
+                      keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY) -> httpx.Client:
+    """httpx client with the shared pool limits and keep-alive used by every LLM provider"""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    )
+
+
+class ClientRegistry:
+    """
+    Lazily built, process-wide SDK clients
+
+    One client is created per distinct configuration on first use and then
+    shared by every thread, so its connection pool and TLS sessions are
+    reused across requests. Clients are rebuilt after a fork since
+    connection pools can't be shared between processes.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._clients = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get(self, **config):
+        key = tuple(sorted(config.items()))
+        if self._pid == os.getpid():
+            client = self._clients.get(key)
+            if client is not None:
+                return client
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._clients = {}
+                self._pid = os.getpid()
+            client = self._clients.get(key)
+            if client is None:
+                client = self.factory(**config)
+                self._clients[key] = client
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+
+
+def _build_azure_openai_client(api_key, azure_endpoint, api_version):
+    return AzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=azure_endpoint,
+        http_client=build_http_client()
+    )
+
+
+# Global Azure OpenAI client registry
+azure_openai_clients = ClientRegistry(_build_azure_openai_client)
+
+
+def get_azure_openai_client(api_version: str = AZURE_OPENAI_API_VERSION) -> AzureOpenAI:
+    """Shared AzureOpenAI client for the configured endpoint and key"""
+    return azure_openai_clients.get(
+        api_key=AZURE_OPENAI_KEY,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        api_version=api_version
+    )
@@ -0,0 +1,230 @@
+# internal
+from ai_models.services import llm_router
+from financial_data.services.single_flight import SingleFlight
+
+# external
+from django.core.cache import cache
+
+# built-in
+from typing import Callable, Dict, List, Optional
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# (fresh, stale) seconds per endpoint: fresh entries are served as-is, stale
+# ones are served while a background call refreshes them
+LLM_CACHE_TTLS = {
+    'default': (10 * 60, 60 * 60),
+    'phi_confidence': (60 * 60, 6 * 3600),
+    'phi_price_targets': (30 * 60, 6 * 3600),
+    'phi_news_impact': (15 * 60, 60 * 60),
+    'phi_volume_signals': (15 * 60, 60 * 60),
+    'phi_options_activity': (15 * 60, 60 * 60),
+    'phi_full_market_analysis': (30 * 60, 6 * 3600),
+    'sector_sentiment': (30 * 60, 3 * 3600),
+    'earnings_correlation': (24 * 3600, 7 * 24 * 3600),
+    'price_target': (60 * 60, 6 * 3600),
+}
+LLM_CACHE_LOCK_TIMEOUT = 120   # seconds one worker may spend refreshing a stale entry
+
+
+def llm_cache_key(model: str, messages: List[Dict[str, str]], temperature: Optional[float] = None) -> str:
+    """
+    Content address of a chat completion request
+
+    Message content is whitespace-normalized so prompts that differ only in
+    indentation or line breaks share an entry.
+    """
+    normalized = [
+        {'role': message.get('role'), 'content': ' '.join(str(message.get('content', '')).split())}
+        for message in messages
+    ]
+    payload = json.dumps({'model': model, 'messages': normalized, 'temperature': temperature}, sort_keys=True)
+    return f"llm:response:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def llm_scoped_key(endpoint: str, model: str, *parts) -> str:
+    """
+    Cache key built from an endpoint's own inputs rather than the prompt text
+
+    For prompts that embed fast-moving values such as the latest price, where
+    the content address would change on every request.
+    """
+    return ':'.join(['llm:response', endpoint, model] + [str(part) for part in parts])
+
+
+def is_json_response(content: str) -> bool:
+    """Whether an answer contains a JSON object, extracted the way the endpoints parse it"""
+    match = re.search(r'\{.*\}', content or '', re.DOTALL)
+    if not match:
+        return False
+    try:
+        return isinstance(json.loads(match.group()), dict)
+    except ValueError:
+        return False
+
+
+class UnusableResponse(Exception):
+    """An answer that failed validation; raised past the single-flight group so it isn't shared"""
+
+    def __init__(self, content: str):
+        super().__init__('LLM response failed validation')
+        self.content = content
+
+
+class EndpointStats:
+    """Hit and miss counters for one endpoint"""
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.rejected = 0
+        self.upstream_latency = 0.0
+
+    def as_dict(self) -> dict:
+        served = self.hits + self.stale_hits + self.misses
+        upstream = self.misses + self.refreshes
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'hit_rate': round((self.hits + self.stale_hits) / served, 3) if served else None,
+            'avg_upstream_latency_ms': round(self.upstream_latency / upstream * 1000, 1) if upstream else None,
+        }
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for chat completion results
+
+    Entries are keyed by model, messages and temperature and shared between
+    workers through the Django cache. Each endpoint has its own freshness
+    window; past it, the stale answer is returned immediately and one worker
+    refreshes it in the background. Concurrent misses for the same request
+    share one upstream call.
+    """
+
+    def __init__(self, ttls: Dict[str, tuple] = None, lock_timeout: int = LLM_CACHE_LOCK_TIMEOUT, generate=None):
+        self.ttls = ttls or LLM_CACHE_TTLS
+        self.generate = generate
+        self.lock_timeout = lock_timeout
+        self._flight = SingleFlight()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def complete(self, endpoint: str, *, model: str, messages: List[Dict[str, str]],
+                 temperature: Optional[float] = None, key: Optional[str] = None,
+                 validate: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Return the message content for a chat completion, from cache when possible
+
+        Misses and refreshes go through the LLM router.
+
+        Args:
+            endpoint: name selecting the TTLs and the stats bucket
+            key: cache key to use instead of the content address (see llm_scoped_key)
+            validate: check on the answer; answers it rejects are returned but not cached
+        """
+        key = key or llm_cache_key(model, messages, temperature)
+        fresh_for, _ = self._ttl(endpoint)
+
+        try:
+            entry = cache.get(key)
+        except Exception:
+            entry = None
+
+        if entry is not None:
+            if time.time() - entry['created_at'] < fresh_for:
+                self._record(endpoint, 'hits')
+                return entry['content']
+
+            self._record(endpoint, 'stale_hits')
+            self._refresh_in_background(key, endpoint, model, messages, temperature, validate)
+            return entry['content']
+
+        self._record(endpoint, 'misses')
+        try:
+            return self._flight.do(key, self._fetch, key, endpoint, model, messages, temperature, validate)
+        except UnusableResponse as e:
+            return e.content
+
+    def stats(self) -> dict:
+        """Snapshot of per-endpoint counters"""
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _ttl(self, endpoint: str) -> tuple:
+        return self.ttls.get(endpoint) or self.ttls['default']
+
+    def _record(self, endpoint: str, counter: str = None, latency: float = 0.0):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointStats())
+            if counter:
+                setattr(stats, counter, getattr(stats, counter) + 1)
+            stats.upstream_latency += latency
+
+    def _fetch(self, key, endpoint, model, messages, temperature, validate=None) -> str:
+        """Call the model and store its answer; raises UnusableResponse if validation rejects it"""
+        generate = self.generate or llm_router.generate
+
+        start = time.monotonic()
+        try:
+            content = generate(messages, model=model, temperature=temperature)
+        except Exception:
+            self._record(endpoint, 'errors')
+            raise
+        self._record(endpoint, latency=time.monotonic() - start)
+
+        if content and validate is not None and not validate(content):
+            self._record(endpoint, 'rejected')
+            raise UnusableResponse(content)
+
+        if content:
+            fresh_for, stale_for = self._ttl(endpoint)
+            try:
+                cache.set(key, {'content': content, 'created_at': time.time()}, fresh_for + stale_for)
+            except Exception as e:
+                logger.warning("Could not cache LLM response for %s: %s", endpoint, e)
+        return content
+
+    def _refresh_in_background(self, key, endpoint, model, messages, temperature, validate=None):
+        """Refresh a stale entry once across workers without blocking the caller"""
+        lock_key = f'{key}:refresh'
+        try:
+            if not cache.add(lock_key, 1, self.lock_timeout):
+                return
+        except Exception:
+            return
+
+        def run():
+            try:
+                self._record(endpoint, 'refreshes')
+                self._fetch(key, endpoint, model, messages, temperature, validate)
+            except Exception as e:
+                logger.warning("LLM cache refresh failed for %s: %s", endpoint, e)
+            finally:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    pass
+
+        threading.Thread(target=run, name=f'llm-cache-refresh-{endpoint}', daemon=True).start()
+
+
+# Global LLM response cache instance
+llm_cache = LLMResponseCache()
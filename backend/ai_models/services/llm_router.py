@@ -1,12 +1,431 @@
-from typing import Dict, List, Optional
+# internal
+from ai_models.config import (
+    AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT, MODEL_NAME, ANTHROPIC_API_KEY, ANTHROPIC_MODEL,
+    LLM_PROVIDER_ORDER, LLM_AZURE_MAX_CONCURRENCY, LLM_AZURE_RATE_LIMIT,
+    LLM_ANTHROPIC_MAX_CONCURRENCY, LLM_ANTHROPIC_RATE_LIMIT, LLM_HEDGE_AFTER, LLM_TIMEOUT
+)
 
+# external
 
-def generate(messages: List[Dict[str, str]], *, model: Optional[str] = None, temperature: Optional[float] = None) -> str:
-    """Minimal stub router that raises if not configured.
+# built-in
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+import asyncio
+import logging
+import threading
+import time
 
-    This satisfies imports if provider modules are not present.
-    Replace with provider-backed impl when needed.
+logger = logging.getLogger(__name__)
+
+# Routing defaults
+ROUTER_MAX_WORKERS = 64          # threads running provider calls, shared by all providers
+QUEUE_TIMEOUT = 1.0              # seconds to wait for a provider slot before trying the next provider
+HEDGE_MIN_DELAY = 1.0            # never hedge sooner than this
+HEDGE_MIN_SAMPLES = 20           # latencies needed before hedging on the observed p95
+LATENCY_WINDOW = 200             # recent latencies kept per provider
+FAILURE_THRESHOLD = 3            # consecutive failures before a provider is skipped
+FAILURE_COOLDOWN = 30            # seconds a failing provider is skipped for
+
+
+class LLMRouterError(Exception):
+    """Raised when no provider could answer a request"""
+
+    def __init__(self, message: str, errors: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+class LLMProvider:
+    """A chat completion backend the router can send requests to"""
+
+    name = 'provider'
+    default_model = None
+
+    def complete(self, messages: List[Dict[str, str]], *, model: str, temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], *, model: str, temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Yield the completion text in pieces as the provider produces it"""
+        yield self.complete(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+
+
+class AzureOpenAIProvider(LLMProvider):
+    """Azure OpenAI chat completions through the shared pooled client"""
+
+    name = 'azure'
+
+    def __init__(self, default_model: str = MODEL_NAME):
+        self.default_model = default_model
+
+    def complete(self, messages, *, model, temperature=None, max_tokens=None):
+        from ai_models.services.client_registry import get_azure_openai_client
+
+        kwargs = {'model': model, 'messages': messages}
+        if temperature is not None:
+            kwargs['temperature'] = temperature
+        if max_tokens is not None:
+            kwargs['max_tokens'] = max_tokens
+        response = get_azure_openai_client().chat.completions.create(**kwargs)
+        return response.choices[0].message.content
+
+    def stream(self, messages, *, model, temperature=None, max_tokens=None):
+        from ai_models.services.client_registry import get_azure_openai_client
+
+        kwargs = {'model': model, 'messages': messages, 'stream': True}
+        if temperature is not None:
+            kwargs['temperature'] = temperature
+        if max_tokens is not None:
+            kwargs['max_tokens'] = max_tokens
+        for chunk in get_azure_openai_client().chat.completions.create(**kwargs):
+            # Azure sends content-filter chunks with no choices
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic messages API through the shared pooled client"""
+
+    name = 'anthropic'
+
+    def __init__(self, default_model: str = ANTHROPIC_MODEL, max_tokens: int = 1000):
+        self.default_model = default_model
+        self.max_tokens = max_tokens
+
+    def _request(self, messages, model, temperature, max_tokens) -> dict:
+        # Anthropic takes system prompts separately from the conversation
+        system = '\n\n'.join(m['content'] for m in messages if m.get('role') == 'system')
+        kwargs = {
+            'model': model,
+            'max_tokens': max_tokens or self.max_tokens,
+            'messages': [m for m in messages if m.get('role') != 'system'],
+        }
+        if system:
+            kwargs['system'] = system
+        if temperature is not None:
+            kwargs['temperature'] = temperature
+        return kwargs
+
+    def complete(self, messages, *, model, temperature=None, max_tokens=None):
+        from ai_models.services.claude_service import get_anthropic_client
+
+        response = get_anthropic_client().messages.create(**self._request(messages, model, temperature, max_tokens))
+        return ''.join(block.text for block in response.content if getattr(block, 'type', 'text') == 'text')
+
+    def stream(self, messages, *, model, temperature=None, max_tokens=None):
+        from ai_models.services.claude_service import get_anthropic_client
+
+        events = get_anthropic_client().messages.create(stream=True, **self._request(messages, model, temperature, max_tokens))
+        for event in events:
+            if event.type == 'content_block_delta' and getattr(event.delta, 'type', None) == 'text_delta':
+                yield event.delta.text
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take a token, waiting up to timeout seconds for one to become available"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_for = (1 - self._tokens) / self.rate
+            if now + wait_for > deadline:
+                return False
+            time.sleep(wait_for)
+
+
+class ProviderSlot:
+    """A provider with its concurrency limit, rate limit and health"""
+
+    def __init__(self, provider: LLMProvider, max_concurrency: int, rate_limit: float):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_limit)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.skip_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.skip_until
+
+    def hedge_delay(self, default: float) -> float:
+        """Wait this long for an answer before hedging to the next provider"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return default
+        return max(HEDGE_MIN_DELAY, samples[int(len(samples) * 0.95) - 1])
+
+    def acquire(self, timeout: float) -> bool:
+        if not self.semaphore.acquire(timeout=timeout):
+            with self._lock:
+                self.rejected += 1
+            return False
+        if not self.bucket.acquire(timeout=timeout):
+            self.semaphore.release()
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self, latency: float, failed: bool, record_latency: bool = True):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            if failed:
+                self.errors += 1
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= FAILURE_THRESHOLD:
+                    self.skip_until = time.monotonic() + FAILURE_COOLDOWN
+            else:
+                if record_latency:
+                    self.latencies.append(latency)
+                self.consecutive_failures = 0
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self.latencies)
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'hedges': self.hedges,
+                'rejected': self.rejected,
+                'in_flight': self.in_flight,
+                'max_concurrency': self.max_concurrency,
+                'p50_latency_ms': round(samples[len(samples) // 2] * 1000, 1) if samples else None,
+                'p95_latency_ms': round(samples[int(len(samples) * 0.95) - 1] * 1000, 1) if samples else None,
+                'available': self.available(),
+            }
+
+
+class LLMRouter:
+    """
+    Single entry point for LLM traffic across providers
+
+    Providers are tried in order. Each has a concurrency cap and a token-bucket
+    rate limit, so a slow deployment can tie up at most its own slots rather
+    than every worker thread. A request that hasn't answered within the
+    provider's observed p95 latency is hedged to the next provider and the
+    first answer wins; errors, a full provider, or a provider that keeps
+    failing fall through to the next one.
+
+    `model` applies to the first provider tried; fallback and hedge requests
+    use each provider's default model.
     """
-    raise RuntimeError("LLM router not configured. Please implement providers or set up Azure/Anthropic providers.")
+
+    def __init__(self, slots: List[ProviderSlot], hedge_after: float = LLM_HEDGE_AFTER,
+                 timeout: float = LLM_TIMEOUT, queue_timeout: float = QUEUE_TIMEOUT,
+                 max_workers: int = ROUTER_MAX_WORKERS):
+        self.slots = slots
+        self.hedge_after = hedge_after
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-router')
+
+    def generate(self, messages: List[Dict[str, str]], *, model: Optional[str] = None,
+                 temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                 provider: Optional[str] = None) -> str:
+        """Return the text of the first successful completion; `provider` pins the request to one provider by name"""
+        slots = [slot for slot in self.slots if provider is None or slot.name == provider]
+        if provider is not None and not slots:
+            raise LLMRouterError(f"LLM provider {provider} not configured")
+        candidates = [slot for slot in slots if slot.available()] or slots
+        if not candidates:
+            raise LLMRouterError("LLM router not configured. Set up Azure OpenAI or Anthropic credentials.")
+
+        deadline = time.monotonic() + self.timeout
+        errors = {}
+        pending = {}
+        remaining = list(candidates)
+        first = True
+
+        def launch():
+            """Start the next provider that has capacity; False when none is left"""
+            nonlocal first
+            while remaining:
+                slot = remaining.pop(0)
+                if not slot.acquire(self.queue_timeout):
+                    errors[slot.name] = 'at capacity'
+                    continue
+                request_model = (model if first and model else None) or slot.provider.default_model
+                first = False
+                future = self._executor.submit(self._call, slot, messages, request_model, temperature, max_tokens)
+                pending[future] = slot
+                return True
+            return False
+
+        launch()
+        while pending:
+            slot = next(iter(pending.values()))
+            hedge_in = slot.hedge_delay(self.hedge_after) if remaining else None
+            budget = deadline - time.monotonic()
+            if budget <= 0:
+                break
+            done, _ = wait(list(pending), timeout=min(budget, hedge_in) if hedge_in else budget,
+                           return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Tail latency: race the next provider against the slow one
+                if launch():
+                    with slot._lock:
+                        slot.hedges += 1
+                continue
+
+            for future in done:
+                done_slot = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors[done_slot.name] = str(e)
+                    logger.warning("LLM provider %s failed: %s", done_slot.name, e)
+            if not pending:
+                launch()
+
+        if pending:
+            errors.update({slot.name: 'timed out' for slot in pending.values()})
+        raise LLMRouterError(f"No LLM provider answered: {errors}", errors)
+
+    async def agenerate(self, messages: List[Dict[str, str]], *, model: Optional[str] = None,
+                        temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                        provider: Optional[str] = None) -> str:
+        """Async variant of generate() for ASGI views"""
+        return await asyncio.to_thread(
+            self.generate, messages, model=model, temperature=temperature, max_tokens=max_tokens, provider=provider
+        )
+
+    def stream(self, messages: List[Dict[str, str]], *, model: Optional[str] = None,
+               temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+               provider: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield completion text as the provider produces it
+
+        Streams aren't hedged, but a provider that is full or fails before its
+        first token falls through to the next one. Once text has been sent,
+        errors propagate to the caller. `provider` pins the stream to one
+        provider by name.
+        """
+        slots = [slot for slot in self.slots if provider is None or slot.name == provider]
+        if not slots:
+            raise LLMRouterError(f"LLM provider {provider or 'any'} not configured")
+        candidates = [slot for slot in slots if slot.available()] or slots
+
+        errors = {}
+        first = True
+        for slot in candidates:
+            if not slot.acquire(self.queue_timeout):
+                errors[slot.name] = 'at capacity'
+                continue
+            request_model = (model if first and model else None) or slot.provider.default_model
+            first = False
+
+            start = time.monotonic()
+            started = False
+            failed = True
+            try:
+                for piece in slot.provider.stream(messages, model=request_model, temperature=temperature,
+                                                  max_tokens=max_tokens):
+                    started = True
+                    yield piece
+                failed = False
+                return
+            except GeneratorExit:
+                # The client went away; not the provider's fault
+                failed = False
+                raise
+            except Exception as e:
+                if started:
+                    raise
+                errors[slot.name] = str(e)
+                logger.warning("LLM provider %s failed to stream: %s", slot.name, e)
+            finally:
+                # Stream durations depend on output length, so they stay out of the hedging latencies
+                slot.release(time.monotonic() - start, failed, record_latency=False)
+        raise LLMRouterError(f"No LLM provider answered: {errors}", errors)
+
+    def stats(self) -> dict:
+        """Snapshot of per-provider counters"""
+        return {slot.name: slot.stats() for slot in self.slots}
+
+    @staticmethod
+    def _call(slot: ProviderSlot, messages, model, temperature, max_tokens) -> str:
+        start = time.monotonic()
+        failed = True
+        try:
+            content = slot.provider.complete(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+            failed = False
+            return content
+        finally:
+            slot.release(time.monotonic() - start, failed)
+
+
+def build_default_router() -> LLMRouter:
+    """Router over the providers that have credentials configured, in LLM_PROVIDER_ORDER"""
+    available = {}
+    if all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
+        available['azure'] = ProviderSlot(AzureOpenAIProvider(), LLM_AZURE_MAX_CONCURRENCY, LLM_AZURE_RATE_LIMIT)
+    if ANTHROPIC_API_KEY and ANTHROPIC_API_KEY != 'YOUR_ANTHROPIC_API_KEY':
+        available['anthropic'] = ProviderSlot(AnthropicProvider(), LLM_ANTHROPIC_MAX_CONCURRENCY, LLM_ANTHROPIC_RATE_LIMIT)
+    return LLMRouter([available[name] for name in LLM_PROVIDER_ORDER if name in available])
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> LLMRouter:
+    """Process-wide router, built on first use"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = build_default_router()
+    return _router
+
+
+def generate(messages: List[Dict[str, str]], *, model: Optional[str] = None, temperature: Optional[float] = None,
+             max_tokens: Optional[int] = None, provider: Optional[str] = None) -> str:
+    """Send a chat completion through the process-wide router"""
+    return get_router().generate(messages, model=model, temperature=temperature, max_tokens=max_tokens,
+                                 provider=provider)
+
+
+def stream(messages: List[Dict[str, str]], *, model: Optional[str] = None, temperature: Optional[float] = None,
+           max_tokens: Optional[int] = None, provider: Optional[str] = None) -> Iterator[str]:
+    """Stream a chat completion through the process-wide router"""
+    return get_router().stream(messages, model=model, temperature=temperature, max_tokens=max_tokens, provider=provider)
 
 
+async def agenerate(messages: List[Dict[str, str]], *, model: Optional[str] = None, temperature: Optional[float] = None,
+                    max_tokens: Optional[int] = None) -> str:
+    """Async variant of generate()"""
+    return await get_router().agenerate(messages, model=model, temperature=temperature, max_tokens=max_tokens)
@@ -1,16 +1,50 @@
 # internal
 from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
+from ai_models.services import llm_router
+from ai_models.services.llm_cache import is_json_response, llm_cache
+from ai_models.services.streaming import sse_response
 from financial_data.services.fmp_service import fmp_service
+from financial_data.services.sec_service import cik_index
 
 # external
-from openai import AzureOpenAI
 
 # built-in
+from concurrent.futures import ThreadPoolExecutor
 from django.http import JsonResponse
 from django.shortcuts import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 import re
+import time
+
+ENRICHMENT_WAIT_TIMEOUT = 2  # seconds to wait for fundamentals once the LLM has answered
+ENRICHMENT_MAX_WORKERS = 8
+
+# Fundamentals lookups run here while the request thread waits on the LLM
+enrichment_executor = ThreadPoolExecutor(max_workers=ENRICHMENT_MAX_WORKERS, thread_name_prefix='chatgpt-enrichment')
+
+def listed_symbol(prompt: str):
+    """Return the prompt as an upper-case ticker if it is a listed symbol, else None"""
+    candidate = (prompt or '').strip().upper()
+    if not candidate or len(candidate) > 10 or not candidate.replace('-', '').replace('.', '').isalnum():
+        return None
+    try:
+        return candidate if cik_index.lookup(candidate) else None
+    except OSError:
+        # Symbol index unavailable; skip enrichment rather than guess
+        return None
+
+def build_chatgpt_prompt(data: dict):
+    """Return (prompt, analysis_prompt) for a chatgpt request body"""
+    # Support both old and new parameter names for backward compatibility
+    prompt = data.get('prompt') or data.get('user_input', '').strip()
+    
+    # For backward compatibility, if user_input is provided, use the original prompt format
+    if data.get('user_input'):
+        analysis_prompt = f"Give me a short stock analysis of the following stock (ensure the analysis is concise and to the point with no special characters just punctuation and the alphabet. do not list out its metrics but rather give me a 5 sentence paragraph analysis. mention unique and insightful details not just its basic facts such as location, industry, etc. do not use special characters or markdown formatting such as * or _. THE RESPONSE MUST BE IN PLAIN TEXT AND LESS THAN 80 WORDS. do not use an astricks or number sign either): {prompt}"
+    else:
+        analysis_prompt = prompt
+    return prompt, analysis_prompt
 
 @csrf_exempt
 def chatgpt_api(request):
@@ -18,8 +52,7 @@ def chatgpt_api(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            # Support both old and new parameter names for backward compatibility
-            prompt = data.get('prompt') or data.get('user_input', '').strip()
+            prompt, analysis_prompt = build_chatgpt_prompt(data)
             
             if not prompt:
                 return JsonResponse({'error': 'Prompt or user_input required'}, status=400)
@@ -27,60 +60,31 @@ def chatgpt_api(request):
             if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
                 return JsonResponse({'error': 'OpenAI not configured'}, status=500)
             
-            client = AzureOpenAI(
-                api_key=AZURE_OPENAI_KEY,
-                api_version="2023-05-15",
-                azure_endpoint=AZURE_OPENAI_ENDPOINT
-            )
-            
-            # For backward compatibility, if user_input is provided, use the original prompt format
-            if data.get('user_input'):
-                analysis_prompt = f"Give me a short stock analysis of the following stock (ensure the analysis is concise and to the point with no special characters just punctuation and the alphabet. do not list out its metrics but rather give me a 5 sentence paragraph analysis. mention unique and insightful details not just its basic facts such as location, industry, etc. do not use special characters or markdown formatting such as * or _. THE RESPONSE MUST BE IN PLAIN TEXT AND LESS THAN 80 WORDS. do not use an astricks or number sign either): {prompt}"
-            else:
-                analysis_prompt = prompt
-            
-            # Try to interpret the prompt as a symbol to enrich with fundamentals
-            symbol_candidate = (prompt or '').strip().upper()
-            avg_volume = None
-            market_cap = None
-            free_float = None
-            try:
-                # FMP quote and profile for volume and market cap
-                quote = fmp_service.get_stock_quote(symbol_candidate)
-                profile = fmp_service.get_company_profile(symbol_candidate)
-                # Average volume: prefer profile avgVolume, fallback to quote volume
-                avg_volume = (
-                    profile.get('volAvg')
-                    or profile.get('avgVolume')
-                    or quote.get('avgVolume')
-                    or quote.get('volume')
-                ) if isinstance(profile, dict) and isinstance(quote, dict) else None
-                # Market cap
-                market_cap = (
-                    profile.get('mktCap')
-                    or profile.get('marketCap')
-                    or quote.get('marketCap')
-                ) if isinstance(profile, dict) and isinstance(quote, dict) else None
-                # Free float
-                free_float = fmp_service.get_free_float(symbol_candidate)
-            except Exception:
-                pass
+            # Only prompts that are a listed symbol get fundamentals, fetched
+            # alongside the LLM call rather than before it
+            symbol = listed_symbol(prompt)
+            enrichment = enrichment_executor.submit(fmp_service.get_fundamentals_snapshot, symbol) if symbol else None
 
-            response = client.chat.completions.create(
+            content = llm_router.generate(
                 model=MODEL_NAME,
                 messages=[{"role": "user", "content": analysis_prompt}]
             )
             
             result = {
-                'response': response.choices[0].message.content
+                'response': content
             }
-            # Attach fundamentals if we appear to be analyzing a ticker
-            if len(symbol_candidate) > 0 and symbol_candidate.isalnum():
+            if enrichment is not None:
+                try:
+                    fundamentals = enrichment.result(timeout=ENRICHMENT_WAIT_TIMEOUT)
+                except Exception:
+                    # Slow or failed lookup: keep the answer; a late snapshot
+                    # still lands in the cache for next time
+                    fundamentals = {}
                 result.update({
-                    'symbol': symbol_candidate,
-                    'average_volume': avg_volume,
-                    'market_cap': market_cap,
-                    'free_float': free_float
+                    'symbol': symbol,
+                    'average_volume': fundamentals.get('average_volume'),
+                    'market_cap': fundamentals.get('market_cap'),
+                    'free_float': fundamentals.get('free_float')
                 })
             return JsonResponse(result)
             
@@ -91,6 +95,28 @@ def chatgpt_api(request):
     
     return JsonResponse({'error': 'POST required'}, status=400)
 
+@csrf_exempt
+def chatgpt_stream_api(request):
+    """Stream a ChatGPT response as server-sent events"""
+    started = time.monotonic()
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=400)
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    prompt, analysis_prompt = build_chatgpt_prompt(data)
+    if not prompt:
+        return JsonResponse({'error': 'Prompt or user_input required'}, status=400)
+    
+    if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
+        return JsonResponse({'error': 'OpenAI not configured'}, status=500)
+    
+    chunks = llm_router.stream([{"role": "user", "content": analysis_prompt}], model=MODEL_NAME)
+    return sse_response(request, 'chatgpt', chunks, started)
+
 @csrf_exempt
 def phi_confidence_api(request):
     """
@@ -117,12 +143,6 @@ def phi_confidence_api(request):
         return JsonResponse({'error': 'Text input too long (max 5000 characters)'}, status=400)
     
     try:
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         # Construct prompt for confidence scoring
         prompt = f"""
         Analyze the confidence level of the following text for financial/investment decision making.
@@ -142,16 +162,16 @@ def phi_confidence_api(request):
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_cache.complete(
+            'phi_confidence',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are a financial confidence scoring expert. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3  # Lower temperature for more consistent results
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+            temperature=0.3,  # Lower temperature for more consistent results
+            validate=is_json_response
+        ).strip()
         
         # Extract JSON from response (in case there's extra text)
         try:
@@ -194,12 +214,6 @@ def phi_price_targets_api(request):
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return JsonResponse({'error': 'OpenAI not configured'}, status=500)
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         prompt = f"""
         Provide a comprehensive price target analysis for {symbol} stock.
         
@@ -238,16 +252,16 @@ def phi_price_targets_api(request):
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_cache.complete(
+            'phi_price_targets',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are an expert financial analyst. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+            temperature=0.3,
+            validate=is_json_response
+        ).strip()
         
         # Extract JSON from response
         try:
@@ -297,12 +311,6 @@ def phi_news_impact_api(request):
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return JsonResponse({'error': 'OpenAI not configured'}, status=500)
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         prompt = f"""
         Analyze the potential news impact on {symbol} stock.
         
@@ -342,16 +350,16 @@ def phi_news_impact_api(request):
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_cache.complete(
+            'phi_news_impact',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are an expert financial news analyst. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+            temperature=0.3,
+            validate=is_json_response
+        ).strip()
         
         # Extract JSON from response
         try:
@@ -401,12 +409,6 @@ def phi_volume_signals_api(request):
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return JsonResponse({'error': 'OpenAI not configured'}, status=500)
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         prompt = f"""
         Analyze volume trading signals for {symbol} stock.
         
@@ -457,16 +459,16 @@ def phi_volume_signals_api(request):
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_cache.complete(
+            'phi_volume_signals',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are an expert volume analysis specialist. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+            temperature=0.3,
+            validate=is_json_response
+        ).strip()
         
         # Extract JSON from response
         try:
@@ -516,12 +518,6 @@ def phi_options_activity_api(request):
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return JsonResponse({'error': 'OpenAI not configured'}, status=500)
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         prompt = f"""
         Analyze options activity for {symbol} stock.
         
@@ -578,16 +574,16 @@ def phi_options_activity_api(request):
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_cache.complete(
+            'phi_options_activity',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are an expert options flow analyst. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+            temperature=0.3,
+            validate=is_json_response
+        ).strip()
         
         # Extract JSON from response
         try:
@@ -637,12 +633,6 @@ def phi_full_market_analysis_api(request):
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return JsonResponse({'error': 'OpenAI not configured'}, status=500)
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         prompt = f"""
         Provide a comprehensive market analysis for {symbol} across these 4 key areas. Each analysis should be exactly 1-2 sentences:
 
@@ -668,16 +658,16 @@ def phi_full_market_analysis_api(request):
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_cache.complete(
+            'phi_full_market_analysis',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are a financial market analyst providing comprehensive stock analysis. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+            temperature=0.3,
+            validate=is_json_response
+        ).strip()
         
         # Extract JSON from response
         try:
@@ -0,0 +1,167 @@
+# internal
+
+# external
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+# built-in
+from collections import deque
+from typing import AsyncIterator, Iterator
+import asyncio
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TTFB_WINDOW = 500   # recent time-to-first-byte samples kept per endpoint
+
+_DONE = object()
+
+
+class StreamStats:
+    """Time-to-first-byte and duration counters for one streaming endpoint"""
+
+    def __init__(self):
+        self.streams = 0
+        self.errors = 0
+        self.total_duration = 0.0
+        self.ttfb = deque(maxlen=TTFB_WINDOW)
+
+    def as_dict(self) -> dict:
+        samples = sorted(self.ttfb)
+        return {
+            'streams': self.streams,
+            'errors': self.errors,
+            'p50_ttfb_ms': round(samples[len(samples) // 2] * 1000, 1) if samples else None,
+            'p95_ttfb_ms': round(samples[max(0, int(len(samples) * 0.95) - 1)] * 1000, 1) if samples else None,
+            'avg_duration_ms': round(self.total_duration / self.streams * 1000, 1) if self.streams else None,
+        }
+
+
+class StreamMetrics:
+    """Per-endpoint streaming counters; time to first byte is the headline number"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, ttfb, duration: float, failed: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, StreamStats())
+            stats.streams += 1
+            stats.total_duration += duration
+            if ttfb is not None:
+                stats.ttfb.append(ttfb)
+            if failed:
+                stats.errors += 1
+
+    def stats(self) -> dict:
+        """Snapshot of per-endpoint counters"""
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in self._stats.items()}
+
+
+# Global streaming metrics instance
+stream_metrics = StreamMetrics()
+
+
+def sse_event(data: dict, event: str = None) -> bytes:
+    """Encode one server-sent event"""
+    lines = f'event: {event}\n' if event else ''
+    return f'{lines}data: {json.dumps(data)}\n\n'.encode('utf-8')
+
+
+def sse_events(endpoint: str, chunks: Iterator[str], started: float) -> Iterator[bytes]:
+    """
+    Turn completion text pieces into server-sent events
+
+    Each piece becomes a `data: {"delta": ...}` event. The stream ends with a
+    `done` event carrying its timings, or an `error` event if the provider
+    fails part-way.
+    """
+    ttfb = None
+    try:
+        for piece in chunks:
+            if ttfb is None:
+                ttfb = time.monotonic() - started
+            yield sse_event({'delta': piece})
+    except Exception as e:
+        stream_metrics.record(endpoint, ttfb, time.monotonic() - started, failed=True)
+        logger.warning("Stream %s failed: %s", endpoint, e)
+        yield sse_event({'error': str(e)}, event='error')
+        return
+    finally:
+        # Release the provider slot promptly if the client disconnected
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+    duration = time.monotonic() - started
+    stream_metrics.record(endpoint, ttfb, duration)
+    yield sse_event({
+        'ttfb_ms': round(ttfb * 1000, 1) if ttfb is not None else None,
+        'total_ms': round(duration * 1000, 1)
+    }, event='done')
+
+
+async def iterate_in_thread(iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Serve a blocking iterator to the event loop
+
+    The provider SDKs stream synchronously, so a helper thread drives the
+    iterator and hands each item to the loop. The ASGI worker never blocks
+    on the provider, and the helper stops when the client disconnects.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed
+            stop.set()
+
+    def pump():
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                put(item)
+        except Exception as e:
+            logger.warning("Stream pump failed: %s", e)
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                close()
+            put(_DONE)
+
+    threading.Thread(target=pump, name='sse-stream', daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def sse_response(request, endpoint: str, chunks: Iterator[str], started: float) -> StreamingHttpResponse:
+    """
+    StreamingHttpResponse of server-sent events for completion text
+
+    Under ASGI the events are served from an async iterator so the stream
+    doesn't hold a worker thread; under WSGI they are served synchronously.
+    """
+    events = sse_events(endpoint, chunks, started)
+    if isinstance(request, ASGIRequest):
+        events = iterate_in_thread(events)
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # keep proxies from buffering the stream
+    return response
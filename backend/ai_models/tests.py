@@ -1,3 +1,447 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase
+from unittest import mock
+import asyncio
+import json
+import threading
+import time
 
-# Create your tests here.
+from .services import claude_service
+from .services import llm_router as llm_router_module
+from .services import openai_service
+from .services import streaming
+from .services.client_registry import ClientRegistry, get_azure_openai_client
+from .services.llm_cache import LLMResponseCache, is_json_response, llm_cache_key, llm_scoped_key
+from .services.llm_router import LLMProvider, LLMRouter, LLMRouterError, ProviderSlot, TokenBucket
+
+
+class LLMResponseCacheTestCase(SimpleTestCase):
+    """Test cases for the content-addressed LLM response cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.generate = mock.Mock(return_value='{"ok": true}')
+        self.llm_cache = LLMResponseCache(ttls={'default': (60, 600), 'short': (0, 600)}, generate=self.generate)
+        self.messages = [{'role': 'user', 'content': 'Analyze AAPL'}]
+
+    def test_key_normalizes_whitespace(self):
+        """Test that prompts differing only in whitespace share a key while model and temperature changes do not"""
+        indented = [{'role': 'user', 'content': '\n        Analyze   AAPL\n        '}]
+
+        self.assertEqual(llm_cache_key('gpt', self.messages, 0.3), llm_cache_key('gpt', indented, 0.3))
+        self.assertNotEqual(llm_cache_key('gpt', self.messages, 0.3), llm_cache_key('gpt', self.messages, 0.2))
+        self.assertNotEqual(llm_cache_key('gpt', self.messages, 0.3), llm_cache_key('gpt-mini', self.messages, 0.3))
+
+    def test_repeat_request_hits_cache(self):
+        """Test that a repeat request is served without calling the model"""
+        first = self.llm_cache.complete('phi', model='gpt', messages=self.messages, temperature=0.3)
+        second = self.llm_cache.complete('phi', model='gpt', messages=self.messages, temperature=0.3)
+
+        self.assertEqual(first, second)
+        self.generate.assert_called_once_with(self.messages, model='gpt', temperature=0.3)
+        stats = self.llm_cache.stats()['phi']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_stale_entry_served_while_refreshing(self):
+        """Test that a stale answer is returned immediately and refreshed in the background"""
+        self.llm_cache.complete('short', model='gpt', messages=self.messages)
+        refreshed = threading.Event()
+
+        def generate(messages, model, temperature):
+            refreshed.set()
+            return '{"ok": "new"}'
+
+        self.generate.side_effect = generate
+        stale = self.llm_cache.complete('short', model='gpt', messages=self.messages)
+
+        self.assertEqual(stale, '{"ok": true}')
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(100):
+            if cache.get(llm_cache_key('gpt', self.messages))['content'] == '{"ok": "new"}':
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get(llm_cache_key('gpt', self.messages))['content'], '{"ok": "new"}')
+        stats = self.llm_cache.stats()['short']
+        self.assertEqual((stats['misses'], stats['stale_hits'], stats['refreshes']), (1, 1, 1))
+
+    def test_errors_not_cached(self):
+        """Test that a failed call is counted and the next request retries"""
+        self.generate.side_effect = [RuntimeError('timeout'), '{"ok": true}']
+
+        with self.assertRaises(RuntimeError):
+            self.llm_cache.complete('phi', model='gpt', messages=self.messages)
+        result = self.llm_cache.complete('phi', model='gpt', messages=self.messages)
+
+        self.assertEqual(result, '{"ok": true}')
+        self.assertEqual(self.llm_cache.stats()['phi']['errors'], 1)
+
+    def test_unusable_answers_not_cached(self):
+        """Test that an answer failing validation is returned but the next request asks the model again"""
+        self.generate.side_effect = ['Sorry, I cannot help with that.', '```json\n{"ok": true}\n```']
+
+        first = self.llm_cache.complete('phi', model='gpt', messages=self.messages, validate=is_json_response)
+        second = self.llm_cache.complete('phi', model='gpt', messages=self.messages, validate=is_json_response)
+        third = self.llm_cache.complete('phi', model='gpt', messages=self.messages, validate=is_json_response)
+
+        self.assertEqual(first, 'Sorry, I cannot help with that.')
+        self.assertEqual(second, third)
+        self.assertEqual(self.generate.call_count, 2)
+        stats = self.llm_cache.stats()['phi']
+        self.assertEqual((stats['misses'], stats['rejected'], stats['hits']), (2, 1, 1))
+
+    def test_scoped_key_shared_across_prompts(self):
+        """Test that prompts with different embedded prices share an entry under a scoped key"""
+        key = llm_scoped_key('price_target', 'gpt', 'AAPL', '2026-10-16')
+        for price in (187.12, 187.45):
+            self.llm_cache.complete(
+                'price_target', model='gpt', key=key,
+                messages=[{'role': 'user', 'content': f'current_price: {price}'}]
+            )
+
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertNotEqual(key, llm_scoped_key('price_target', 'gpt', 'AAPL', '2026-10-17'))
+
+    def test_phi_endpoint_uses_cache(self):
+        """Test that repeated phi price target requests for a symbol call the model once"""
+        self.generate.return_value = '{"symbol": "AAPL", "analyst_rating": "hold"}'
+        factory = RequestFactory()
+
+        with mock.patch.object(openai_service, 'llm_cache', self.llm_cache), \
+                mock.patch.multiple(openai_service, AZURE_OPENAI_KEY='key', MODEL_NAME='gpt', AZURE_OPENAI_ENDPOINT='https://example'):
+            for _ in range(3):
+                request = factory.post('/', json.dumps({'symbol': 'aapl'}), content_type='application/json')
+                body = json.loads(openai_service.phi_price_targets_api(request).content)
+
+        self.assertEqual(body['analyst_rating'], 'hold')
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(self.llm_cache.stats()['phi_price_targets']['hits'], 2)
+
+
+class ClientRegistryTestCase(SimpleTestCase):
+    """Test cases for the process-wide LLM client registry"""
+
+    def test_one_client_per_config(self):
+        """Test that concurrent callers share a single client per configuration"""
+        factory = mock.Mock(side_effect=lambda **config: object())
+        registry = ClientRegistry(factory)
+        clients = []
+
+        threads = [threading.Thread(target=lambda: clients.append(registry.get(api_key='a'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(client) for client in clients}), 1)
+        self.assertIsNot(registry.get(api_key='b'), clients[0])
+        self.assertEqual(factory.call_count, 2)
+
+    def test_rebuilt_after_fork(self):
+        """Test that a forked worker builds its own client"""
+        registry = ClientRegistry(lambda **config: object())
+        parent = registry.get(api_key='a')
+
+        with mock.patch('os.getpid', return_value=-1):
+            child = registry.get(api_key='a')
+
+        self.assertIsNot(parent, child)
+
+    def test_sdk_clients_shared(self):
+        """Test that the Azure OpenAI and Anthropic helpers reuse their clients"""
+        with mock.patch.multiple('ai_models.services.client_registry',
+                                 AZURE_OPENAI_KEY='key', AZURE_OPENAI_ENDPOINT='https://example.openai.azure.com'):
+            azure = get_azure_openai_client()
+            self.assertIs(get_azure_openai_client(), azure)
+        self.assertIs(claude_service.get_anthropic_client(), claude_service.get_anthropic_client())
+
+
+class FakeProvider(LLMProvider):
+    """Local provider that answers after a delay, or fails"""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.default_model = f'{name}-model'
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def stream(self, messages, *, model, temperature=None, max_tokens=None):
+        if self.error:
+            raise self.error
+        for word in ('streamed', 'by', self.name):
+            time.sleep(self.delay)
+            yield word + ' '
+
+    def complete(self, messages, *, model, temperature=None, max_tokens=None):
+        with self._lock:
+            self.calls.append(model)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return f'{self.name}: {messages[-1]["content"]}'
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class LLMRouterTestCase(SimpleTestCase):
+    """Test cases for the provider-backed LLM router"""
+
+    messages = [{'role': 'user', 'content': 'hello'}]
+
+    def router(self, *providers, concurrency=4, rate=1000, **kwargs):
+        kwargs.setdefault('hedge_after', 5)
+        kwargs.setdefault('timeout', 5)
+        return LLMRouter([ProviderSlot(p, concurrency, rate) for p in providers], **kwargs)
+
+    def test_primary_answers(self):
+        """Test that the first provider answers with the requested model"""
+        primary, backup = FakeProvider('azure'), FakeProvider('anthropic')
+
+        result = self.router(primary, backup).generate(self.messages, model='gpt-4o')
+
+        self.assertEqual(result, 'azure: hello')
+        self.assertEqual(primary.calls, ['gpt-4o'])
+        self.assertEqual(backup.calls, [])
+
+    def test_fallback_on_error(self):
+        """Test that an erroring provider falls through to the next with its default model"""
+        primary = FakeProvider('azure', error=RuntimeError('500'))
+        backup = FakeProvider('anthropic')
+
+        result = self.router(primary, backup).generate(self.messages, model='gpt-4o')
+
+        self.assertEqual(result, 'anthropic: hello')
+        self.assertEqual(backup.calls, ['anthropic-model'])
+
+    def test_hedge_on_slow_provider(self):
+        """Test that a slow provider is raced against the next one"""
+        primary, backup = FakeProvider('azure', delay=1.0), FakeProvider('anthropic')
+        router = self.router(primary, backup, hedge_after=0.05)
+
+        start = time.monotonic()
+        result = router.generate(self.messages)
+
+        self.assertEqual(result, 'anthropic: hello')
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(router.stats()['azure']['hedges'], 1)
+
+    def test_concurrency_cap(self):
+        """Test that a provider never runs more than its cap and overflow goes elsewhere"""
+        primary, backup = FakeProvider('azure', delay=0.2), FakeProvider('anthropic', delay=0.2)
+        router = self.router(primary, backup, concurrency=2, queue_timeout=0.01)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(router.generate(self.messages))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 4)
+        self.assertLessEqual(primary.peak_active, 2)
+        self.assertEqual(sorted(r.split(':')[0] for r in results), ['anthropic', 'anthropic', 'azure', 'azure'])
+
+    def test_failing_provider_skipped(self):
+        """Test that a provider that keeps failing is skipped until its cooldown ends"""
+        primary = FakeProvider('azure', error=RuntimeError('500'))
+        backup = FakeProvider('anthropic')
+        router = self.router(primary, backup)
+
+        for _ in range(5):
+            router.generate(self.messages)
+
+        self.assertEqual(len(primary.calls), 3)
+        self.assertFalse(router.stats()['azure']['available'])
+
+    def test_all_providers_fail(self):
+        """Test that the router raises with each provider's error"""
+        router = self.router(FakeProvider('azure', error=RuntimeError('500')),
+                             FakeProvider('anthropic', error=RuntimeError('overloaded')))
+
+        with self.assertRaises(LLMRouterError) as ctx:
+            router.generate(self.messages)
+
+        self.assertEqual(ctx.exception.errors, {'azure': '500', 'anthropic': 'overloaded'})
+
+    def test_agenerate(self):
+        """Test the async entry point"""
+        result = asyncio.run(self.router(FakeProvider('azure')).agenerate(self.messages))
+
+        self.assertEqual(result, 'azure: hello')
+
+    def test_token_bucket(self):
+        """Test that the bucket allows a burst and then refuses without waiting"""
+        bucket = TokenBucket(rate=1, capacity=2)
+
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire())
+
+
+class StreamingTestCase(SimpleTestCase):
+    """Test cases for the server-sent event chat streams"""
+
+    def setUp(self):
+        self.router = LLMRouter([
+            ProviderSlot(FakeProvider('azure', error=RuntimeError('500')), 4, 1000),
+            ProviderSlot(FakeProvider('anthropic'), 4, 1000),
+        ])
+        self.patches = [
+            mock.patch.object(llm_router_module, 'get_router', return_value=self.router),
+            mock.patch.object(streaming, 'stream_metrics', streaming.StreamMetrics()),
+            mock.patch.multiple(openai_service, AZURE_OPENAI_KEY='key', MODEL_NAME='gpt', AZURE_OPENAI_ENDPOINT='https://example'),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def parse(self, body: bytes):
+        """Split an SSE body into (event, data) pairs"""
+        events = []
+        for block in body.decode('utf-8').strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n'))
+            events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+        return events
+
+    def test_wsgi_stream(self):
+        """Test that tokens arrive as SSE deltas, after falling back before the first token"""
+        request = RequestFactory().post('/', json.dumps({'prompt': 'hi'}), content_type='application/json')
+
+        response = openai_service.chatgpt_stream_api(request)
+        events = self.parse(b''.join(response.streaming_content))
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(''.join(data['delta'] for event, data in events if event == 'message'), 'streamed by anthropic ')
+        self.assertEqual(events[-1][0], 'done')
+        self.assertIsNotNone(events[-1][1]['ttfb_ms'])
+        self.assertEqual(streaming.stream_metrics.stats()['chatgpt']['streams'], 1)
+
+    def test_asgi_stream(self):
+        """Test that ASGI requests get an async iterator that streams from a helper thread"""
+        request = AsyncRequestFactory().post('/', json.dumps({'prompt': 'hi'}), content_type='application/json')
+
+        response = openai_service.chatgpt_stream_api(request)
+
+        async def consume():
+            return b''.join([part async for part in response])
+
+        self.assertTrue(response.is_async)
+        events = self.parse(asyncio.run(consume()))
+        self.assertEqual(events[-1][0], 'done')
+        self.assertEqual(len([e for e, _ in events if e == 'message']), 3)
+
+    def test_stream_error_event(self):
+        """Test that a stream with no provider left ends with an error event"""
+        self.router.slots = self.router.slots[:1]
+        request = RequestFactory().post('/', json.dumps({'prompt': 'hi'}), content_type='application/json')
+
+        events = self.parse(b''.join(openai_service.chatgpt_stream_api(request).streaming_content))
+
+        self.assertEqual(events, [('error', {'error': "No LLM provider answered: {'azure': '500'}"})])
+        self.assertEqual(streaming.stream_metrics.stats()['chatgpt']['errors'], 1)
+
+    def test_claude_stream_pinned(self):
+        """Test that the Claude stream only uses the Anthropic provider"""
+        request = RequestFactory().post('/', json.dumps({'prompt': 'hi'}), content_type='application/json')
+
+        events = self.parse(b''.join(claude_service.claude_stream_api(request).streaming_content))
+
+        self.assertEqual(''.join(data.get('delta', '') for _, data in events), 'streamed by anthropic ')
+        self.assertEqual(self.router.slots[0].provider.calls, [])
+
+
+    def test_claude_api_pinned(self):
+        """Test that the Claude endpoint goes through the router and only uses the Anthropic provider"""
+        request = RequestFactory().post('/', json.dumps({'prompt': 'hi'}), content_type='application/json')
+        self.router.slots[0].provider.error = None
+
+        body = json.loads(claude_service.claude_api(request).content)
+
+        self.assertEqual(body, {'response': 'anthropic: hi'})
+        self.assertEqual(self.router.slots[0].provider.calls, [])
+        self.assertEqual(self.router.stats()['anthropic']['requests'], 1)
+
+
+class ChatGPTEnrichmentTestCase(SimpleTestCase):
+    """Test cases for fundamentals enrichment of chatgpt responses"""
+
+    def setUp(self):
+        cache.clear()
+        self.patches = [
+            mock.patch.multiple(openai_service, AZURE_OPENAI_KEY='key', MODEL_NAME='gpt', AZURE_OPENAI_ENDPOINT='https://example'),
+            mock.patch.object(openai_service.cik_index, 'lookup', side_effect=lambda t: '0000320193' if t.lower() == 'aapl' else None),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        cache.clear()
+
+    def post(self, prompt):
+        request = RequestFactory().post('/', json.dumps({'prompt': prompt}), content_type='application/json')
+        return json.loads(openai_service.chatgpt_api(request).content)
+
+    def test_non_ticker_skips_fmp(self):
+        """Test that prompts which aren't listed symbols make no FMP calls"""
+        fmp = openai_service.fmp_service
+        with mock.patch.object(llm_router_module, 'generate', return_value='answer'), \
+                mock.patch.object(fmp, 'get_stock_quote') as quote, \
+                mock.patch.object(fmp, 'get_company_profile') as profile, \
+                mock.patch.object(fmp, 'get_free_float') as free_float:
+            for prompt in ('HELLO', 'what is the market doing today'):
+                self.assertEqual(self.post(prompt), {'response': 'answer'})
+
+        quote.assert_not_called()
+        profile.assert_not_called()
+        free_float.assert_not_called()
+
+    def test_enrichment_overlaps_llm(self):
+        """Test that fundamentals are fetched while the LLM call is in flight"""
+        fmp = openai_service.fmp_service
+        fmp_started = threading.Event()
+
+        def generate(*args, **kwargs):
+            # Only returns if the FMP calls start before the LLM answers
+            self.assertTrue(fmp_started.wait(2))
+            return 'answer'
+
+        def quote(ticker):
+            fmp_started.set()
+            return {'volume': 100, 'marketCap': 5}
+
+        with mock.patch.object(llm_router_module, 'generate', side_effect=generate), \
+                mock.patch.object(fmp, 'get_stock_quote', side_effect=quote), \
+                mock.patch.object(fmp, 'get_company_profile', return_value={'volAvg': 250}), \
+                mock.patch.object(fmp, 'get_free_float', return_value=42.0):
+            result = self.post(' aapl ')
+
+        self.assertEqual(result, {
+            'response': 'answer', 'symbol': 'AAPL', 'average_volume': 250, 'market_cap': 5, 'free_float': 42.0
+        })
+
+    def test_snapshot_shared_through_cache(self):
+        """Test that repeat requests for a ticker reuse one fundamentals snapshot"""
+        fmp = openai_service.fmp_service
+        with mock.patch.object(llm_router_module, 'generate', return_value='answer'), \
+                mock.patch.object(fmp, 'get_stock_quote', return_value={}) as quote, \
+                mock.patch.object(fmp, 'get_company_profile', return_value={'mktCap': 7}), \
+                mock.patch.object(fmp, 'get_free_float', return_value=None):
+            first = self.post('AAPL')
+            second = self.post('AAPL')
+
+        self.assertEqual(first, second)
+        self.assertEqual(first['market_cap'], 7)
+        self.assertEqual(quote.call_count, 1)
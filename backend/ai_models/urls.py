@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import openai_view, claude_view, phi_confidence_view
+from .views import openai_view, claude_view, phi_confidence_view, llm_cache_stats_view
 from .services.openai_service import (
     chatgpt_api, 
+    chatgpt_stream_api,
     phi_confidence_api,
     phi_price_targets_api,
     phi_news_impact_api,
@@ -9,7 +10,7 @@ from .services.openai_service import (
     phi_options_activity_api,
     phi_full_market_analysis_api
 )
-from .services.claude_service import claude_api
+from .services.claude_service import claude_api, claude_stream_api
 
 urlpatterns = [
     # Template views
@@ -20,6 +21,10 @@ urlpatterns = [
     # API endpoints - simplified
     path('api/chatgpt/', chatgpt_api, name='chatgpt_api'),
     path('api/claude/', claude_api, name='claude_api'),
+    
+    # Server-sent event streams (serve through backend/asgi.py so streams don't hold a worker thread)
+    path('api/chatgpt/stream/', chatgpt_stream_api, name='chatgpt_stream_api'),
+    path('api/claude/stream/', claude_stream_api, name='claude_stream_api'),
     path('api/phi_confidence/', phi_confidence_api, name='phi_confidence_api'),
     
     # New Phi Market Analysis API endpoints
@@ -28,4 +33,7 @@ urlpatterns = [
     path('api/phi_volume_signals/', phi_volume_signals_api, name='phi_volume_signals_api'),
     path('api/phi_options_activity/', phi_options_activity_api, name='phi_options_activity_api'),
     path('api/phi_full_market_analysis/', phi_full_market_analysis_api, name='phi_full_market_analysis_api'),
+    
+    # LLM response cache metrics
+    path('api/llm_cache/stats/', llm_cache_stats_view, name='llm_cache_stats'),
 ]
\ No newline at end of file
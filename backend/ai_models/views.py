@@ -1,6 +1,9 @@
 # internal
 from ai_models.services.openai_service import chatgpt_api, phi_confidence_api
 from ai_models.services.claude_service import claude_api
+from ai_models.services import llm_router
+from ai_models.services.llm_cache import llm_cache
+from ai_models.services.streaming import stream_metrics
 
 # external
 # built-in
@@ -32,3 +35,12 @@ def phi_confidence_view(request):
     """Phi confidence API view - redirect to simplified endpoint"""
     return phi_confidence_api(request)
 
+def llm_cache_stats_view(request):
+    """Get LLM response cache hit/miss counters, per-provider router counters and stream time-to-first-byte"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'GET required'}, status=400)
+    return JsonResponse({
+        'endpoints': llm_cache.stats(),
+        'providers': llm_router.get_router().stats(),
+        'streams': stream_metrics.stats()
+    })
@@ -8,10 +8,10 @@ from .models import (
 
 @admin.register(BrokerageAccount)
 class BrokerageAccountAdmin(admin.ModelAdmin):
-    list_display = ('user', 'brokerage_name', 'account_name', 'status', 'is_active', 'created_at', 'last_sync')
+    list_display = ('user', 'brokerage_name', 'account_name', 'status', 'is_active', 'created_at', 'last_sync', 'sync_status', 'next_sync_at')
     list_filter = ('brokerage_name', 'status', 'is_active', 'created_at')
     search_fields = ('user__username', 'account_name', 'account_id')
-    readonly_fields = ('id', 'created_at', 'updated_at', 'last_sync', 'error_count')
+    readonly_fields = ('id', 'created_at', 'updated_at', 'last_sync', 'error_count', 'sync_status', 'sync_started_at', 'last_sync_result')
     
     fieldsets = (
         ('Account Information', {
@@ -25,6 +25,10 @@ class BrokerageAccountAdmin(admin.ModelAdmin):
             'fields': ('id', 'created_at', 'updated_at', 'last_sync', 'error_count', 'last_error'),
             'classes': ('collapse',)
         }),
+        ('Sync Schedule', {
+            'fields': ('sync_status', 'sync_started_at', 'next_sync_at', 'last_sync_result'),
+            'classes': ('collapse',)
+        }),
     )
 
 
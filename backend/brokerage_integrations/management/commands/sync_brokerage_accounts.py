@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from brokerage_integrations.services.sync_scheduler import (
+    SYNC_BATCH_SIZE, SYNC_MAX_WORKERS, SYNC_POLL_INTERVAL, SyncScheduler
+)
+
+
+class Command(BaseCommand):
+    help = "Sync brokerage accounts that are due or queued; pass --loop to keep running as the sync worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for due accounts')
+        parser.add_argument('--interval', type=float, default=SYNC_POLL_INTERVAL,
+                            help='Seconds between passes that find nothing due (with --loop)')
+        parser.add_argument('--workers', type=int, default=SYNC_MAX_WORKERS,
+                            help='Accounts synced at once across all brokerages')
+        parser.add_argument('--limit', type=int, default=SYNC_BATCH_SIZE,
+                            help='Accounts claimed per pass')
+
+    def handle(self, *args, **options):
+        scheduler = SyncScheduler(max_workers=options['workers'])
+        if options['loop']:
+            self.stdout.write(f"Syncing due brokerage accounts every {options['interval']}s")
+            scheduler.run_forever(interval=options['interval'], limit=options['limit'])
+            return
+
+        try:
+            summary = scheduler.run_once(limit=options['limit'])
+        except Exception as e:
+            raise CommandError(f"Brokerage sync failed: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {summary['succeeded']} of {summary['claimed']} due accounts ({summary['failed']} failed)"
+        ))
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def remove_duplicate_transactions(apps, schema_editor):
+    """Keep the earliest stored copy of each (account, transaction_id) pair"""
+    Transaction = apps.get_model('brokerage_integrations', 'Transaction')
+    duplicates = (
+        Transaction.objects.exclude(transaction_id=None)
+        .values('account_id', 'transaction_id')
+        .annotate(copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = Transaction.objects.filter(
+            account_id=duplicate['account_id'],
+            transaction_id=duplicate['transaction_id']
+        ).order_by('created_at', 'id')
+        keep = rows.values_list('id', flat=True).first()
+        rows.exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokerage_integrations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_transactions, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='transaction',
+            unique_together={('account', 'transaction_id')},
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:16
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokerage_integrations', '0002_transaction_unique_transaction_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brokerageaccount',
+            name='last_sync_result',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='brokerageaccount',
+            name='next_sync_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='brokerageaccount',
+            name='sync_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='brokerageaccount',
+            name='sync_status',
+            field=models.CharField(choices=[('idle', 'Idle'), ('queued', 'Queued'), ('running', 'Running')], default='idle', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='brokerageaccount',
+            index=models.Index(fields=['is_active', 'next_sync_at'], name='brokerage_account_due_idx'),
+        ),
+    ]
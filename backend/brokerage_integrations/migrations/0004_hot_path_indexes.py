@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brokerage_integrations', '0003_account_sync_schedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='brokerageaccount',
+            index=models.Index(fields=['user', 'is_active', 'status'], name='brokerage_account_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['account', '-market_value'], name='portfolio_account_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'transaction_date'], name='transaction_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'transaction_type', 'transaction_date'], name='transaction_acct_type_date_idx'),
+        ),
+    ]
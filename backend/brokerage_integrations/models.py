@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import uuid
 
 
@@ -28,6 +29,12 @@ class BrokerageAccount(models.Model):
         ('error', 'Error'),
     ]
     
+    SYNC_STATUS_CHOICES = [
+        ('idle', 'Idle'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='brokerage_accounts')
     brokerage_name = models.CharField(max_length=50, choices=BROKERAGE_CHOICES)
@@ -48,9 +55,19 @@ class BrokerageAccount(models.Model):
     last_error = models.TextField(blank=True, null=True)
     error_count = models.IntegerField(default=0)
     
+    # Background sync scheduling
+    sync_status = models.CharField(max_length=20, choices=SYNC_STATUS_CHOICES, default='idle')
+    sync_started_at = models.DateTimeField(null=True, blank=True)
+    next_sync_at = models.DateTimeField(default=timezone.now)
+    last_sync_result = models.JSONField(null=True, blank=True)
+    
     class Meta:
         unique_together = ['user', 'brokerage_name']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'next_sync_at'], name='brokerage_account_due_idx'),
+            models.Index(fields=['user', 'is_active', 'status'], name='brokerage_account_user_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.get_brokerage_name_display()}"
@@ -98,6 +115,9 @@ class Portfolio(models.Model):
     class Meta:
         unique_together = ['account', 'symbol']
         ordering = ['-market_value']
+        indexes = [
+            models.Index(fields=['account', '-market_value'], name='portfolio_account_value_idx'),
+        ]
     
     def __str__(self):
         return f"{self.account} - {self.symbol}"
@@ -128,7 +148,12 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        unique_together = ['account', 'transaction_id']
         ordering = ['-transaction_date']
+        indexes = [
+            models.Index(fields=['account', 'transaction_date'], name='transaction_account_date_idx'),
+            models.Index(fields=['account', 'transaction_type', 'transaction_date'], name='transaction_acct_type_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.account} - {self.get_transaction_type_display()} - {self.symbol or 'Cash'}"
@@ -0,0 +1,109 @@
+from django.db.models import Q, Sum
+from django.utils import timezone
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from .models import Portfolio, Transaction
+
+
+def filter_transactions(transactions, params):
+    """Apply the start_date, end_date and transaction_type query parameters; bad dates are ignored"""
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    transaction_type = params.get('transaction_type')
+
+    if start_date:
+        try:
+            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+            transactions = transactions.filter(transaction_date__gte=start_dt)
+        except ValueError:
+            pass
+
+    if end_date:
+        try:
+            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+            transactions = transactions.filter(transaction_date__lte=end_dt)
+        except ValueError:
+            pass
+
+    if transaction_type:
+        transactions = transactions.filter(transaction_type=transaction_type)
+
+    return transactions
+
+
+def account_positions(account):
+    """One account's positions, largest first (portfolio_account_value_idx)"""
+    return Portfolio.objects.filter(account=account).order_by('-market_value')
+
+
+def account_transactions(account, params):
+    """One account's transactions, newest first (transaction_account_date_idx / transaction_acct_type_date_idx)"""
+    return filter_transactions(Transaction.objects.filter(account=account), params).order_by('-transaction_date')
+
+
+def connected_positions(user_id):
+    """Positions across a user's connected accounts, joined through brokerage_account_user_idx"""
+    return Portfolio.objects.filter(
+        account__user_id=user_id, account__is_active=True, account__status='connected'
+    )
+
+
+def connected_transactions(user_id, params):
+    """Transactions across a user's connected accounts, newest first with id as the tie-breaker"""
+    transactions = Transaction.objects.filter(
+        account__user_id=user_id, account__is_active=True, account__status='connected'
+    ).select_related('account')
+    return filter_transactions(transactions, params).order_by('-transaction_date', '-id')
+
+
+def position_totals(positions):
+    """Per-symbol quantity and market value totals, summed in SQL, largest holdings first"""
+    return (
+        positions.values('symbol')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_market_value=Sum('market_value', default=Decimal('0'))
+        )
+        .order_by('-total_market_value', 'symbol')
+    )
+
+
+def transaction_cursor(transaction):
+    """Keyset cursor `<transaction_date>,<id>` pointing just past a transaction"""
+    return f'{transaction.transaction_date.isoformat()},{transaction.id}'
+
+
+def parse_transaction_cursor(cursor: str):
+    """Split a `<transaction_date>,<id>` cursor; raises ValueError if malformed"""
+    date_part, _, id_part = cursor.rpartition(',')
+    # An unencoded '+' in the UTC offset arrives as a space
+    before_date = datetime.fromisoformat(date_part.strip().replace(' ', '+').replace('Z', '+00:00'))
+    if timezone.is_naive(before_date):
+        before_date = timezone.make_aware(before_date)
+    return before_date, uuid.UUID(id_part.strip())
+
+
+def transaction_page(transactions, before, limit):
+    """
+    One page of transactions ordered newest first with id as the tie-breaker
+
+    Keyset pagination: only rows strictly after the `before` cursor in
+    (transaction_date, id) order are read, so deep pages cost the same as the
+    first. Raises ValueError for a malformed cursor.
+
+    Returns:
+        (transactions on the page, cursor for the next page or None)
+    """
+    if before:
+        before_date, before_id = parse_transaction_cursor(before)
+        transactions = transactions.filter(
+            Q(transaction_date__lt=before_date)
+            | Q(transaction_date=before_date, id__lt=before_id)
+        )
+    
+    # One row past the page tells us whether there is another page
+    page = list(transactions.order_by('-transaction_date', '-id')[:limit + 1])
+    next_before = transaction_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_before
@@ -2,12 +2,17 @@ import requests
 import json
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+import time
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_CALL_TIMEOUT = 30       # seconds each call in fetch_snapshot may take
+SNAPSHOT_TRANSACTION_DAYS = 30   # default transaction window of a snapshot
+
 
 class BaseBrokerageService(ABC):
     """Base class for all brokerage integration services"""
@@ -50,6 +55,49 @@ class BaseBrokerageService(ABC):
         """Get account balance information"""
         pass
     
+    def fetch_snapshot(self, start_date: datetime = None, timeout: float = SNAPSHOT_CALL_TIMEOUT) -> Dict[str, Any]:
+        """
+        Fetch balance, portfolio and transactions concurrently
+        
+        The three calls are independent, so they run side by side on the
+        shared session and the snapshot takes as long as the slowest one.
+        Every call must finish within `timeout` seconds of the snapshot
+        starting. Transactions are requested up to the snapshot's `as_of`
+        time, so all three parts describe the same moment.
+        
+        Returns:
+            Dictionary with as_of, balance, portfolio and transactions, plus
+            errors mapping each failed or timed-out part to its message
+        """
+        as_of = datetime.now(timezone.utc)
+        start_date = start_date or as_of - timedelta(days=SNAPSHOT_TRANSACTION_DAYS)
+        calls = {
+            'balance': (self.get_balance, {}),
+            'portfolio': (self.get_portfolio, {}),
+            'transactions': (self.get_transactions, {'start_date': start_date, 'end_date': as_of}),
+        }
+        
+        snapshot = {'as_of': as_of, 'errors': {}}
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix='brokerage-snapshot')
+        try:
+            futures = {name: executor.submit(call, **kwargs) for name, (call, kwargs) in calls.items()}
+            deadline = time.monotonic() + timeout
+            for name, future in futures.items():
+                try:
+                    snapshot[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    snapshot[name] = None
+                    snapshot['errors'][name] = f'Timed out after {timeout}s'
+                except Exception as e:
+                    logger.error(f"Snapshot {name} request failed: {e}")
+                    snapshot[name] = None
+                    snapshot['errors'][name] = str(e)
+        finally:
+            # Don't wait on calls that overran their deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return snapshot
+    
     def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
         """Make HTTP request with error handling"""
         try:
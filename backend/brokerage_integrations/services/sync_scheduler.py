@@ -0,0 +1,281 @@
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+import logging
+import random
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from ..models import BrokerageAccount, BrokerageSettings
+from .service_factory import BrokerageServiceFactory
+from .sync_writer import insert_transactions, upsert_positions
+
+logger = logging.getLogger(__name__)
+
+SYNC_MAX_WORKERS = 8                  # accounts synced at once across all brokerages
+SYNC_BROKERAGE_CONCURRENCY = {        # accounts synced at once per brokerage
+    'default': 2,
+    'ibkr': 1,                        # TWS/Gateway serves one client session at a time
+}
+SYNC_BATCH_SIZE = 100                 # due accounts claimed per scheduler pass
+SYNC_POLL_INTERVAL = 30               # seconds between scheduler passes
+SYNC_JITTER = 0.1                     # +/- fraction applied to every scheduled delay
+SYNC_BACKOFF_BASE = 5 * 60            # seconds before the first retry after a failure
+SYNC_BACKOFF_MAX = 24 * 3600          # longest wait between retries
+SYNC_STALE_AFTER = 30 * 60            # seconds before a 'running' claim is considered abandoned
+SYNC_TRANSACTION_DAYS = 30            # days of transaction history fetched per sync
+DEFAULT_SYNC_FREQUENCY_HOURS = 24
+
+
+def _jittered(seconds: float) -> timedelta:
+    """Spread scheduled syncs so accounts connected together don't stay in lockstep"""
+    return timedelta(seconds=seconds * random.uniform(1 - SYNC_JITTER, 1 + SYNC_JITTER))
+
+
+def next_sync_time(account: BrokerageAccount, now: datetime) -> datetime:
+    """
+    When an account should next be synced
+
+    Healthy accounts follow the user's sync_frequency_hours. Failing accounts
+    back off exponentially with error_count, capped at SYNC_BACKOFF_MAX.
+    """
+    if account.error_count:
+        delay = min(SYNC_BACKOFF_BASE * 2 ** (account.error_count - 1), SYNC_BACKOFF_MAX)
+    else:
+        try:
+            hours = account.user.brokerage_settings.sync_frequency_hours
+        except BrokerageSettings.DoesNotExist:
+            hours = DEFAULT_SYNC_FREQUENCY_HOURS
+        delay = hours * 3600
+    return now + _jittered(delay)
+
+
+def syncable_accounts():
+    """Accounts the scheduler will sync: active and not disconnected"""
+    return BrokerageAccount.objects.filter(is_active=True).exclude(status='disconnected')
+
+
+def due_accounts(now: Optional[datetime] = None):
+    """
+    Active accounts whose next sync is due
+
+    Queued accounts (requested over HTTP) are always due; others only when
+    the user has auto sync enabled, or has no settings yet. Served by the
+    (is_active, next_sync_at) index.
+    """
+    now = now or timezone.now()
+    return (
+        syncable_accounts()
+        .filter(next_sync_at__lte=now)
+        .filter(
+            Q(sync_status='queued')
+            | Q(user__brokerage_settings__isnull=True)
+            | Q(user__brokerage_settings__auto_sync_enabled=True)
+        )
+        .exclude(sync_status='running', sync_started_at__gt=now - timedelta(seconds=SYNC_STALE_AFTER))
+        .select_related('user__brokerage_settings')
+        .order_by('next_sync_at')
+    )
+
+
+def claim_due_accounts(now: Optional[datetime] = None, limit: int = SYNC_BATCH_SIZE) -> List[BrokerageAccount]:
+    """
+    Mark a batch of due accounts as running and return them
+
+    Rows are locked with SKIP LOCKED so several scheduler processes can run
+    side by side without syncing the same account twice.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        accounts = list(
+            due_accounts(now).select_for_update(skip_locked=True, of=('self',))[:limit]
+        )
+        BrokerageAccount.objects.filter(id__in=[account.id for account in accounts]).update(
+            sync_status='running', sync_started_at=now
+        )
+    for account in accounts:
+        account.sync_status = 'running'
+        account.sync_started_at = now
+    return accounts
+
+
+def enqueue_sync(account: BrokerageAccount) -> str:
+    """
+    Ask the scheduler to sync an account on its next pass
+
+    Inactive and disconnected accounts are never synced, so they aren't queued.
+
+    Returns:
+        The account's sync status afterwards ('queued', or 'running' if a sync
+        is already under way), or None if the account can't be synced
+    """
+    accounts = syncable_accounts().filter(id=account.id)
+    queued = accounts.exclude(sync_status='running').update(
+        sync_status='queued', next_sync_at=timezone.now()
+    )
+    if queued:
+        return 'queued'
+    return 'running' if accounts.exists() else None
+
+
+def run_account_sync(account: BrokerageAccount) -> Dict[str, Any]:
+    """
+    Sync one account's balance, positions and transactions
+
+    Remote calls are made before the database transaction is opened, so no
+    transaction is held open while waiting on the brokerage. A snapshot with
+    any failed or timed-out part counts as a failed sync. The outcome and
+    the next scheduled sync are recorded on the account either way.
+
+    Returns:
+        Dictionary with success and either the synced counts or an error
+    """
+    now = timezone.now()
+    try:
+        tokens = {token.token_type: token.token_value for token in account.tokens.all()}
+        service = BrokerageServiceFactory.create_service(
+            account.brokerage_name,
+            account_id=account.account_id,
+            **tokens
+        )
+        if not service:
+            raise RuntimeError(f'Failed to create service for {account.brokerage_name}')
+        if not service.authenticate():
+            raise RuntimeError('Authentication failed')
+
+        # Balance, portfolio and transactions are fetched concurrently
+        snapshot = service.fetch_snapshot(start_date=now - timedelta(days=SYNC_TRANSACTION_DAYS))
+        if snapshot['errors']:
+            raise RuntimeError('; '.join(f'{name}: {error}' for name, error in snapshot['errors'].items()))
+        balance_data = snapshot['balance'] or {}
+        portfolio_data = snapshot['portfolio']
+        transactions_data = snapshot['transactions']
+
+        with transaction.atomic():
+            if portfolio_data:
+                upsert_positions(account, portfolio_data)
+            if transactions_data:
+                insert_transactions(account, transactions_data)
+
+            if balance_data.get('success'):
+                balance = balance_data['data']
+                account.cash_balance = balance.get('cash_balance')
+                account.total_value = balance.get('total_value')
+                account.buying_power = balance.get('buying_power')
+            result = {
+                'success': True,
+                'portfolio_count': len(portfolio_data) if portfolio_data else 0,
+                'transactions_count': len(transactions_data) if transactions_data else 0
+            }
+            account.status = 'connected'
+            account.last_sync = snapshot['as_of']
+            account.error_count = 0
+            account.last_error = None
+            _finish(account, result)
+        return result
+
+    except Exception as e:
+        logger.error(f"Error syncing account {account.id}: {e}")
+        result = {'success': False, 'error': str(e)}
+        account.status = 'error'
+        account.last_error = str(e)
+        account.error_count += 1
+        _finish(account, result)
+        return result
+
+
+def _finish(account: BrokerageAccount, result: Dict[str, Any]):
+    """Record a sync outcome and schedule the next one"""
+    account.sync_status = 'idle'
+    account.sync_started_at = None
+    account.last_sync_result = result
+    account.next_sync_at = next_sync_time(account, timezone.now())
+    account.save(update_fields=[
+        'status', 'last_sync', 'error_count', 'last_error', 'cash_balance', 'total_value',
+        'buying_power', 'sync_status', 'sync_started_at', 'last_sync_result', 'next_sync_at', 'updated_at'
+    ])
+
+
+class SyncScheduler:
+    """
+    Syncs due brokerage accounts on a worker pool
+
+    Each pass claims a batch of due accounts and runs them with at most
+    max_workers in flight overall and at most the brokerage's cap in flight
+    per brokerage, so one slow or rate-limited brokerage can't take every
+    worker.
+    """
+
+    def __init__(self, max_workers: int = SYNC_MAX_WORKERS,
+                 brokerage_concurrency: Dict[str, int] = None,
+                 sync=run_account_sync):
+        self.max_workers = max_workers
+        self.brokerage_concurrency = brokerage_concurrency or SYNC_BROKERAGE_CONCURRENCY
+        self.sync = sync
+
+    def _cap(self, brokerage_name: str) -> int:
+        return self.brokerage_concurrency.get(brokerage_name, self.brokerage_concurrency['default'])
+
+    def _sync(self, account: BrokerageAccount) -> Dict[str, Any]:
+        try:
+            return self.sync(account)
+        finally:
+            # Worker threads each hold their own connection
+            connection.close()
+
+    def run_once(self, limit: int = SYNC_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Sync one batch of due accounts and wait for them to finish
+
+        Returns:
+            Dictionary with counts of claimed, succeeded and failed accounts
+        """
+        accounts = claim_due_accounts(limit=limit)
+        summary = {'claimed': len(accounts), 'succeeded': 0, 'failed': 0}
+        if not accounts:
+            return summary
+
+        pending = defaultdict(deque)
+        for account in accounts:
+            pending[account.brokerage_name].append(account)
+        running = defaultdict(int)
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='brokerage-sync') as executor:
+            def fill():
+                for brokerage_name, queue in pending.items():
+                    while queue and running[brokerage_name] < self._cap(brokerage_name) and len(futures) < self.max_workers:
+                        account = queue.popleft()
+                        running[brokerage_name] += 1
+                        futures[executor.submit(self._sync, account)] = brokerage_name
+
+            fill()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running[futures.pop(future)] -= 1
+                    try:
+                        succeeded = future.result().get('success')
+                    except Exception as e:
+                        logger.error(f"Brokerage sync worker failed: {e}")
+                        succeeded = False
+                    summary['succeeded' if succeeded else 'failed'] += 1
+                fill()
+
+        return summary
+
+    def run_forever(self, interval: float = SYNC_POLL_INTERVAL, limit: int = SYNC_BATCH_SIZE):
+        """Run passes until interrupted, sleeping between passes that found nothing due"""
+        while True:
+            try:
+                summary = self.run_once(limit=limit)
+            except Exception as e:
+                logger.error(f"Brokerage sync pass failed: {e}")
+                summary = {'claimed': 0}
+            if summary['claimed']:
+                logger.info(f"Brokerage sync pass: {summary}")
+            else:
+                time.sleep(interval)
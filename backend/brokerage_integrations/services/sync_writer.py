@@ -0,0 +1,140 @@
+from django.utils import timezone
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+import hashlib
+import logging
+from typing import Any, Dict, List
+
+from ..models import Portfolio, Transaction
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_BATCH_SIZE = 500  # rows per INSERT when writing synced transactions
+
+POSITION_FIELDS = [
+    'quantity', 'average_price', 'current_price', 'market_value',
+    'unrealized_pnl', 'unrealized_pnl_percent'
+]
+TRANSACTION_FIELDS = [
+    'transaction_id', 'transaction_type', 'symbol', 'quantity',
+    'price', 'amount', 'fees', 'transaction_date'
+]
+
+
+def _stored_value(model, name: str, value: Any) -> Any:
+    """A value as the database stores it in model's field, with decimals rounded to the column's places"""
+    field = model._meta.get_field(name)
+    value = field.to_python(value)
+    if isinstance(value, Decimal):
+        value = value.quantize(Decimal(1).scaleb(-field.decimal_places), context=field.context)
+    return value
+
+
+def _position_values(position: Dict[str, Any]) -> tuple:
+    """
+    Position fields as the database stores them, for comparison with existing rows
+
+    Values are rounded to each field's decimal places, so a brokerage reporting
+    more precision than the column keeps doesn't look changed on every sync.
+    """
+    return tuple(_stored_value(Portfolio, name, position.get(name)) for name in POSITION_FIELDS)
+
+
+def _surrogate_transaction_id(row: Transaction) -> str:
+    """
+    Stable id for a transaction the brokerage sent without one
+
+    Built from the transaction's stored field values, so the same transaction
+    gets the same id on every sync and the (account, transaction_id)
+    constraint can deduplicate it; the database treats NULL ids as distinct.
+    """
+    values = []
+    for name in TRANSACTION_FIELDS:
+        if name == 'transaction_id':
+            continue
+        value = _stored_value(Transaction, name, getattr(row, name))
+        if isinstance(value, datetime):
+            value = value.astimezone(dt_timezone.utc) if timezone.is_aware(value) else value
+            value = value.isoformat()
+        values.append(value)
+    return f"sync-{hashlib.sha1(repr(values).encode('utf-8')).hexdigest()}"
+
+
+def upsert_positions(account, positions: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Bring an account's Portfolio rows in line with the brokerage's positions
+
+    Existing rows are read in one query and compared with the incoming
+    positions. New and changed positions are written with a single upsert on
+    (account, symbol); positions no longer held are deleted in one statement.
+    Unchanged rows are left alone.
+
+    Returns:
+        Dictionary with counts of written, unchanged and removed positions
+    """
+    existing = {
+        row[0]: tuple(row[1:])
+        for row in Portfolio.objects.filter(account=account).values_list('symbol', *POSITION_FIELDS)
+    }
+
+    now = timezone.now()
+    changed = []
+    symbols = set()
+    for position in positions:
+        symbol = position['symbol']
+        symbols.add(symbol)
+        values = _position_values(position)
+        if existing.get(symbol) == values:
+            continue
+        changed.append(Portfolio(
+            account=account,
+            symbol=symbol,
+            last_updated=now,
+            **dict(zip(POSITION_FIELDS, values))
+        ))
+
+    if changed:
+        Portfolio.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=['account', 'symbol'],
+            update_fields=POSITION_FIELDS + ['last_updated']
+        )
+
+    removed = 0
+    stale = set(existing) - symbols
+    if stale:
+        removed, _ = Portfolio.objects.filter(account=account, symbol__in=stale).delete()
+
+    return {
+        'written': len(changed),
+        'unchanged': len(symbols) - len(changed),
+        'removed': removed
+    }
+
+
+def insert_transactions(account, transactions: List[Dict[str, Any]],
+                        batch_size: int = TRANSACTION_BATCH_SIZE) -> int:
+    """
+    Insert synced transactions, skipping ones already stored
+
+    Deduplication is left to the (account, transaction_id) unique constraint,
+    so no history has to be read back. Transactions without a brokerage id
+    get a surrogate one derived from their contents. Rows are inserted in
+    batches.
+
+    Returns:
+        Number of transactions submitted
+    """
+    rows = [
+        Transaction(account=account, **{field: data.get(field) for field in TRANSACTION_FIELDS})
+        for data in transactions
+    ]
+    for row in rows:
+        if row.fees is None:
+            row.fees = 0
+        if not row.transaction_id:
+            row.transaction_id = _surrogate_transaction_id(row)
+
+    Transaction.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    return len(rows)
@@ -1,14 +1,25 @@
-from django.test import TestCase
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, tag
 from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
 from datetime import datetime, timedelta
+from unittest import mock, skipUnless
+import os
+import re
+import threading
+import time
 
 from .models import (
     BrokerageAccount, BrokerageToken, Portfolio, Transaction, 
     BrokerageWebhook, BrokerageSettings
 )
 from .services.service_factory import BrokerageServiceFactory
+from . import queries
+from .services import sync_scheduler
+from .services.base_service import BaseBrokerageService
+from .services.sync_writer import insert_transactions, upsert_positions
 
 
 class BrokerageIntegrationTestCase(TestCase):
@@ -223,3 +234,532 @@ class BrokerageIntegrationTestCase(TestCase):
             transaction_date__gte=timezone.now() - timedelta(days=7)
         )
         self.assertEqual(recent_transactions.count(), 1)
+
+
+class SyncWriterTestCase(TestCase):
+    """Test cases for writing synced positions and transactions"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(username='syncuser', password='testpass123')
+        self.account = BrokerageAccount.objects.create(
+            user=self.user,
+            brokerage_name='webull',
+            account_id='SYNC123',
+            status='connected'
+        )
+    
+    def position(self, symbol, quantity, market_value):
+        return {
+            'symbol': symbol,
+            'quantity': Decimal(quantity),
+            'average_price': Decimal('100.00'),
+            'current_price': Decimal('110.00'),
+            'market_value': Decimal(market_value),
+            'unrealized_pnl': Decimal('10.00'),
+            'unrealized_pnl_percent': Decimal('10.0')
+        }
+    
+    def transaction(self, transaction_id, days_ago=1):
+        return {
+            'transaction_id': transaction_id,
+            'transaction_type': 'buy',
+            'symbol': 'AAPL',
+            'quantity': Decimal('1.0'),
+            'price': Decimal('150.00'),
+            'amount': Decimal('150.00'),
+            'fees': Decimal('0.00'),
+            'transaction_date': timezone.now() - timedelta(days=days_ago)
+        }
+    
+    def test_positions_diffed(self):
+        """Test that positions are upserted, left alone when unchanged and removed when closed"""
+        upsert_positions(self.account, [
+            self.position('AAPL', '10', '1100.00'),
+            self.position('MSFT', '5', '550.00'),
+        ])
+        aapl_id = Portfolio.objects.get(account=self.account, symbol='AAPL').id
+        
+        with self.assertNumQueries(3):
+            result = upsert_positions(self.account, [
+                self.position('AAPL', '12', '1320.00'),
+                self.position('GOOGL', '1', '110.00'),
+            ])
+        
+        self.assertEqual(result, {'written': 2, 'unchanged': 0, 'removed': 1})
+        aapl = Portfolio.objects.get(account=self.account, symbol='AAPL')
+        self.assertEqual(aapl.id, aapl_id)
+        self.assertEqual(aapl.quantity, Decimal('12'))
+        self.assertEqual(
+            set(Portfolio.objects.filter(account=self.account).values_list('symbol', flat=True)),
+            {'AAPL', 'GOOGL'}
+        )
+        
+        with self.assertNumQueries(1):
+            result = upsert_positions(self.account, [
+                self.position('AAPL', '12', '1320.00'),
+                self.position('GOOGL', '1', '110.00'),
+            ])
+        self.assertEqual(result, {'written': 0, 'unchanged': 2, 'removed': 0})
+    
+    def test_over_precise_values_unchanged(self):
+        """Test that values with more decimal places than the columns keep compare equal after a write"""
+        position = self.position('AAPL', '10.1234567', '1100.004999')
+        position['unrealized_pnl_percent'] = Decimal('10.000049')
+        upsert_positions(self.account, [position])
+        
+        with self.assertNumQueries(1):
+            result = upsert_positions(self.account, [position])
+        
+        self.assertEqual(result, {'written': 0, 'unchanged': 1, 'removed': 0})
+        aapl = Portfolio.objects.get(account=self.account, symbol='AAPL')
+        self.assertEqual(aapl.market_value, Decimal('1100.00'))
+        self.assertEqual(aapl.quantity, Decimal('10.123457'))
+    
+    def test_transactions_deduplicated_by_database(self):
+        """Test that re-synced transactions are skipped without reading history back"""
+        insert_transactions(self.account, [self.transaction('T1'), self.transaction('T2')])
+        
+        with self.assertNumQueries(1):
+            insert_transactions(self.account, [self.transaction('T2'), self.transaction('T3')])
+        
+        self.assertEqual(
+            sorted(Transaction.objects.filter(account=self.account).values_list('transaction_id', flat=True)),
+            ['T1', 'T2', 'T3']
+        )
+    
+    def test_transactions_without_id_deduplicated(self):
+        """Test that transactions sent without a brokerage id get a stable surrogate and aren't re-inserted"""
+        first_sync = [self.transaction(None, days_ago=1), self.transaction(None, days_ago=2)]
+        second_sync = [dict(data, fees=None, amount=Decimal('150.0')) for data in first_sync]
+        second_sync[0]['transaction_date'] = second_sync[0]['transaction_date'].astimezone(
+            timezone.get_fixed_timezone(-300)
+        )
+        
+        insert_transactions(self.account, first_sync)
+        insert_transactions(self.account, second_sync + [self.transaction(None, days_ago=3)])
+        
+        ids = list(Transaction.objects.filter(account=self.account).values_list('transaction_id', flat=True))
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(all(transaction_id.startswith('sync-') for transaction_id in ids))
+    
+    def test_transactions_inserted_in_batches(self):
+        """Test that large transaction histories are written in batched INSERTs"""
+        with self.assertNumQueries(3):
+            insert_transactions(self.account, [self.transaction(f'T{i}') for i in range(25)], batch_size=10)
+        
+        self.assertEqual(Transaction.objects.filter(account=self.account).count(), 25)
+
+
+class SyncSchedulerTestCase(TestCase):
+    """Test cases for the background account sync scheduler"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.now = timezone.now()
+        self.user = User.objects.create_user(username='auto', password='testpass123')
+        BrokerageSettings.objects.create(user=self.user, auto_sync_enabled=True, sync_frequency_hours=6)
+        self.manual_user = User.objects.create_user(username='manual', password='testpass123')
+        BrokerageSettings.objects.create(user=self.manual_user, auto_sync_enabled=False)
+    
+    def account(self, user, brokerage_name='webull', **fields):
+        fields.setdefault('next_sync_at', self.now - timedelta(minutes=1))
+        fields.setdefault('status', 'connected')
+        return BrokerageAccount.objects.create(
+            user=user, brokerage_name=brokerage_name, account_id=brokerage_name.upper(), **fields
+        )
+    
+    def service(self, authenticated=True):
+        service = mock.Mock()
+        service.authenticate.return_value = authenticated
+        service.fetch_snapshot.return_value = {
+            'as_of': timezone.now(),
+            'balance': {'success': True, 'data': {'cash_balance': Decimal('10.00')}},
+            'portfolio': [],
+            'transactions': [],
+            'errors': {}
+        }
+        return service
+    
+    def test_due_accounts_honor_settings(self):
+        """Test that due accounts are found in one query and respect auto sync settings"""
+        due = self.account(self.user, 'webull')
+        self.account(self.user, 'robinhood', next_sync_at=self.now + timedelta(hours=1))
+        self.account(self.user, 'coinbase', is_active=False)
+        self.account(self.manual_user, 'webull')
+        queued = self.account(self.manual_user, 'robinhood', sync_status='queued')
+        self.account(self.user, 'fidelity', sync_status='running', sync_started_at=self.now)
+        
+        with self.assertNumQueries(1):
+            accounts = list(sync_scheduler.due_accounts(self.now))
+        
+        self.assertEqual({account.id for account in accounts}, {due.id, queued.id})
+    
+    def test_successful_sync_follows_frequency(self):
+        """Test that a successful sync records its result and is rescheduled by sync_frequency_hours"""
+        account = self.account(self.user, error_count=2)
+        
+        with mock.patch.object(sync_scheduler.BrokerageServiceFactory, 'create_service', return_value=self.service()):
+            result = sync_scheduler.run_account_sync(account)
+        
+        account.refresh_from_db()
+        self.assertTrue(result['success'])
+        self.assertEqual(account.sync_status, 'idle')
+        self.assertEqual(account.error_count, 0)
+        self.assertEqual(account.cash_balance, Decimal('10.00'))
+        self.assertEqual(account.last_sync_result, result)
+        delay = (account.next_sync_at - account.last_sync).total_seconds()
+        self.assertTrue(6 * 3600 * 0.9 <= delay <= 6 * 3600 * 1.1)
+    
+    def test_failed_sync_backs_off(self):
+        """Test that repeated failures push the next sync out exponentially"""
+        account = self.account(self.user)
+        
+        delays = []
+        with mock.patch.object(sync_scheduler.BrokerageServiceFactory, 'create_service', return_value=self.service(False)), \
+                mock.patch.object(sync_scheduler, 'SYNC_JITTER', 0):
+            for _ in range(3):
+                before = timezone.now()
+                sync_scheduler.run_account_sync(account)
+                account.refresh_from_db()
+                delays.append(round((account.next_sync_at - before).total_seconds() / 60))
+        
+        self.assertEqual(account.status, 'error')
+        self.assertEqual(account.error_count, 3)
+        self.assertEqual(account.last_error, 'Authentication failed')
+        self.assertEqual(delays, [5, 10, 20])
+    
+    def test_per_brokerage_concurrency(self):
+        """Test that the worker pool never exceeds a brokerage's concurrency cap"""
+        users = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(4)]
+        for user in users:
+            self.account(user, 'webull')
+            self.account(user, 'ibkr')
+        
+        lock = threading.Lock()
+        in_flight = {'webull': 0, 'ibkr': 0}
+        peak = {'webull': 0, 'ibkr': 0}
+        
+        def sync(account):
+            with lock:
+                in_flight[account.brokerage_name] += 1
+                peak[account.brokerage_name] = max(peak[account.brokerage_name], in_flight[account.brokerage_name])
+            time.sleep(0.02)
+            with lock:
+                in_flight[account.brokerage_name] -= 1
+            return {'success': True}
+        
+        scheduler = sync_scheduler.SyncScheduler(max_workers=8, brokerage_concurrency={'default': 3, 'ibkr': 1}, sync=sync)
+        with mock.patch.object(sync_scheduler, 'connection'):
+            summary = scheduler.run_once()
+        
+        self.assertEqual(summary, {'claimed': 8, 'succeeded': 8, 'failed': 0})
+        self.assertEqual(peak['ibkr'], 1)
+        self.assertLessEqual(peak['webull'], 3)
+        self.assertEqual(BrokerageAccount.objects.filter(sync_status='running').count(), 8)
+    
+    def test_enqueue_sync(self):
+        """Test that a requested sync is due on the next pass even with auto sync off"""
+        account = self.account(self.manual_user, next_sync_at=self.now + timedelta(days=1))
+        running = self.account(self.manual_user, 'robinhood', sync_status='running', sync_started_at=self.now)
+        
+        self.assertEqual(sync_scheduler.enqueue_sync(account), 'queued')
+        self.assertEqual(sync_scheduler.enqueue_sync(running), 'running')
+        
+        self.assertEqual([due.id for due in sync_scheduler.due_accounts()], [account.id])
+    
+    def test_enqueue_unsyncable_account(self):
+        """Test that inactive and disconnected accounts aren't queued"""
+        inactive = self.account(self.manual_user, is_active=False)
+        disconnected = self.account(self.manual_user, 'robinhood', status='disconnected')
+        
+        self.assertIsNone(sync_scheduler.enqueue_sync(inactive))
+        self.assertIsNone(sync_scheduler.enqueue_sync(disconnected))
+        
+        self.assertFalse(BrokerageAccount.objects.filter(sync_status='queued').exists())
+
+
+class AggregatedQueriesTestCase(TestCase):
+    """Test cases for the aggregated portfolio totals and transaction paging"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        self.webull = BrokerageAccount.objects.create(
+            user=self.user, brokerage_name='webull', account_id='W1', status='connected'
+        )
+        self.ibkr = BrokerageAccount.objects.create(
+            user=self.user, brokerage_name='ibkr', account_id='I1', status='connected'
+        )
+        self.disconnected = BrokerageAccount.objects.create(
+            user=self.user, brokerage_name='robinhood', account_id='R1', status='disconnected'
+        )
+        self.tied_date = timezone.now().replace(microsecond=0) - timedelta(days=1)
+    
+    def transactions(self, account, count, transaction_date):
+        first = Transaction.objects.count()
+        return [
+            Transaction.objects.create(
+                account=account, transaction_id=f'T{first + i}', transaction_type='buy',
+                symbol='AAPL', amount=Decimal('100.00'), transaction_date=transaction_date
+            )
+            for i in range(count)
+        ]
+    
+    def walk(self, limit):
+        """Follow next_before through every page, as a client would"""
+        pages, before = [], None
+        while True:
+            page, before = queries.transaction_page(queries.connected_transactions(self.user.id, {}), before, limit)
+            pages.append(page)
+            if before is None:
+                return pages
+    
+    def test_paging_through_tied_dates(self):
+        """Test that transactions sharing a transaction_date are neither skipped nor repeated across pages"""
+        tied = self.transactions(self.webull, 4, self.tied_date) + self.transactions(self.ibkr, 3, self.tied_date)
+        newer = self.transactions(self.ibkr, 1, self.tied_date + timedelta(hours=1))
+        self.transactions(self.disconnected, 2, self.tied_date)
+        
+        pages = self.walk(limit=3)
+        
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        walked = [transaction.id for page in pages for transaction in page]
+        self.assertEqual(walked[0], newer[0].id)
+        self.assertEqual(walked[1:], sorted((transaction.id for transaction in tied), reverse=True))
+    
+    def test_last_full_page_has_no_cursor(self):
+        """Test that a page ending exactly at the last transaction has no next_before"""
+        self.transactions(self.webull, 4, self.tied_date)
+        
+        self.assertEqual([len(page) for page in self.walk(limit=2)], [2, 2])
+    
+    def test_cursor_round_trip(self):
+        """Test that next_before parses back to the transaction's date and id, including a '+' sent unencoded"""
+        transaction = self.transactions(self.webull, 1, self.tied_date)[0]
+        cursor = queries.transaction_cursor(transaction)
+        
+        self.assertIn('+00:00', cursor)
+        self.assertEqual(queries.parse_transaction_cursor(cursor), (transaction.transaction_date, transaction.id))
+        # A query string '+' decodes to a space
+        self.assertEqual(
+            queries.parse_transaction_cursor(cursor.replace('+', ' ')),
+            (transaction.transaction_date, transaction.id)
+        )
+        self.assertEqual(
+            queries.parse_transaction_cursor(cursor.replace('+00:00', 'Z')),
+            (transaction.transaction_date, transaction.id)
+        )
+    
+    def test_bad_cursor_rejected(self):
+        """Test that malformed cursors raise ValueError, which the view answers with a 400"""
+        transactions = queries.connected_transactions(self.user.id, {})
+        for cursor in ['yesterday', '2024-01-01T00:00:00+00:00', '2024-01-01T00:00:00+00:00,not-a-uuid', ',']:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    queries.transaction_page(transactions, cursor, 10)
+    
+    def test_position_totals(self):
+        """Test that per-symbol totals are summed in SQL across connected accounts, largest first"""
+        for account, symbol, quantity, market_value in [
+            (self.webull, 'AAPL', '10', '1500.00'),
+            (self.ibkr, 'AAPL', '5', '750.00'),
+            (self.ibkr, 'MSFT', '20', '8000.00'),
+            (self.webull, 'NEWCO', '1', None),
+            (self.disconnected, 'MSFT', '100', '40000.00'),
+        ]:
+            Portfolio.objects.create(
+                account=account, symbol=symbol, quantity=Decimal(quantity), average_price=Decimal('1'),
+                market_value=Decimal(market_value) if market_value else None
+            )
+        
+        with self.assertNumQueries(1):
+            totals = list(queries.position_totals(queries.connected_positions(self.user.id)))
+        
+        self.assertEqual(totals, [
+            {'symbol': 'MSFT', 'total_quantity': Decimal('20'), 'total_market_value': Decimal('8000.00')},
+            {'symbol': 'AAPL', 'total_quantity': Decimal('15'), 'total_market_value': Decimal('2250.00')},
+            {'symbol': 'NEWCO', 'total_quantity': Decimal('1'), 'total_market_value': Decimal('0')},
+        ])
+
+
+@tag('slow')
+@skipUnless(os.environ.get('RUN_SLOW_TESTS'), 'loads 1M rows; set RUN_SLOW_TESTS=1 to run')
+class QueryPlanTestCase(TestCase):
+    """
+    Test cases for index use on the brokerage query hot paths
+
+    Loads production-sized tables, so it only runs with RUN_SLOW_TESTS set.
+    Only the SQLite branch has been run; the PostgreSQL branch (generate_series
+    loading, EXPLAIN parsing) is unverified until run against PostgreSQL.
+    """
+    
+    ACCOUNTS = 1000
+    TRANSACTIONS_PER_ACCOUNT = 1000   # 1M transaction rows in total
+    POSITIONS_PER_ACCOUNT = 20
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Fill the tables with set-based INSERTs so the planner sees production-sized data"""
+        users = User.objects.bulk_create([User(username=f'plan{i}') for i in range(cls.ACCOUNTS)])
+        accounts = BrokerageAccount.objects.bulk_create([
+            BrokerageAccount(user=user, brokerage_name='webull', status='connected') for user in users
+        ])
+        cls.user_id = users[0].id
+        cls.account = accounts[0]
+        
+        account_table = BrokerageAccount._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                series = 'SELECT generate_series(1, %s) AS n'
+                new_id = 'gen_random_uuid()'
+                minutes_ago = "now() - s.n * interval '1 minute'"
+            else:
+                series = 'WITH RECURSIVE series(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM series WHERE n < %s) SELECT n FROM series'
+                new_id = 'lower(hex(randomblob(16)))'
+                minutes_ago = "datetime('now', '-' || s.n || ' minutes')"
+            
+            cursor.execute(f"""
+                INSERT INTO {Transaction._meta.db_table}
+                    (id, account_id, transaction_id, transaction_type, symbol, amount, fees, transaction_date, created_at)
+                SELECT {new_id}, a.id, 'T' || s.n, CASE WHEN s.n % 4 = 0 THEN 'sell' ELSE 'buy' END,
+                       'SYM' || (s.n % 50), 100, 0, {minutes_ago}, {minutes_ago}
+                FROM {account_table} a CROSS JOIN ({series}) s
+            """, [cls.TRANSACTIONS_PER_ACCOUNT])
+            cursor.execute(f"""
+                INSERT INTO {Portfolio._meta.db_table}
+                    (id, account_id, symbol, quantity, average_price, market_value, last_updated)
+                SELECT {new_id}, a.id, 'SYM' || s.n, 1, 100, s.n * 100, {minutes_ago}
+                FROM {account_table} a CROSS JOIN ({series}) s
+            """, [cls.POSITIONS_PER_ACCOUNT])
+            cursor.execute('ANALYZE')
+    
+    def assertNoFullScans(self, queryset):
+        """Assert that the plan reads no brokerage table without an index"""
+        plan = queryset.explain()
+        tables = [model._meta.db_table for model in (BrokerageAccount, Portfolio, Transaction)]
+        for table in tables:
+            if connection.vendor == 'postgresql':
+                full_scan = re.search(rf'Seq Scan on {table}\b', plan)
+            else:
+                full_scan = re.search(rf'SCAN {table}\b(?! USING)', plan)
+            self.assertIsNone(full_scan, f'Full scan of {table}:\n{plan}')
+    
+    def assertIndexOrdered(self, queryset):
+        """Assert that rows come back in index order, without a separate sort step"""
+        plan = queryset.explain()
+        sort = r'\bSort\b' if connection.vendor == 'postgresql' else r'TEMP B-TREE FOR ORDER BY'
+        self.assertIsNone(re.search(sort, plan), f'Sort step in plan:\n{plan}')
+    
+    def test_account_transactions(self):
+        """Test that get_transactions reads one account's rows through an index, already ordered"""
+        for params in ({}, {'transaction_type': 'sell'}, {'start_date': (timezone.now() - timedelta(days=1)).isoformat()}):
+            self.assertNoFullScans(queries.account_transactions(self.account, params))
+            self.assertIndexOrdered(queries.account_transactions(self.account, params)[:100])
+    
+    def test_account_positions(self):
+        """Test that get_portfolio reads one account's positions through an index, already ordered"""
+        self.assertNoFullScans(queries.account_positions(self.account))
+        self.assertIndexOrdered(queries.account_positions(self.account)[:10])
+    
+    def test_aggregated_views(self):
+        """Test that the aggregated portfolio and transactions queries start from the user's accounts"""
+        self.assertNoFullScans(queries.connected_transactions(self.user_id, {})[:101])
+        self.assertNoFullScans(queries.connected_transactions(self.user_id, {'transaction_type': 'buy'})[:101])
+        self.assertNoFullScans(queries.connected_positions(self.user_id).select_related('account'))
+        self.assertNoFullScans(queries.connected_positions(self.user_id).values('symbol').annotate(
+            total_market_value=Sum('market_value')
+        ))
+
+
+class BlockingBrokerageService(BaseBrokerageService):
+    """Brokerage service whose calls can be made to fail or to block until released"""
+    
+    CALLS = ('balance', 'portfolio', 'transactions')
+    
+    def __init__(self, outcomes=None, barrier=None):
+        super().__init__(account_id='BLOCKING')
+        self.outcomes = outcomes or {}  # call name -> exception to raise, or 'block'
+        self.barrier = barrier
+        self.release = threading.Event()
+        self.finished = {name: threading.Event() for name in self.CALLS}
+        self.transaction_window = None
+    
+    def _call(self, name, result):
+        try:
+            if self.barrier is not None:
+                # Only passes once every call is in flight at the same time
+                self.barrier.wait()
+            outcome = self.outcomes.get(name)
+            if isinstance(outcome, Exception):
+                raise outcome
+            if outcome == 'block':
+                self.release.wait(5)
+            return result
+        finally:
+            self.finished[name].set()
+    
+    def authenticate(self):
+        return True
+    
+    def get_account_info(self):
+        return self._format_response({})
+    
+    def get_balance(self):
+        return self._call('balance', self._format_response({'cash_balance': Decimal('1.00')}))
+    
+    def get_portfolio(self):
+        return self._call('portfolio', [{'symbol': 'AAPL'}])
+    
+    def get_transactions(self, start_date=None, end_date=None):
+        self.transaction_window = (start_date, end_date)
+        return self._call('transactions', [])
+
+
+class FetchSnapshotTestCase(TestCase):
+    """Test cases for fetching a brokerage snapshot concurrently"""
+    
+    def test_calls_run_concurrently(self):
+        """Test that all three calls are in flight at once"""
+        barrier = threading.Barrier(len(BlockingBrokerageService.CALLS), timeout=5)
+        service = BlockingBrokerageService(barrier=barrier)
+        
+        snapshot = service.fetch_snapshot()
+        
+        self.assertFalse(barrier.broken)
+        self.assertEqual(snapshot['errors'], {})
+        self.assertEqual(snapshot['portfolio'], [{'symbol': 'AAPL'}])
+        self.assertTrue(snapshot['balance']['success'])
+        start_date, end_date = service.transaction_window
+        self.assertEqual(end_date, snapshot['as_of'])
+        self.assertEqual(end_date - start_date, timedelta(days=30))
+    
+    def test_deadline_and_errors(self):
+        """Test that the snapshot returns at its deadline while a timed-out call is still blocked"""
+        service = BlockingBrokerageService({'portfolio': 'block', 'transactions': RuntimeError('502')})
+        
+        try:
+            snapshot = service.fetch_snapshot(timeout=0.1)
+            still_blocked = not service.finished['portfolio'].is_set()
+        finally:
+            service.release.set()
+        
+        self.assertTrue(still_blocked)
+        self.assertTrue(snapshot['balance']['success'])
+        self.assertIsNone(snapshot['portfolio'])
+        self.assertEqual(snapshot['errors'], {'portfolio': 'Timed out after 0.1s', 'transactions': '502'})
+        self.assertTrue(service.finished['portfolio'].wait(5))
+    
+    def test_failed_snapshot_fails_sync(self):
+        """Test that a sync with a failed snapshot part writes nothing and backs off"""
+        user = User.objects.create_user(username='snapshot', password='testpass123')
+        account = BrokerageAccount.objects.create(user=user, brokerage_name='webull', status='connected')
+        service = BlockingBrokerageService({'transactions': RuntimeError('502')})
+        
+        with mock.patch.object(sync_scheduler.BrokerageServiceFactory, 'create_service', return_value=service):
+            result = sync_scheduler.run_account_sync(account)
+        
+        account.refresh_from_db()
+        self.assertEqual(result, {'success': False, 'error': 'transactions: 502'})
+        self.assertEqual(account.error_count, 1)
+        self.assertFalse(Portfolio.objects.filter(account=account).exists())
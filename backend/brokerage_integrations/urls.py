@@ -7,6 +7,7 @@ urlpatterns = [
     path('brokerages/connect/', views.connect_brokerage_account, name='connect_brokerage_account'),
     path('brokerages/user/<int:user_id>/accounts/', views.get_user_accounts, name='get_user_accounts'),
     path('brokerages/accounts/<uuid:account_id>/sync/', views.sync_account, name='sync_account'),
+    path('brokerages/accounts/<uuid:account_id>/sync/status/', views.get_sync_status, name='get_sync_status'),
     path('brokerages/accounts/<uuid:account_id>/disconnect/', views.disconnect_account, name='disconnect_account'),
     
     # Portfolio and transactions
@@ -3,21 +3,29 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.urls import reverse
 from django.utils import timezone
 from django.db import transaction
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
 
 from .models import (
-    BrokerageAccount, BrokerageToken, Portfolio, Transaction, 
-    BrokerageWebhook, BrokerageSettings
+    BrokerageAccount, BrokerageToken, BrokerageWebhook, BrokerageSettings
+)
+from .queries import (
+    account_positions, account_transactions, connected_positions, connected_transactions,
+    position_totals, transaction_page
 )
 from .services.service_factory import BrokerageServiceFactory
+from .services.sync_scheduler import enqueue_sync
 
 logger = logging.getLogger(__name__)
 
+TRANSACTIONS_PAGE_SIZE = 100       # aggregated transactions per page by default
+TRANSACTIONS_MAX_PAGE_SIZE = 500
+
 
 @csrf_exempt
 @require_http_methods(["GET"])
@@ -215,7 +223,13 @@ def get_user_accounts(request, user_id):
 @csrf_exempt
 @require_http_methods(["POST"])
 def sync_account(request, account_id):
-    """Sync a specific brokerage account"""
+    """
+    Queue a sync of a specific brokerage account
+
+    The sync itself runs in the background sync worker
+    (`manage.py sync_brokerage_accounts --loop`); poll the sync status
+    endpoint for the outcome.
+    """
     try:
         data = json.loads(request.body)
         force_sync = data.get('force_sync', False)
@@ -237,102 +251,19 @@ def sync_account(request, account_id):
                     'error': 'Account was synced recently. Use force_sync=true to override.'
                 }, status=400)
         
-        # Get service instance
-        tokens = {token.token_type: token.token_value for token in account.tokens.all()}
-        
-        service = BrokerageServiceFactory.create_service(
-            account.brokerage_name,
-            account_id=account.account_id,
-            **tokens
-        )
-        
-        if not service:
+        sync_status = enqueue_sync(account)
+        if sync_status is None:
             return JsonResponse({
                 'success': False,
-                'error': f'Failed to create service for {account.brokerage_name}'
-            }, status=500)
-        
-        # Test authentication
-        if not service.authenticate():
-            account.status = 'error'
-            account.last_error = 'Authentication failed'
-            account.error_count += 1
-            account.save()
-            
-            return JsonResponse({
-                'success': False,
-                'error': 'Authentication failed'
-            }, status=401)
-        
-        # Sync data
-        with transaction.atomic():
-            # Update account status
-            account.status = 'connected'
-            account.last_sync = timezone.now()
-            account.error_count = 0
-            account.last_error = None
-            
-            # Get and update balance
-            balance_data = service.get_balance()
-            if balance_data.get('success'):
-                balance = balance_data['data']
-                account.cash_balance = balance.get('cash_balance')
-                account.total_value = balance.get('total_value')
-                account.buying_power = balance.get('buying_power')
-            
-            account.save()
-            
-            # Sync portfolio
-            portfolio_data = service.get_portfolio()
-            if portfolio_data:
-                # Clear existing portfolio
-                Portfolio.objects.filter(account=account).delete()
-                
-                # Create new portfolio entries
-                for position in portfolio_data:
-                    Portfolio.objects.create(
-                        account=account,
-                        symbol=position['symbol'],
-                        quantity=position['quantity'],
-                        average_price=position['average_price'],
-                        current_price=position['current_price'],
-                        market_value=position['market_value'],
-                        unrealized_pnl=position['unrealized_pnl'],
-                        unrealized_pnl_percent=position['unrealized_pnl_percent']
-                    )
-            
-            # Sync transactions (last 30 days)
-            transactions_data = service.get_transactions(
-                start_date=timezone.now() - timedelta(days=30)
-            )
-            
-            if transactions_data:
-                # Only add new transactions
-                existing_transaction_ids = set(
-                    Transaction.objects.filter(account=account)
-                    .values_list('transaction_id', flat=True)
-                )
-                
-                for transaction_data in transactions_data:
-                    if transaction_data['transaction_id'] not in existing_transaction_ids:
-                        Transaction.objects.create(
-                            account=account,
-                            transaction_id=transaction_data['transaction_id'],
-                            transaction_type=transaction_data['transaction_type'],
-                            symbol=transaction_data['symbol'],
-                            quantity=transaction_data['quantity'],
-                            price=transaction_data['price'],
-                            amount=transaction_data['amount'],
-                            fees=transaction_data['fees'],
-                            transaction_date=transaction_data['transaction_date']
-                        )
+                'error': 'Account is inactive or disconnected and cannot be synced'
+            }, status=400)
         
         return JsonResponse({
             'success': True,
-            'message': 'Account synced successfully',
-            'portfolio_count': len(portfolio_data) if portfolio_data else 0,
-            'transactions_count': len(transactions_data) if transactions_data else 0
-        })
+            'message': 'Account sync queued' if sync_status == 'queued' else 'Account sync already running',
+            'sync_status': sync_status,
+            'status_url': reverse('get_sync_status', args=[account.id])
+        }, status=202)
         
     except json.JSONDecodeError:
         return JsonResponse({
@@ -340,7 +271,40 @@ def sync_account(request, account_id):
             'error': 'Invalid JSON data'
         }, status=400)
     except Exception as e:
-        logger.error(f"Error syncing account: {e}")
+        logger.error(f"Error queueing account sync: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_sync_status(request, account_id):
+    """Get the background sync status and last sync outcome of an account"""
+    try:
+        try:
+            account = BrokerageAccount.objects.get(id=account_id)
+        except BrokerageAccount.DoesNotExist:
+            return JsonResponse({
+                'success': False,
+                'error': 'Account not found'
+            }, status=404)
+        
+        return JsonResponse({
+            'success': True,
+            'account_id': str(account.id),
+            'sync_status': account.sync_status,
+            'status': account.status,
+            'last_sync': account.last_sync.isoformat() if account.last_sync else None,
+            'next_sync_at': account.next_sync_at.isoformat() if account.next_sync_at else None,
+            'last_sync_result': account.last_sync_result,
+            'last_error': account.last_error,
+            'error_count': account.error_count
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting sync status: {e}")
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -360,7 +324,7 @@ def get_portfolio(request, account_id):
                 'error': 'Account not found'
             }, status=404)
         
-        portfolio = Portfolio.objects.filter(account=account)
+        portfolio = account_positions(account)
         
         portfolio_data = []
         for position in portfolio:
@@ -403,30 +367,7 @@ def get_transactions(request, account_id):
                 'error': 'Account not found'
             }, status=404)
         
-        # Get query parameters
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        transaction_type = request.GET.get('transaction_type')
-        
-        transactions = Transaction.objects.filter(account=account)
-        
-        # Apply filters
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                transactions = transactions.filter(transaction_date__gte=start_dt)
-            except ValueError:
-                pass
-        
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                transactions = transactions.filter(transaction_date__lte=end_dt)
-            except ValueError:
-                pass
-        
-        if transaction_type:
-            transactions = transactions.filter(transaction_type=transaction_type)
+        transactions = account_transactions(account, request.GET)
         
         transactions_data = []
         for transaction in transactions:
@@ -542,52 +483,39 @@ def get_brokerage_link(request, brokerage_name):
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_aggregated_portfolio(request, user_id):
-    """Get aggregated portfolio across all user's brokerage accounts"""
+    """
+    Get aggregated portfolio across all user's brokerage accounts
+
+    Positions for every connected account come from one joined query and
+    the per-symbol totals are summed and ordered in SQL.
+    """
     try:
-        accounts = BrokerageAccount.objects.filter(user_id=user_id, is_active=True, status='connected')
+        positions = connected_positions(user_id)
         
-        aggregated_portfolio = {}
-        total_value = Decimal('0')
+        # Per-symbol totals, largest holdings first
+        aggregated_portfolio = {
+            row['symbol']: dict(row, positions=[])
+            for row in position_totals(positions)
+        }
         
-        for account in accounts:
-            # Get portfolio for this account
-            portfolio = Portfolio.objects.filter(account=account)
-            
-            for position in portfolio:
-                symbol = position.symbol
-                
-                if symbol not in aggregated_portfolio:
-                    aggregated_portfolio[symbol] = {
-                        'symbol': symbol,
-                        'total_quantity': Decimal('0'),
-                        'total_market_value': Decimal('0'),
-                        'positions': []
-                    }
-                
-                # Add position data
-                aggregated_portfolio[symbol]['total_quantity'] += position.quantity
-                aggregated_portfolio[symbol]['total_market_value'] += position.market_value or Decimal('0')
-                aggregated_portfolio[symbol]['positions'].append({
-                    'brokerage': account.brokerage_name,
-                    'quantity': float(position.quantity),
-                    'average_price': float(position.average_price),
-                    'current_price': float(position.current_price) if position.current_price else None,
-                    'market_value': float(position.market_value) if position.market_value else None,
-                    'unrealized_pnl': float(position.unrealized_pnl) if position.unrealized_pnl else None,
-                    'unrealized_pnl_percent': float(position.unrealized_pnl_percent) if position.unrealized_pnl_percent else None
-                })
-                
-                total_value += position.market_value or Decimal('0')
-        
-        # Convert to list and sort by market value
-        portfolio_list = list(aggregated_portfolio.values())
-        portfolio_list.sort(key=lambda x: x['total_market_value'], reverse=True)
+        for position in positions.select_related('account').order_by('symbol', '-market_value'):
+            aggregated_portfolio[position.symbol]['positions'].append({
+                'brokerage': position.account.brokerage_name,
+                'quantity': float(position.quantity),
+                'average_price': float(position.average_price),
+                'current_price': float(position.current_price) if position.current_price else None,
+                'market_value': float(position.market_value) if position.market_value else None,
+                'unrealized_pnl': float(position.unrealized_pnl) if position.unrealized_pnl else None,
+                'unrealized_pnl_percent': float(position.unrealized_pnl_percent) if position.unrealized_pnl_percent else None
+            })
+        
+        total_value = sum((row['total_market_value'] for row in aggregated_portfolio.values()), Decimal('0'))
         
         return JsonResponse({
             'success': True,
             'user_id': user_id,
             'total_portfolio_value': float(total_value),
-            'portfolio': portfolio_list
+            'portfolio': list(aggregated_portfolio.values())
         })
         
     except Exception as e:
@@ -646,59 +574,53 @@ def get_aggregated_balance(request, user_id):
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_aggregated_transactions(request, user_id):
-    """Get aggregated transactions across all user's brokerage accounts"""
+    """
+    Get aggregated transactions across all user's brokerage accounts
+
+    Newest first, one page per request. Pass the previous page's
+    `next_before` cursor as `?before=<transaction_date>,<id>` to continue;
+    `limit` sets the page size (default 100, max 500).
+    """
     try:
-        accounts = BrokerageAccount.objects.filter(user_id=user_id, is_active=True, status='connected')
+        transactions = connected_transactions(user_id, request.GET)
         
-        # Get query parameters
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        transaction_type = request.GET.get('transaction_type')
+        try:
+            limit = min(max(int(request.GET.get('limit', TRANSACTIONS_PAGE_SIZE)), 1), TRANSACTIONS_MAX_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'limit must be an integer'
+            }, status=400)
         
-        all_transactions = []
+        try:
+            page, next_before = transaction_page(transactions, request.GET.get('before'), limit)
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'before must be "<transaction_date>,<id>" from next_before'
+            }, status=400)
         
-        for account in accounts:
-            transactions = Transaction.objects.filter(account=account)
-            
-            # Apply filters
-            if start_date:
-                try:
-                    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                    transactions = transactions.filter(transaction_date__gte=start_dt)
-                except ValueError:
-                    pass
-            
-            if end_date:
-                try:
-                    end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                    transactions = transactions.filter(transaction_date__lte=end_dt)
-                except ValueError:
-                    pass
-            
-            if transaction_type:
-                transactions = transactions.filter(transaction_type=transaction_type)
-            
-            for transaction in transactions:
-                all_transactions.append({
-                    'transaction_id': transaction.transaction_id,
-                    'brokerage_name': account.brokerage_name,
-                    'transaction_type': transaction.transaction_type,
-                    'symbol': transaction.symbol,
-                    'quantity': float(transaction.quantity) if transaction.quantity else None,
-                    'price': float(transaction.price) if transaction.price else None,
-                    'amount': float(transaction.amount),
-                    'fees': float(transaction.fees),
-                    'transaction_date': transaction.transaction_date.isoformat(),
-                    'created_at': transaction.created_at.isoformat()
-                })
-        
-        # Sort by transaction date (newest first)
-        all_transactions.sort(key=lambda x: x['transaction_date'], reverse=True)
+        all_transactions = []
+        for transaction in page:
+            all_transactions.append({
+                'id': str(transaction.id),
+                'transaction_id': transaction.transaction_id,
+                'brokerage_name': transaction.account.brokerage_name,
+                'transaction_type': transaction.transaction_type,
+                'symbol': transaction.symbol,
+                'quantity': float(transaction.quantity) if transaction.quantity else None,
+                'price': float(transaction.price) if transaction.price else None,
+                'amount': float(transaction.amount),
+                'fees': float(transaction.fees),
+                'transaction_date': transaction.transaction_date.isoformat(),
+                'created_at': transaction.created_at.isoformat()
+            })
         
         return JsonResponse({
             'success': True,
             'user_id': user_id,
-            'transactions': all_transactions
+            'transactions': all_transactions,
+            'next_before': next_before
         })
         
     except Exception as e:
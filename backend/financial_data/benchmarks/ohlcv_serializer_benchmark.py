@@ -0,0 +1,70 @@
+"""
+Micro-benchmark: vectorized OHLCV serializer vs. the previous iterrows loops
+
+Run from the backend directory:
+    python -m financial_data.benchmarks.ohlcv_serializer_benchmark
+"""
+# internal
+from financial_data.services.ohlcv_serializer import serialize_ohlcv
+
+# external
+import numpy as np
+import pandas as pd
+
+# built-in
+import timeit
+
+# (label, number of bars, date format, decimals, bar frequency)
+CASES = [
+    ('5 daily bars', 5, '%Y-%m-%d', 2, 'D'),
+    ('500 one-minute bars', 500, '%Y-%m-%d %H:%M:%S', 4, 'min'),
+    ('max monthly history (~45y)', 540, '%Y-%m-%d', 2, 'MS'),
+    ('10y daily history', 2520, '%Y-%m-%d', 2, 'B'),
+]
+
+
+def make_frame(rows: int, freq: str) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    close = 100 + rng.standard_normal(rows).cumsum()
+    df = pd.DataFrame({
+        'open': close + rng.standard_normal(rows),
+        'high': close + 2,
+        'low': close - 2,
+        'close': close,
+        'volume': rng.integers(1_000, 1_000_000, rows).astype(float),
+    }, index=pd.date_range('1980-01-01', periods=rows, freq=freq, name='date'))
+    df.iloc[::50, 0] = np.nan  # a few invalid rows to mask out
+    return df
+
+
+def legacy_serialize(df: pd.DataFrame, date_format: str, decimals: int) -> list:
+    """The per-row loop previously used by the fmp_* views"""
+    frame = df.reset_index()
+    return [
+        {
+            'date': row['date'].strftime(date_format),
+            'open': round(float(row['open']), decimals),
+            'high': round(float(row['high']), decimals),
+            'low': round(float(row['low']), decimals),
+            'close': round(float(row['close']), decimals),
+            'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
+        }
+        for _, row in frame.iterrows()
+        if pd.notna(row['open']) and pd.notna(row['high']) and pd.notna(row['low']) and pd.notna(row['close'])
+    ]
+
+
+def run(repeat: int = 5):
+    print(f"{'case':<30}{'iterrows (ms)':>15}{'vectorized (ms)':>18}{'speed-up':>10}")
+    for label, rows, date_format, decimals, freq in CASES:
+        df = make_frame(rows, freq)
+        assert legacy_serialize(df, date_format, decimals) == serialize_ohlcv(df, date_format, decimals)
+
+        number = max(1, 2000 // rows)
+        legacy = min(timeit.repeat(lambda: legacy_serialize(df, date_format, decimals), number=number, repeat=repeat)) / number
+        vectorized = min(timeit.repeat(lambda: serialize_ohlcv(df, date_format, decimals), number=number, repeat=repeat)) / number
+        print(f"{label:<30}{legacy * 1000:>15.3f}{vectorized * 1000:>18.3f}{legacy / vectorized:>9.1f}x")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,18 @@
+# internal
+from financial_data.services.sec_service import refresh_cik_index
+
+# external
+from django.core.management.base import BaseCommand, CommandError
+
+# built-in
+
+
+class Command(BaseCommand):
+    help = "Rebuild data/cik.csv from SEC's company_tickers.json; running servers pick it up automatically"
+
+    def handle(self, *args, **options):
+        try:
+            count = refresh_cik_index()
+        except Exception as e:
+            raise CommandError(f"CIK index refresh failed: {e}")
+        self.stdout.write(self.style.SUCCESS(f"CIK index refreshed with {count} tickers"))
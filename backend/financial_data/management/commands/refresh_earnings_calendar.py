@@ -0,0 +1,23 @@
+# internal
+from financial_data.services.earnings_service import refresh_earnings_calendar
+
+# external
+from django.core.management.base import BaseCommand, CommandError
+
+# built-in
+
+
+class Command(BaseCommand):
+    help = "Refresh stale days of the stored earnings calendar around today; run periodically (e.g. hourly from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days-back', type=int, default=14, help='Past days to keep fresh')
+        parser.add_argument('--days-ahead', type=int, default=90, help='Upcoming days to keep fresh')
+        parser.add_argument('--force', action='store_true', help='Refetch every day in the window, not just stale ones')
+
+    def handle(self, *args, **options):
+        try:
+            count = refresh_earnings_calendar(options['days_back'], options['days_ahead'], options['force'])
+        except Exception as e:
+            raise CommandError(f"Earnings calendar refresh failed: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Earnings calendar refreshed ({count} entries)"))
@@ -0,0 +1,20 @@
+# internal
+from financial_data.services.nyse_stocks_service import nyse_correlation_service
+
+# external
+from django.core.management.base import BaseCommand, CommandError
+
+# built-in
+
+
+class Command(BaseCommand):
+    help = "Rebuild the NYSE correlation matrix from the latest daily bars; run once a day after the close"
+
+    def handle(self, *args, **options):
+        try:
+            matrix = nyse_correlation_service.refresh()
+        except Exception as e:
+            raise CommandError(f"Correlation matrix refresh failed: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Correlation matrix rebuilt for {len(matrix.tickers)} tickers over {matrix.data_points} days (as of {matrix.as_of})"
+        ))
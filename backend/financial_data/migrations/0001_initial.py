@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FredSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(max_length=64)),
+                ('frequency', models.CharField(max_length=4)),
+                ('observations', models.JSONField(default=list)),
+                ('last_observation_date', models.DateField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('series_id', 'frequency')},
+            },
+        ),
+    ]
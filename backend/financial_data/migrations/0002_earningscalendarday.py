@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial_data', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EarningsCalendarDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('entries', models.JSONField(default=list)),
+                ('has_pending', models.BooleanField(default=False)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+    ]
@@ -1,3 +1,32 @@
 from django.db import models
 
-# Create your models here.
+
+class FredSeries(models.Model):
+    """Model to store FRED observations locally, one row per series and frequency"""
+    
+    series_id = models.CharField(max_length=64)
+    frequency = models.CharField(max_length=4)
+    observations = models.JSONField(default=list)  # Valid observations, oldest first
+    last_observation_date = models.DateField(null=True, blank=True)
+    refreshed_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['series_id', 'frequency']
+    
+    def __str__(self):
+        return f"{self.series_id} ({self.frequency})"
+
+
+class EarningsCalendarDay(models.Model):
+    """Model to store one day of FMP's earnings calendar, so date ranges are assembled from local partitions"""
+    
+    day = models.DateField(unique=True)
+    entries = models.JSONField(default=list)  # Raw FMP earning_calendar entries for the day
+    has_pending = models.BooleanField(default=False)  # Some entries have no reported EPS yet
+    refreshed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['day']
+    
+    def __str__(self):
+        return f"Earnings calendar {self.day} ({len(self.entries)} entries)"
@@ -0,0 +1,51 @@
+# internal
+
+# external
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+
+# built-in
+import json
+import logging
+
+# Optional fast JSON encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available, falling back to json. Install with: pip install orjson")
+
+
+def json_bytes(data, encoder=DjangoJSONEncoder) -> bytes:
+    """Encode data as compact JSON bytes, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data,
+            default=encoder().default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(data, cls=encoder, separators=(',', ':')).encode('utf-8')
+
+
+class FastJsonResponse(JsonResponse):
+    """
+    JsonResponse that encodes with orjson when it is installed
+
+    Drop-in replacement for JsonResponse: NumPy scalars and arrays are
+    serialized natively, and anything orjson can't handle goes through the
+    given encoder, just as with JsonResponse.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if not ORJSON_AVAILABLE or json_dumps_params:
+            super().__init__(data, encoder=encoder, safe=safe, json_dumps_params=json_dumps_params, **kwargs)
+            return
+
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        HttpResponse.__init__(self, content=json_bytes(data, encoder), **kwargs)
@@ -1,13 +1,157 @@
 # internal
 from financial_data.config import FMP_API_KEY
+from financial_data.models import EarningsCalendarDay
+from financial_data.services.provider_client import provider_client
+from financial_data.services.single_flight import single_flight
 
 # external
-import requests
 import json
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
 
 # built-in
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.http import JsonResponse
+from django.utils import timezone
+from typing import Dict, List, Optional, Tuple
+
+# Batch earnings engine
+EARNINGS_HISTORY_TTL = 3600       # seconds a symbol's earnings history stays in the shared cache
+EARNINGS_MAX_WORKERS = 8          # concurrent FMP requests per batch
+EARNINGS_REQUEST_TIMEOUT = 15
+
+# Earnings calendar store: one partition per day
+EARNINGS_UPCOMING_TTL = timedelta(hours=2)    # days on/after today, or with EPS still pending
+EARNINGS_SETTLED_TTL = timedelta(days=7)      # past days whose results are all in
+EARNINGS_SETTLE_AFTER = timedelta(days=14)    # past days are treated as settled after this long
+EARNINGS_CALENDAR_MAX_SPAN = 30               # days per FMP earning_calendar request
+EARNINGS_CALENDAR_MAX_RANGE = 400             # days a single calendar query may cover
+
+class EarningsCalendarError(Exception):
+    """Earnings calendar could not be served; carries the HTTP status to return"""
+    
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+def _request_earnings_calendar(start: date, end: date) -> list:
+    """Fetch FMP's earnings calendar for a date range; raises EarningsCalendarError on error statuses"""
+    fmp_url = "https://financialmodelingprep.com/api/v3/earning_calendar"
+    params = {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'apikey': FMP_API_KEY
+    }
+    
+    response = provider_client.get(fmp_url, params=params, timeout=EARNINGS_REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        raise EarningsCalendarError(f'API error: {response.status_code}', response.status_code)
+    earnings_data = response.json()
+    return earnings_data if isinstance(earnings_data, list) else []
+
+def _earnings_partition_is_fresh(partition: EarningsCalendarDay, today: date, now) -> bool:
+    settled = partition.day < today and (not partition.has_pending or partition.day < today - EARNINGS_SETTLE_AFTER)
+    ttl = EARNINGS_SETTLED_TTL if settled else EARNINGS_UPCOMING_TTL
+    return partition.refreshed_at + ttl > now
+
+def _date_runs(days: List[date], max_span: int = EARNINGS_CALENDAR_MAX_SPAN) -> List[Tuple[date, date]]:
+    """Group sorted days into contiguous (start, end) runs of at most max_span days"""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1) and (day - runs[-1][0]).days < max_span:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [(start, end) for start, end in runs]
+
+def get_earnings_calendar(from_date: date, to_date: date, force_refresh: bool = False) -> list:
+    """
+    Get FMP earnings calendar entries for a date range from the local store
+    
+    Each day is stored as its own partition. Only missing or stale days are
+    requested from FMP, in contiguous runs: days that are upcoming or still
+    waiting on reported EPS go stale after EARNINGS_UPCOMING_TTL, settled
+    past days after EARNINGS_SETTLED_TTL. Stale days are served if FMP fails.
+    
+    Raises:
+        EarningsCalendarError: FMP failed for days that aren't stored yet
+    """
+    if (to_date - from_date).days + 1 > EARNINGS_CALENDAR_MAX_RANGE:
+        raise EarningsCalendarError(f'Date range too large (max {EARNINGS_CALENDAR_MAX_RANGE} days)', 400)
+    days = [from_date + timedelta(days=i) for i in range((to_date - from_date).days + 1)]
+    
+    try:
+        partitions = {p.day: p for p in EarningsCalendarDay.objects.filter(day__range=(from_date, to_date))}
+    except DatabaseError:
+        # Store unavailable (e.g. migrations not applied); go straight to FMP
+        return _request_earnings_calendar(from_date, to_date) if days else []
+    
+    now = timezone.now()
+    today = timezone.localdate()
+    stale_days = [
+        day for day in days
+        if force_refresh or day not in partitions or not _earnings_partition_is_fresh(partitions[day], today, now)
+    ]
+    
+    for start, end in _date_runs(stale_days):
+        try:
+            fetched = _request_earnings_calendar(start, end)
+        except Exception as e:
+            if any(day not in partitions for day in stale_days if start <= day <= end):
+                if isinstance(e, EarningsCalendarError):
+                    raise
+                raise EarningsCalendarError(str(e))
+            print(f"Serving stored earnings calendar for {start} to {end}: {str(e)}")
+            continue
+        
+        by_day = defaultdict(list)
+        for earning in fetched:
+            if earning and earning.get('date'):
+                by_day[earning['date'][:10]].append(earning)
+        
+        refreshed = []
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            entries = by_day.get(day.isoformat(), [])
+            refreshed.append(EarningsCalendarDay(
+                day=day,
+                entries=entries,
+                has_pending=any(entry.get('eps') is None for entry in entries),
+                refreshed_at=now,
+            ))
+        try:
+            EarningsCalendarDay.objects.bulk_create(
+                refreshed,
+                update_conflicts=True,
+                unique_fields=['day'],
+                update_fields=['entries', 'has_pending', 'refreshed_at'],
+            )
+        except DatabaseError as e:
+            print(f"Error storing earnings calendar for {start} to {end}: {str(e)}")
+        partitions.update((partition.day, partition) for partition in refreshed)
+    
+    return [entry for day in days if day in partitions for entry in partitions[day].entries]
+
+def refresh_earnings_calendar(days_back: int = 14, days_ahead: int = 90, force: bool = False) -> int:
+    """
+    Bring the stored earnings calendar around today up to date
+    
+    Meant to run periodically (see the refresh_earnings_calendar management
+    command) so request-time queries rarely wait on FMP.
+    
+    Returns:
+        Number of calendar entries in the refreshed window
+    """
+    today = timezone.localdate()
+    return len(get_earnings_calendar(today - timedelta(days=days_back), today + timedelta(days=days_ahead), force))
+
+def _parse_calendar_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
 
 def calculate_earnings_surprise_percentage(eps_actual, eps_estimated):
     """
@@ -107,51 +251,46 @@ def get_earnings_calendar_api(request):
             return JsonResponse({'error': 'API key not configured'}, status=500)
         
         try:
-            fmp_url = f"https://financialmodelingprep.com/api/v3/earning_calendar"
-            params = {
-                'from': from_date,
-                'to': to_date,
-                'apikey': FMP_API_KEY
-            }
-            
-            response = requests.get(fmp_url, params=params, timeout=15)
+            start, end = _parse_calendar_date(from_date), _parse_calendar_date(to_date)
+        except ValueError:
+            return JsonResponse({'error': 'Both from_date and to_date required (YYYY-MM-DD format)'}, status=400)
+        
+        try:
+            earnings_data = get_earnings_calendar(start, end)
+            simplified_earnings = []
             
-            if response.status_code == 200:
-                earnings_data = response.json()
-                simplified_earnings = []
-                
-                for earning in earnings_data:
-                    if earning and earning.get('date'):
-                        eps_est = earning.get('epsEstimated')
-                        eps_act = earning.get('eps')
+            for earning in earnings_data:
+                if earning and earning.get('date'):
+                    eps_est = earning.get('epsEstimated')
+                    eps_act = earning.get('eps')
+                    
+                    # Only include if we have at least one meaningful EPS value
+                    if eps_est is not None or eps_act is not None:
+                        # Use improved surprise calculation
+                        surprise = calculate_earnings_surprise_percentage(eps_act, eps_est) if (eps_est is not None and eps_act is not None) else None
                         
-                        # Only include if we have at least one meaningful EPS value
-                        if eps_est is not None or eps_act is not None:
-                            # Use improved surprise calculation
-                            surprise = calculate_earnings_surprise_percentage(eps_act, eps_est) if (eps_est is not None and eps_act is not None) else None
-                            
-                            # Tag as earnings or guidance based on whether actual results are available
-                            tag = "earnings" if eps_act is not None else "guidance"
-                            
-                            simplified_earnings.append({
-                                'symbol': earning['symbol'],
-                                'date': earning['date'],
-                                'eps_estimated': eps_est,
-                                'eps_actual': eps_act,
-                                'surprise_percent': round(surprise, 2) if surprise is not None else None,
-                                'tag': tag,
-                                'type': 'historical' if eps_act is not None else 'upcoming'
-                            })
+                        # Tag as earnings or guidance based on whether actual results are available
+                        tag = "earnings" if eps_act is not None else "guidance"
+                        
+                        simplified_earnings.append({
+                            'symbol': earning['symbol'],
+                            'date': earning['date'],
+                            'eps_estimated': eps_est,
+                            'eps_actual': eps_act,
+                            'surprise_percent': round(surprise, 2) if surprise is not None else None,
+                            'tag': tag,
+                            'type': 'historical' if eps_act is not None else 'upcoming'
+                        })
             
-                return JsonResponse({
-                    'from_date': from_date,
-                    'to_date': to_date,
-                    'count': len(simplified_earnings),
-                    'earnings': simplified_earnings
-                })
-            else:
-                return JsonResponse({'error': f'API error: {response.status_code}'}, status=response.status_code)
+            return JsonResponse({
+                'from_date': from_date,
+                'to_date': to_date,
+                'count': len(simplified_earnings),
+                'earnings': simplified_earnings
+            })
                 
+        except EarningsCalendarError as e:
+            return JsonResponse({'error': str(e)}, status=e.status_code)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -173,7 +312,7 @@ def get_earnings_for_symbol_api(request):
             fmp_url = f"https://financialmodelingprep.com/api/v3/historical/earning_calendar/{symbol}"
             params = {'apikey': FMP_API_KEY}
             
-            response = requests.get(fmp_url, params=params, timeout=15)
+            response = provider_client.get(fmp_url, params=params, timeout=15)
             
             if response.status_code == 200:
                 earnings_data = response.json()
@@ -228,17 +367,18 @@ def get_upcoming_earnings_api(request):
         
         try:
             # Get earnings for maximum available period or custom days
-            from_date = datetime.now().strftime('%Y-%m-%d')
+            today = timezone.localdate()
+            from_date = today.strftime('%Y-%m-%d')
             
             if days == 'max':
                 # Try to get earnings for the next 365 days (maximum available)
-                to_date = (datetime.now() + timedelta(days=365)).strftime('%Y-%m-%d')
+                to_day = today + timedelta(days=365)
                 max_days = 365
             else:
                 try:
                     days_int = int(days)
-                    days_int = min(days_int, 365)  # Cap at 365 days
-                    to_date = (datetime.now() + timedelta(days=days_int)).strftime('%Y-%m-%d')
+                    days_int = max(0, min(days_int, 365))  # Cap at 365 days
+                    to_day = today + timedelta(days=days_int)
                     max_days = days_int
                 except ValueError:
                     return JsonResponse({
@@ -246,72 +386,62 @@ def get_upcoming_earnings_api(request):
                         'status': 'error'
                     }, status=400)
             
-            # FMP earnings calendar endpoint
-            fmp_url = f"https://financialmodelingprep.com/api/v3/earning_calendar"
-            params = {
-                'from': from_date,
-                'to': to_date,
-                'apikey': FMP_API_KEY
-            }
+            # Served from the local earnings calendar store
+            earnings_data = get_earnings_calendar(today, to_day)
             
-            response = requests.get(fmp_url, params=params)
+            # Group by date and filter for upcoming only
+            upcoming_earnings = {}
+            total_upcoming = 0
             
-            if response.status_code == 200:
-                earnings_data = response.json()
-                
-                # Group by date and filter for upcoming only
-                upcoming_earnings = {}
-                total_upcoming = 0
-                
-                for earning in earnings_data:
-                    if earning.get('eps') is None:  # Only upcoming earnings
-                        date = earning.get('date', 'N/A')
-                        if date not in upcoming_earnings:
-                            upcoming_earnings[date] = []
-                        
-                        # Add earnings/guidance tagging
-                        tag = "guidance" if earning.get('eps') is None else "earnings"
-                        
-                        upcoming_earnings[date].append({
-                            'symbol': earning.get('symbol', 'N/A'),
-                            'company_name': earning.get('companyName', 'N/A'),
-                            'quarter': earning.get('quarter', 'N/A'),
-                            'eps_estimated': earning.get('epsEstimated', None),
-                            'revenue_estimated': earning.get('revenueEstimated', None),
-                            'time': earning.get('time', 'N/A'),
-                            'tag': tag,
-                            'type': 'upcoming'
-                        })
-                        total_upcoming += 1
-                
-                # Sort dates
-                sorted_dates = sorted(upcoming_earnings.keys())
-                sorted_upcoming = {date: upcoming_earnings[date] for date in sorted_dates}
-                
-                # Calculate statistics
-                date_count = len(sorted_dates)
-                furthest_date = sorted_dates[-1] if sorted_dates else from_date
-                
-                # Calculate actual days covered
-                try:
-                    furthest_date_obj = datetime.strptime(furthest_date, '%Y-%m-%d')
-                    from_date_obj = datetime.strptime(from_date, '%Y-%m-%d')
-                    actual_days_covered = (furthest_date_obj - from_date_obj).days
-                except:
-                    actual_days_covered = 0
-                
-                return JsonResponse({
-                    'days_requested': max_days,
-                    'days_covered': actual_days_covered,
-                    'total_earnings': total_upcoming,
-                    'earnings_by_date': sorted_upcoming
-                })
-            else:
-                return JsonResponse({
-                    'error': f'Failed to fetch upcoming earnings from FMP API. Status code: {response.status_code}',
-                    'status': 'error'
-                }, status=response.status_code)
+            for earning in earnings_data:
+                if earning.get('eps') is None:  # Only upcoming earnings
+                    date = earning.get('date', 'N/A')
+                    if date not in upcoming_earnings:
+                        upcoming_earnings[date] = []
+                    
+                    # Add earnings/guidance tagging
+                    tag = "guidance" if earning.get('eps') is None else "earnings"
+                    
+                    upcoming_earnings[date].append({
+                        'symbol': earning.get('symbol', 'N/A'),
+                        'company_name': earning.get('companyName', 'N/A'),
+                        'quarter': earning.get('quarter', 'N/A'),
+                        'eps_estimated': earning.get('epsEstimated', None),
+                        'revenue_estimated': earning.get('revenueEstimated', None),
+                        'time': earning.get('time', 'N/A'),
+                        'tag': tag,
+                        'type': 'upcoming'
+                    })
+                    total_upcoming += 1
+            
+            # Sort dates
+            sorted_dates = sorted(upcoming_earnings.keys())
+            sorted_upcoming = {date: upcoming_earnings[date] for date in sorted_dates}
+            
+            # Calculate statistics
+            date_count = len(sorted_dates)
+            furthest_date = sorted_dates[-1] if sorted_dates else from_date
+            
+            # Calculate actual days covered
+            try:
+                furthest_date_obj = datetime.strptime(furthest_date, '%Y-%m-%d')
+                from_date_obj = datetime.strptime(from_date, '%Y-%m-%d')
+                actual_days_covered = (furthest_date_obj - from_date_obj).days
+            except:
+                actual_days_covered = 0
+            
+            return JsonResponse({
+                'days_requested': max_days,
+                'days_covered': actual_days_covered,
+                'total_earnings': total_upcoming,
+                'earnings_by_date': sorted_upcoming
+            })
                 
+        except EarningsCalendarError as e:
+            return JsonResponse({
+                'error': f'Failed to fetch upcoming earnings from FMP API. {str(e)}',
+                'status': 'error'
+            }, status=e.status_code)
         except Exception as e:
             return JsonResponse({
                 'error': f'An error occurred: {str(e)}',
@@ -344,42 +474,38 @@ def get_earnings_insights_api(request):
             total_analyzed = 0
             surprise_percentages = []
             
+            histories = get_earnings_histories(symbols)
+            
             for symbol in symbols:
                 try:
-                    fmp_url = f"https://financialmodelingprep.com/api/v3/historical/earning_calendar/{symbol}"
-                    params = {'apikey': FMP_API_KEY}
+                    earnings_data = histories.get(symbol)
                     
-                    response = requests.get(fmp_url, params=params, timeout=15)
-                    
-                    if response.status_code == 200:
-                        earnings_data = response.json()
-                        
-                        if earnings_data and isinstance(earnings_data, list) and len(earnings_data) > 0:
-                            # Look through recent earnings to find actual vs estimated data
-                            for earning in earnings_data[:10]:  # Check last 10 earnings reports
-                                eps_est = earning.get('epsEstimated')
-                                eps_act = earning.get('eps')
+                    if earnings_data and isinstance(earnings_data, list):
+                        # Look through recent earnings to find actual vs estimated data
+                        for earning in earnings_data[:10]:  # Check last 10 earnings reports
+                            eps_est = earning.get('epsEstimated')
+                            eps_act = earning.get('eps')
+                            
+                            # More flexible criteria - we need both estimated and actual, but allow zero values
+                            if (eps_est is not None and eps_act is not None and 
+                                isinstance(eps_est, (int, float)) and isinstance(eps_act, (int, float))):
                                 
-                                # More flexible criteria - we need both estimated and actual, but allow zero values
-                                if (eps_est is not None and eps_act is not None and 
-                                    isinstance(eps_est, (int, float)) and isinstance(eps_act, (int, float))):
+                                total_analyzed += 1
+                                try:
+                                    # Use improved surprise calculation
+                                    surprise = calculate_earnings_surprise_percentage(eps_act, eps_est)
                                     
-                                    total_analyzed += 1
-                                    try:
-                                        # Use improved surprise calculation
-                                        surprise = calculate_earnings_surprise_percentage(eps_act, eps_est)
-                                        
-                                        surprise_percentages.append(surprise)
-                                        
-                                        if surprise > 5:  # Beat by more than 5%
-                                            beats += 1
-                                        elif surprise < -5:  # Miss by more than 5%
-                                            misses += 1
-                                        else:
-                                            inline += 1
-                                        break  # Only analyze the most recent valid earnings
-                                    except (ValueError, TypeError, ZeroDivisionError):
-                                        continue
+                                    surprise_percentages.append(surprise)
+                                    
+                                    if surprise > 5:  # Beat by more than 5%
+                                        beats += 1
+                                    elif surprise < -5:  # Miss by more than 5%
+                                        misses += 1
+                                    else:
+                                        inline += 1
+                                    break  # Only analyze the most recent valid earnings
+                                except (ValueError, TypeError, ZeroDivisionError):
+                                    continue
                 except Exception:
                     continue
             
@@ -420,38 +546,35 @@ def get_earnings_insights_by_date_api(request):
             }, status=500)
         
         try:
-            # Get earnings calendar for the specific date
-            fmp_url = f"https://financialmodelingprep.com/api/v3/earning_calendar"
-            params = {
-                'from': target_date,
-                'to': target_date,
-                'apikey': FMP_API_KEY
-            }
+            target_day = _parse_calendar_date(target_date)
+        except ValueError:
+            return JsonResponse({
+                'error': 'Invalid date. Use YYYY-MM-DD format',
+                'status': 'error'
+            }, status=400)
+        
+        try:
+            # Get earnings calendar for the specific date from the local store
+            earnings_data = get_earnings_calendar(target_day, target_day)
             
-            response = requests.get(fmp_url, params=params)
+            if not earnings_data:
+                return JsonResponse({
+                    'date': target_date,
+                    'message': 'No earnings reported on this date',
+                    'status': 'success'
+                })
             
-            if response.status_code == 200:
-                earnings_data = response.json()
-                
-                if not earnings_data:
-                    return JsonResponse({
-                        'date': target_date,
-                        'message': 'No earnings reported on this date',
-                        'status': 'success'
-                    })
-                
-                # Extract symbols for analysis
-                symbols = [earning.get('symbol') for earning in earnings_data if earning.get('symbol')]
-                
-                # Use the existing insights function logic but with the symbols from the date
-                return get_earnings_insights_for_symbols(symbols, target_date)
+            # Extract symbols for analysis
+            symbols = [earning.get('symbol') for earning in earnings_data if earning.get('symbol')]
             
-            else:
-                return JsonResponse({
-                    'error': f'Failed to fetch earnings calendar from FMP API. Status code: {response.status_code}',
-                    'status': 'error'
-                }, status=response.status_code)
+            # Use the existing insights function logic but with the symbols from the date
+            return get_earnings_insights_for_symbols(symbols, target_date)
                 
+        except EarningsCalendarError as e:
+            return JsonResponse({
+                'error': f'Failed to fetch earnings calendar from FMP API. {str(e)}',
+                'status': 'error'
+            }, status=e.status_code)
         except Exception as e:
             return JsonResponse({
                 'error': f'An error occurred: {str(e)}',
@@ -464,178 +587,248 @@ def get_earnings_insights_by_date_api(request):
             'status': 'error'
         }, status=405)
 
-def get_earnings_insights_for_symbols(symbols, analysis_date=None):
-    """Helper function to get insights for a list of symbols with guidance analysis"""
-    if not analysis_date:
-        analysis_date = datetime.now().strftime('%Y-%m-%d')
+@single_flight('fmp.earnings_history')
+def _request_earnings_history(symbol: str) -> Optional[list]:
+    fmp_url = f"https://financialmodelingprep.com/api/v3/historical/earning_calendar/{symbol}"
+    response = provider_client.get(fmp_url, params={'apikey': FMP_API_KEY}, timeout=EARNINGS_REQUEST_TIMEOUT)
+    
+    if response.status_code != 200:
+        return None
+    earnings_data = response.json()
+    return earnings_data if isinstance(earnings_data, list) else []
+
+def get_earnings_history(symbol: str) -> Optional[list]:
+    """
+    Get a symbol's historical earnings, newest first
+    
+    Histories are shared between workers through the cache for
+    EARNINGS_HISTORY_TTL. Returns None if FMP answered with an error status;
+    request errors are raised.
+    """
+    key = f'fmp:earnings:{str(symbol).upper()}'
+    try:
+        cached = cache.get(key)
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached
     
-    # Initialize tracking variables
-    total_companies = len(symbols)
-    companies_with_data = 0
-    earnings_beat = 0
-    earnings_missed = 0
-    earnings_inline = 0
-    not_reported = 0
+    history = _request_earnings_history(symbol)
+    if history is not None:
+        try:
+            cache.set(key, history, EARNINGS_HISTORY_TTL)
+        except Exception as e:
+            print(f"Error caching earnings history for {symbol}: {str(e)}")
+    return history
+
+def get_earnings_histories(symbols, max_workers: int = EARNINGS_MAX_WORKERS) -> Dict[str, object]:
+    """
+    Fetch earnings histories for many symbols concurrently
+    
+    Returns:
+        Dict of symbol -> history list, None for FMP error statuses, or the
+        exception raised while fetching that symbol
+    """
+    unique_symbols = list(dict.fromkeys(symbols))
+    if not unique_symbols:
+        return {}
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_symbols))) as executor:
+        futures = {symbol: executor.submit(get_earnings_history, symbol) for symbol in unique_symbols}
+        for symbol, future in futures.items():
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                results[symbol] = e
+    return results
+
+def _guidance_error(actual: pd.Series, estimated: pd.Series) -> pd.Series:
+    """Relative EPS estimate error, 1.0 (100%) when the estimate is ~0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.Series(
+            np.where(estimated.abs() > 0.001, (actual - estimated).abs() / estimated.abs(), 1.0),
+            index=actual.index
+        )
+
+def analyze_earnings_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add surprise, revenue, guidance and margin columns to a frame of latest earnings
     
-    # Guidance tracking variables
-    guidance_raised = 0
-    guidance_lowered = 0
-    guidance_maintained = 0
-    guidance_available = 0
+    `frame` has one row per company with the latest report's eps_estimated,
+    eps_actual, revenue_estimated and revenue_actual, the previous report's
+    prev_eps_estimated and prev_eps_actual, and has_previous. Every metric is
+    computed column-wise for all companies at once, with the same rules as
+    the scalar calculate_* helpers.
+    """
+    numeric = frame[['eps_estimated', 'eps_actual', 'revenue_estimated', 'revenue_actual',
+                     'prev_eps_estimated', 'prev_eps_actual']].apply(pd.to_numeric, errors='coerce')
+    eps_est, eps_act = numeric['eps_estimated'], numeric['eps_actual']
+    rev_est, rev_act = numeric['revenue_estimated'], numeric['revenue_actual']
+    prev_est, prev_act = numeric['prev_eps_estimated'], numeric['prev_eps_actual']
+    result = frame.copy()
     
-    surprise_percentages = []
-    revenue_growth_rates = []
-    positive_earnings_count = 0
+    # Earnings surprise (see calculate_earnings_surprise_percentage)
+    reported = eps_est.notna() & eps_act.notna()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        surprise = np.where(
+            eps_est.abs() < 0.001,
+            np.select([eps_act > 0.001, eps_act < -0.001], [100.0, -100.0], 0.0),
+            np.clip((eps_act - eps_est) / eps_est * 100, -500.0, 500.0)
+        )
+    result['surprise_percentage'] = np.where(reported, surprise, np.nan)
+    result['earnings_status'] = np.select(
+        [~reported, result['surprise_percentage'] > 2, result['surprise_percentage'] < -2],
+        ['not_reported', 'beat', 'missed'],
+        'inline'
+    )
+    result['positive_earnings'] = reported & (eps_act > 0)
     
-    company_details = []
+    # Revenue growth against estimate
+    has_revenue = rev_est.notna() & rev_act.notna() & (rev_est != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['revenue_growth'] = np.where(has_revenue, (rev_act - rev_est) / rev_est.abs() * 100, np.nan)
+    
+    # Guidance accuracy and direction against the previous report
+    guided = frame['has_previous'].astype(bool) & reported & prev_est.notna() & prev_act.notna()
+    current_error = _guidance_error(eps_act, eps_est)
+    previous_error = _guidance_error(prev_act, prev_est)
+    result['guided'] = guided
+    result['guidance_accuracy'] = np.where(
+        guided, np.round(np.maximum(0.0, 100.0 - current_error.clip(0.0, 10.0) * 100), 2), np.nan
+    )
+    result['guidance_status'] = np.select(
+        [~guided, current_error < previous_error, current_error > previous_error],
+        ['not_available', 'beat_expectations', 'miss_expectations'],
+        'maintained'
+    )
+    result['guidance_direction'] = np.select(
+        [eps_est > prev_est, eps_est < prev_est], ['raised', 'lowered'], 'maintained'
+    )
     
-    # Analyze each symbol
+    # Margin estimated from EPS / revenue
+    has_margin = rev_act.notna() & eps_act.notna() & (rev_act != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low_margin = (eps_act / rev_act * 100) < 5
+    result['has_margin'] = has_margin
+    result['low_margin'] = has_margin & low_margin
+    
+    result['kpi_score'] = (
+        result['positive_earnings'].astype(int)
+        + (result['revenue_growth'] > 0).astype(int)
+        + (has_margin & ~low_margin).astype(int)
+    )
+    return result
+
+def _optional_round(value, digits: int = 2):
+    return None if pd.isna(value) else round(float(value), digits)
+
+def build_earnings_insights(symbols) -> dict:
+    """
+    Earnings beat/miss, guidance and KPI insights for a list of symbols
+    
+    Histories are fetched concurrently through the shared earnings cache, and
+    the aggregates are computed in one pass over a combined frame of every
+    company's latest two reports.
+    """
+    histories = get_earnings_histories(symbols)
+    
+    rows = []
+    slots = []  # per input symbol: index into rows, or an error / no-data detail
     for symbol in symbols:
-        try:
-            # Get historical earnings for each symbol
-            fmp_url = f"https://financialmodelingprep.com/api/v3/historical/earning_calendar/{symbol}"
-            params = {'apikey': FMP_API_KEY}
-            
-            response = requests.get(fmp_url, params=params)
-            
-            if response.status_code == 200:
-                earnings_data = response.json()
-                
-                if earnings_data:
-                    companies_with_data += 1
-                    latest_earning = earnings_data[0]  # Most recent earning
-                    
-                    eps_estimated = latest_earning.get('epsEstimated')
-                    eps_actual = latest_earning.get('eps')
-                    revenue_estimated = latest_earning.get('revenueEstimated')
-                    revenue_actual = latest_earning.get('revenueActual')
-                    
-                    # Get guidance data if available (look for upcoming quarters)
-                    guidance_data = None
-                    guidance_status = "not_available"
-                    
-                    # Check if there's guidance information in next earnings
-                    if len(earnings_data) > 1:
-                        next_earning = earnings_data[1]
-                        next_eps_est = next_earning.get('epsEstimated')
-                        current_eps_est = eps_estimated
-                        
-                        if next_eps_est is not None and current_eps_est is not None:
-                            guidance_available += 1
-                            if next_eps_est > current_eps_est:
-                                guidance_raised += 1
-                                guidance_status = "raised"
-                            elif next_eps_est < current_eps_est:
-                                guidance_lowered += 1
-                                guidance_status = "lowered"
-                            else:
-                                guidance_maintained += 1
-                                guidance_status = "maintained"
-                    
-                    # Tag as earnings or guidance based on actual results availability
-                    tag = "earnings" if eps_actual is not None else "guidance"
-                    
-                    company_detail = {
-                        'symbol': symbol,
-                        'date': latest_earning.get('date', 'N/A'),
-                        'quarter': latest_earning.get('quarter', 'N/A'),
-                        'eps_estimated': eps_estimated,
-                        'eps_actual': eps_actual,
-                        'revenue_estimated': revenue_estimated,
-                        'revenue_actual': revenue_actual,
-                        'surprise_percentage': None,
-                        'revenue_growth': None,
-                        'status': 'not_reported',
-                        'tag': tag,
-                        'guidance_status': guidance_status,
-                        'type': 'historical' if eps_actual is not None else 'upcoming'
-                    }
-                    
-                    # Analyze earnings performance using improved calculation
-                    if eps_actual is not None and eps_estimated is not None:
-                        surprise_pct = calculate_earnings_surprise_percentage(eps_actual, eps_estimated)
-                        if surprise_pct is not None:
-                            surprise_percentages.append(surprise_pct)
-                            company_detail['surprise_percentage'] = round(surprise_pct, 2)
-                            
-                            # Categorize earnings performance (within 2% considered inline)
-                            if surprise_pct > 2:
-                                earnings_beat += 1
-                                company_detail['status'] = 'beat'
-                            elif surprise_pct < -2:
-                                earnings_missed += 1
-                                company_detail['status'] = 'missed'
-                            else:
-                                earnings_inline += 1
-                                company_detail['status'] = 'inline'
-                        
-                        # Check for positive earnings
-                        if eps_actual > 0:
-                            positive_earnings_count += 1
-                    else:
-                        not_reported += 1
-                    
-                    # Calculate revenue growth using improved calculation
-                    if revenue_actual is not None and revenue_estimated is not None:
-                        revenue_growth = calculate_revenue_growth_percentage(revenue_actual, revenue_estimated)
-                        if revenue_growth is not None:
-                            revenue_growth_rates.append(revenue_growth)
-                            company_detail['revenue_growth'] = round(revenue_growth, 2)
-                    
-                    company_details.append(company_detail)
-                else:
-                    not_reported += 1
-                    company_details.append({
-                        'symbol': symbol,
-                        'status': 'no_data',
-                        'tag': 'no_data',
-                        'error': 'No earnings data available'
-                    })
-            
-        except Exception as symbol_error:
-            company_details.append({
+        history = histories.get(symbol)
+        if isinstance(history, Exception):
+            slots.append({'symbol': symbol, 'status': 'error', 'error': str(history)})
+        elif not history:
+            if history is not None:
+                slots.append({'symbol': symbol, 'status': 'no_data', 'error': 'No earnings data available'})
+        else:
+            latest = history[0] or {}
+            previous = (history[1] or {}) if len(history) > 1 else {}
+            slots.append(len(rows))
+            rows.append({
                 'symbol': symbol,
-                'status': 'error',
-                'tag': 'error',
-                'error': str(symbol_error)
+                'date': latest.get('date', 'N/A'),
+                'quarter': latest.get('quarter', 'N/A'),
+                'eps_estimated': latest.get('epsEstimated'),
+                'eps_actual': latest.get('eps'),
+                'revenue_estimated': latest.get('revenueEstimated'),
+                'revenue_actual': latest.get('revenueActual'),
+                'prev_eps_estimated': previous.get('epsEstimated'),
+                'prev_eps_actual': previous.get('eps'),
+                'has_previous': bool(previous),
             })
     
-    # Calculate summary statistics
-    avg_surprise = round(sum(surprise_percentages) / len(surprise_percentages), 2) if surprise_percentages else 0
-    avg_revenue_growth = round(sum(revenue_growth_rates) / len(revenue_growth_rates), 2) if revenue_growth_rates else 0
+    columns = ['symbol', 'date', 'quarter', 'eps_estimated', 'eps_actual', 'revenue_estimated',
+               'revenue_actual', 'prev_eps_estimated', 'prev_eps_actual', 'has_previous']
+    frame = analyze_earnings_frame(pd.DataFrame(rows, columns=columns, dtype=object))
     
-    # Calculate rates using improved calculation
+    status_counts = frame['earnings_status'].value_counts()
+    guidance_counts = frame.loc[frame['guided'], 'guidance_status'].value_counts()
+    direction_counts = frame.loc[frame['guided'], 'guidance_direction'].value_counts()
+    earnings_beat = int(status_counts.get('beat', 0))
+    earnings_missed = int(status_counts.get('missed', 0))
+    earnings_inline = int(status_counts.get('inline', 0))
     reported_companies = earnings_beat + earnings_missed + earnings_inline
-    beat_rate = calculate_percentage_rate(earnings_beat, reported_companies)
-    miss_rate = calculate_percentage_rate(earnings_missed, reported_companies)
-    inline_rate = calculate_percentage_rate(earnings_inline, reported_companies)
-    positive_earnings_rate = calculate_percentage_rate(positive_earnings_count, companies_with_data)
     
-    # Calculate guidance rates using improved calculation
-    guidance_raised_rate = calculate_percentage_rate(guidance_raised, guidance_available)
-    guidance_lowered_rate = calculate_percentage_rate(guidance_lowered, guidance_available)
-    guidance_maintained_rate = calculate_percentage_rate(guidance_maintained, guidance_available)
+    def mean(column: pd.Series) -> float:
+        values = column.dropna()
+        return round(float(values.mean()), 2) if len(values) else 0
+    
+    company_details = []
+    records = frame.to_dict('records')
+    for slot in slots:
+        if isinstance(slot, dict):
+            company_details.append(slot)
+            continue
+        record = records[slot]
+        detail = {
+            'symbol': record['symbol'],
+            'date': record['date'],
+            'quarter': record['quarter'],
+            'eps_estimated': record['eps_estimated'],
+            'eps_actual': record['eps_actual'],
+            'revenue_estimated': record['revenue_estimated'],
+            'revenue_actual': record['revenue_actual'],
+            'surprise_percentage': _optional_round(record['surprise_percentage']),
+            'revenue_growth': _optional_round(record['revenue_growth']),
+            'guidance_status': record['guidance_status'],
+            'guidance_accuracy': _optional_round(record['guidance_accuracy']),
+            'kpi_score': int(record['kpi_score']),
+            'tag': 'earnings' if record['eps_actual'] is not None else 'guidance',
+            'type': 'historical' if record['eps_actual'] is not None else 'upcoming',
+            'earnings_status': record['earnings_status'],
+        }
+        if record['guided']:
+            detail['guidance_direction'] = record['guidance_direction']
+        if record['has_margin']:
+            detail['low_margin'] = bool(record['low_margin'])
+        company_details.append(detail)
     
-    return JsonResponse({
-        'symbols_analyzed': companies_with_data,
+    return {
+        'symbols_analyzed': len(frame),
         'earnings': {
             'beat': earnings_beat,
             'missed': earnings_missed,
             'inline': earnings_inline,
-            'beat_rate': beat_rate,
-            'miss_rate': miss_rate
+            'beat_rate': calculate_percentage_rate(earnings_beat, reported_companies),
+            'miss_rate': calculate_percentage_rate(earnings_missed, reported_companies)
         },
         'guidance': {
-            'raised': guidance_raised,
-            'lowered': guidance_lowered,
-            'beat_expectations': guidance_beat_expectations,
-            'miss_expectations': guidance_miss_expectations,
-            'accuracy': avg_guidance_accuracy
+            'raised': int(direction_counts.get('raised', 0)),
+            'lowered': int(direction_counts.get('lowered', 0)),
+            'beat_expectations': int(guidance_counts.get('beat_expectations', 0)),
+            'miss_expectations': int(guidance_counts.get('miss_expectations', 0)),
+            'accuracy': mean(frame['guidance_accuracy'])
         },
-        'avg_surprise': avg_surprise,
-        'avg_revenue_growth': avg_revenue_growth,
+        'avg_surprise': mean(frame['surprise_percentage']),
+        'avg_revenue_growth': mean(frame['revenue_growth']),
         'companies': company_details
-    })
+    }
+
+def get_earnings_insights_for_symbols(symbols, analysis_date=None):
+    """Helper function to get insights for a list of symbols with guidance analysis"""
+    return JsonResponse(build_earnings_insights(symbols))
 
 def get_comprehensive_earnings_insights_api(request):
     """Get comprehensive earnings insights with guidance implementation for array of stocks"""
@@ -650,220 +843,7 @@ def get_comprehensive_earnings_insights_api(request):
             if not FMP_API_KEY:
                 return JsonResponse({'error': 'API key not configured'}, status=500)
             
-            # Initialize comprehensive tracking variables
-            total_companies = len(symbols)
-            companies_with_data = 0
-            
-            # Earnings performance tracking
-            earnings_beat = 0
-            earnings_missed = 0
-            earnings_inline = 0
-            not_reported = 0
-            
-            # Guidance tracking with enhanced formula
-            guidance_raised = 0
-            guidance_lowered = 0
-            guidance_maintained = 0
-            guidance_available = 0
-            guidance_beat_expectations = 0
-            guidance_miss_expectations = 0
-            
-            # KPIs tracking
-            positive_earnings_count = 0
-            revenue_growth_positive = 0
-            low_margin_companies = 0
-            
-            # Performance metrics
-            surprise_percentages = []
-            revenue_growth_rates = []
-            guidance_accuracy_scores = []
-            
-            company_details = []
-            
-            # Analyze each symbol comprehensively
-            for symbol in symbols:
-                try:
-                    # Get historical earnings data
-                    fmp_url = f"https://financialmodelingprep.com/api/v3/historical/earning_calendar/{symbol}"
-                    params = {'apikey': FMP_API_KEY}
-                    
-                    response = requests.get(fmp_url, params=params, timeout=15)
-                    
-                    if response.status_code == 200:
-                        earnings_data = response.json()
-                        
-                        if earnings_data and isinstance(earnings_data, list):
-                            companies_with_data += 1
-                            
-                            # Get latest and previous earnings for guidance analysis
-                            latest_earning = earnings_data[0] if len(earnings_data) > 0 else {}
-                            previous_earning = earnings_data[1] if len(earnings_data) > 1 else {}
-                            
-                            eps_estimated = latest_earning.get('epsEstimated')
-                            eps_actual = latest_earning.get('eps')
-                            revenue_estimated = latest_earning.get('revenueEstimated')
-                            revenue_actual = latest_earning.get('revenueActual')
-                            
-                            # Initialize company detail record
-                            company_detail = {
-                                'symbol': symbol,
-                                'date': latest_earning.get('date', 'N/A'),
-                                'quarter': latest_earning.get('quarter', 'N/A'),
-                                'eps_estimated': eps_estimated,
-                                'eps_actual': eps_actual,
-                                'revenue_estimated': revenue_estimated,
-                                'revenue_actual': revenue_actual,
-                                'surprise_percentage': None,
-                                'revenue_growth': None,
-                                'guidance_status': 'not_available',
-                                'guidance_accuracy': None,
-                                'kpi_score': 0,
-                                'tag': 'earnings' if eps_actual is not None else 'guidance',
-                                'type': 'historical' if eps_actual is not None else 'upcoming'
-                            }
-                            
-                            # Analyze earnings performance using improved calculation
-                            if eps_actual is not None and eps_estimated is not None:
-                                surprise_pct = calculate_earnings_surprise_percentage(eps_actual, eps_estimated)
-                                if surprise_pct is not None:
-                                    surprise_percentages.append(surprise_pct)
-                                    company_detail['surprise_percentage'] = round(surprise_pct, 2)
-                                    
-                                    # Categorize earnings performance
-                                    if surprise_pct > 2:
-                                        earnings_beat += 1
-                                        company_detail['earnings_status'] = 'beat'
-                                    elif surprise_pct < -2:
-                                        earnings_missed += 1
-                                        company_detail['earnings_status'] = 'missed'
-                                    else:
-                                        earnings_inline += 1
-                                        company_detail['earnings_status'] = 'inline'
-                                
-                                # Check for positive earnings KPI
-                                if eps_actual > 0:
-                                    positive_earnings_count += 1
-                                    company_detail['kpi_score'] += 1
-                            else:
-                                not_reported += 1
-                                company_detail['earnings_status'] = 'not_reported'
-                            
-                            # Revenue growth analysis
-                            if revenue_actual is not None and revenue_estimated is not None and revenue_estimated != 0:
-                                revenue_growth = ((revenue_actual - revenue_estimated) / abs(revenue_estimated)) * 100
-                                revenue_growth_rates.append(revenue_growth)
-                                company_detail['revenue_growth'] = round(revenue_growth, 2)
-                                
-                                if revenue_growth > 0:
-                                    revenue_growth_positive += 1
-                                    company_detail['kpi_score'] += 1
-                            
-                            # Guidance analysis with enhanced formula
-                            if previous_earning:
-                                prev_eps_est = previous_earning.get('epsEstimated')
-                                prev_eps_actual = previous_earning.get('eps')
-                                
-                                # Guidance accuracy calculation
-                                if (prev_eps_est is not None and prev_eps_actual is not None and 
-                                    eps_estimated is not None and eps_actual is not None):
-                                    
-                                    guidance_available += 1
-                                    
-                                    # Calculate guidance accuracy score with improved math
-                                    prev_guidance_error = abs(prev_eps_actual - prev_eps_est) / abs(prev_eps_est) if abs(prev_eps_est) > 0.001 else 1.0
-                                    current_guidance_error = abs(eps_actual - eps_estimated) / abs(eps_estimated) if abs(eps_estimated) > 0.001 else 1.0
-                                    
-                                    # Use improved guidance accuracy calculation
-                                    guidance_accuracy_score = calculate_guidance_accuracy_score(current_guidance_error)
-                                    
-                                    # Guidance improved if current error is smaller
-                                    if current_guidance_error < prev_guidance_error:
-                                        guidance_beat_expectations += 1
-                                        company_detail['guidance_status'] = 'beat_expectations'
-                                    elif current_guidance_error > prev_guidance_error:
-                                        guidance_miss_expectations += 1
-                                        company_detail['guidance_status'] = 'miss_expectations'
-                                    else:
-                                        guidance_maintained += 1
-                                        company_detail['guidance_status'] = 'maintained'
-                                    
-                                    guidance_accuracy_scores.append(guidance_accuracy_score)
-                                    company_detail['guidance_accuracy'] = guidance_accuracy_score
-                                    
-                                    # Guidance direction analysis
-                                    if eps_estimated > prev_eps_est:
-                                        guidance_raised += 1
-                                        company_detail['guidance_direction'] = 'raised'
-                                    elif eps_estimated < prev_eps_est:
-                                        guidance_lowered += 1
-                                        company_detail['guidance_direction'] = 'lowered'
-                                    else:
-                                        company_detail['guidance_direction'] = 'maintained'
-                            
-                            # Calculate margin analysis (simplified)
-                            if revenue_actual is not None and eps_actual is not None and revenue_actual != 0:
-                                # Estimate margin based on EPS/Revenue ratio
-                                estimated_margin = (eps_actual / revenue_actual) * 100
-                                if estimated_margin < 5:  # Low margin threshold
-                                    low_margin_companies += 1
-                                    company_detail['low_margin'] = True
-                                else:
-                                    company_detail['low_margin'] = False
-                                    company_detail['kpi_score'] += 1
-                            
-                            company_details.append(company_detail)
-                            
-                except Exception as symbol_error:
-                    company_details.append({
-                        'symbol': symbol,
-                        'status': 'error',
-                        'error': str(symbol_error)
-                    })
-            
-            # Calculate comprehensive metrics
-            reported_companies = earnings_beat + earnings_missed + earnings_inline
-            
-            # Performance rates using improved calculation
-            beat_rate = calculate_percentage_rate(earnings_beat, reported_companies)
-            miss_rate = calculate_percentage_rate(earnings_missed, reported_companies)
-            inline_rate = calculate_percentage_rate(earnings_inline, reported_companies)
-            
-            # Guidance rates using improved calculation
-            guidance_beat_rate = calculate_percentage_rate(guidance_beat_expectations, guidance_available)
-            guidance_miss_rate = calculate_percentage_rate(guidance_miss_expectations, guidance_available)
-            guidance_raised_rate = calculate_percentage_rate(guidance_raised, guidance_available)
-            guidance_lowered_rate = calculate_percentage_rate(guidance_lowered, guidance_available)
-            
-            # KPI rates using improved calculation
-            positive_earnings_rate = calculate_percentage_rate(positive_earnings_count, companies_with_data)
-            revenue_growth_rate = calculate_percentage_rate(revenue_growth_positive, companies_with_data)
-            low_margin_rate = calculate_percentage_rate(low_margin_companies, companies_with_data)
-            
-            # Average metrics
-            avg_surprise = round(sum(surprise_percentages) / len(surprise_percentages), 2) if surprise_percentages else 0
-            avg_revenue_growth = round(sum(revenue_growth_rates) / len(revenue_growth_rates), 2) if revenue_growth_rates else 0
-            avg_guidance_accuracy = round(sum(guidance_accuracy_scores) / len(guidance_accuracy_scores), 2) if guidance_accuracy_scores else 0
-            
-            return JsonResponse({
-                'symbols_analyzed': companies_with_data,
-                'earnings': {
-                    'beat': earnings_beat,
-                    'missed': earnings_missed,
-                    'inline': earnings_inline,
-                    'beat_rate': beat_rate,
-                    'miss_rate': miss_rate
-                },
-                'guidance': {
-                    'raised': guidance_raised,
-                    'lowered': guidance_lowered,
-                    'beat_expectations': guidance_beat_expectations,
-                    'miss_expectations': guidance_miss_expectations,
-                    'accuracy': avg_guidance_accuracy
-                },
-                'avg_surprise': avg_surprise,
-                'avg_revenue_growth': avg_revenue_growth,
-                'companies': company_details
-            })
+            return JsonResponse(build_earnings_insights(symbols))
             
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
@@ -884,7 +864,8 @@ def get_earnings_correlation_api(request):
         try:
             # Use OpenAI to analyze correlation with tech factors
             from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
-            from openai import AzureOpenAI
+            from ai_models.services.llm_cache import is_json_response, llm_cache
+            from ai_models.services import llm_router
             
             if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
                 return JsonResponse({
@@ -894,12 +875,6 @@ def get_earnings_correlation_api(request):
                     'enterprise_spending': 50
                 }, status=500)
             
-            client = AzureOpenAI(
-                api_key=AZURE_OPENAI_KEY,
-                api_version="2023-05-15",
-                azure_endpoint=AZURE_OPENAI_ENDPOINT
-            )
-            
             prompt = f"""
             Analyze how strongly {symbol}'s earnings performance correlates with each of these four technology market factors individually:
             
@@ -924,16 +899,16 @@ def get_earnings_correlation_api(request):
             }}
             """
             
-            response = client.chat.completions.create(
+            ai_response = llm_cache.complete(
+                'earnings_correlation',
                 model=MODEL_NAME,
                 messages=[
                     {"role": "system", "content": "You are a financial correlation analysis expert. Always respond with valid JSON only."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3
-            )
-            
-            ai_response = response.choices[0].message.content.strip()
+                temperature=0.3,
+                validate=is_json_response
+            ).strip()
             
             try:
                 # Try to find JSON in the response (in case there's extra text)
@@ -999,19 +974,19 @@ def get_earnings_correlation_impact_api(request):
             fmp_url = f"https://financialmodelingprep.com/api/v3/historical/earning_calendar/{symbol}"
             params = {'apikey': FMP_API_KEY}
             
-            response = requests.get(fmp_url, params=params, timeout=15)
+            response = provider_client.get(fmp_url, params=params, timeout=15)
             
             if response.status_code == 200:
                 earnings_data = response.json()
                 
                 # Also get company profile for additional context
                 profile_url = f"https://financialmodelingprep.com/api/v3/profile/{symbol}"
-                profile_response = requests.get(profile_url, params=params, timeout=15)
+                profile_response = provider_client.get(profile_url, params=params, timeout=15)
                 company_profile = profile_response.json() if profile_response.status_code == 200 else []
                 
                 # Use OpenAI to analyze earnings correlation and impact
                 from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
-                from openai import AzureOpenAI
+                from ai_models.services import llm_router
                 
                 if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
                     return JsonResponse({
@@ -1019,12 +994,6 @@ def get_earnings_correlation_impact_api(request):
                         'impact_level': 'medium'
                     }, status=500)
                 
-                client = AzureOpenAI(
-                    api_key=AZURE_OPENAI_KEY,
-                    api_version="2023-05-15",
-                    azure_endpoint=AZURE_OPENAI_ENDPOINT
-                )
-                
                 # Prepare earnings data summary for analysis
                 recent_earnings = earnings_data[:8] if earnings_data else []  # Last 8 quarters
                 company_info = company_profile[0] if company_profile else {}
@@ -1074,16 +1043,14 @@ def get_earnings_correlation_impact_api(request):
                 }}
                 """
                 
-                response = client.chat.completions.create(
+                ai_response = llm_router.generate(
                     model=MODEL_NAME,
                     messages=[
                         {"role": "system", "content": "You are a financial analysis expert specializing in earnings correlation and market impact analysis. Always respond with valid JSON only."},
                         {"role": "user", "content": prompt}
                     ],
                     temperature=0.3
-                )
-                
-                ai_response = response.choices[0].message.content.strip()
+                ).strip()
                 
                 try:
                     # Try to find JSON in the response (in case there's extra text)
@@ -1,10 +1,112 @@
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
 import os
+import threading
+import time
 from typing import Dict, List, Optional
 import json
 
+from .provider_client import provider_client
+from .single_flight import single_flight
+
+# Convert period to days for FMP API
+PERIOD_DAYS = {
+    "6mo": 180,
+    "1y": 365,
+    "2y": 730,
+    "5y": 1825,
+    "max": 3650
+}
+
+HISTORY_LRU_SIZE = 256              # tickers kept in each process
+HISTORY_CACHE_TIMEOUT = 24 * 3600   # seconds a history stays in the shared cache
+HISTORY_REFRESH_INTERVAL = 15 * 60  # seconds before checking FMP for new daily bars
+HISTORY_MAX_AGE = 24 * 3600         # seconds before a history is refetched in full (split/dividend adjustments)
+FUNDAMENTALS_CACHE_TIMEOUT = 6 * 3600  # seconds a fundamentals snapshot stays in the shared cache
+
+
+def _merge_price_frames(older: pd.DataFrame, newer: pd.DataFrame) -> pd.DataFrame:
+    """Combine two date-indexed frames; rows from `newer` win on the same date"""
+    if older.empty:
+        return newer
+    if newer.empty:
+        return older
+    combined = pd.concat([older, newer])
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+def _history_adjusted(cached: pd.DataFrame, newer: pd.DataFrame) -> bool:
+    """Whether a completed bar in both frames changed close, meaning FMP re-adjusted past prices"""
+    if len(cached) < 2 or newer.empty or 'close' not in newer:
+        return False
+    date = cached.index[-2]
+    if date not in newer.index:
+        return False
+    return abs(float(newer.at[date, 'close']) - float(cached.at[date, 'close'])) > 1e-6
+
+
+class PriceHistoryCache:
+    """
+    Two-tier cache of daily price history per ticker
+
+    An in-process LRU sits in front of the shared Django cache, so repeat
+    requests in a worker skip unpickling and other workers can reuse a
+    history fetched elsewhere. Entries are dicts with the parsed `frame`,
+    the `start` date it covers, when it was last `refreshed_at` and when it
+    was last `fetched_at` in full.
+    """
+    
+    def __init__(self, maxsize: int = HISTORY_LRU_SIZE, timeout: int = HISTORY_CACHE_TIMEOUT):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _key(self, ticker: str) -> str:
+        return f'fmp:history:{ticker.upper()}'
+    
+    def get(self, ticker: str) -> Optional[dict]:
+        key = self._key(ticker)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        
+        if entry is None or time.time() - entry['refreshed_at'] > HISTORY_REFRESH_INTERVAL:
+            # Another worker may hold a longer or fresher history
+            try:
+                shared = cache.get(key)
+            except Exception:
+                shared = None
+            if shared is not None and (entry is None or shared['refreshed_at'] > entry['refreshed_at']):
+                entry = shared
+                self._remember(key, entry)
+        return entry
+    
+    def set(self, ticker: str, entry: dict):
+        key = self._key(ticker)
+        self._remember(key, entry)
+        try:
+            cache.set(key, entry, self.timeout)
+        except Exception as e:
+            print(f"Error caching FMP history for {ticker}: {str(e)}")
+    
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class FMPService:
     """Service for interacting with Financial Modeling Prep API"""
     
@@ -19,6 +121,13 @@ class FMPService:
         """
         Get historical price data for a ticker
         
+        Served from the price history cache: shorter periods are slices of a
+        longer cached history, only missing older bars are fetched when a longer
+        period is requested, and new daily bars are appended incrementally.
+        The whole history is refetched once it is HISTORY_MAX_AGE old (at its
+        next refresh), or as soon as an already cached bar comes back with a
+        different close, so split and dividend adjustments reach older bars.
+        
         Args:
             ticker: Stock ticker symbol
             period: Time period (6mo, 1y, 2y, 5y, max)
@@ -26,45 +135,104 @@ class FMPService:
         Returns:
             DataFrame with historical price data
         """
+        days = PERIOD_DAYS.get(period, 180)
+        today = datetime.now().date()
+        start = today - timedelta(days=days)
+        
+        entry = price_history_cache.get(ticker)
         try:
-            # Convert period to days for FMP API
-            period_days = {
-                "6mo": 180,
-                "1y": 365,
-                "2y": 730,
-                "5y": 1825,
-                "max": 3650
-            }
-            
-            days = period_days.get(period, 180)
-            
-            url = f"{self.base_url}/historical-price-full/{ticker}"
-            params = {
-                'apikey': self.api_key,
-                'from': (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
-                'to': datetime.now().strftime('%Y-%m-%d')
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'historical' not in data or not data['historical']:
-                return pd.DataFrame()
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(data['historical'])
-            df['date'] = pd.to_datetime(df['date'])
-            df.set_index('date', inplace=True)
-            df.sort_index(inplace=True)
-            
-            return df
-            
+            if entry is None:
+                entry = self._fetch_full_history(ticker, start, today)
+                price_history_cache.set(ticker, entry)
+            elif (time.time() - entry.get('fetched_at', 0) > HISTORY_MAX_AGE
+                  and time.time() - entry['refreshed_at'] > HISTORY_REFRESH_INTERVAL):
+                entry = self._refetch_history(ticker, entry, min(start, entry['start']), today)
+                price_history_cache.set(ticker, entry)
+            else:
+                entry = dict(entry)
+                changed = False
+                if start < entry['start']:
+                    # Longer period than cached: fetch only the older missing bars
+                    older = self._fetch_history_range(ticker, start, entry['start'] - timedelta(days=1))
+                    entry['frame'] = _merge_price_frames(older, entry['frame'])
+                    entry['start'] = start
+                    changed = True
+                if time.time() - entry['refreshed_at'] > HISTORY_REFRESH_INTERVAL:
+                    # Refetch from the bar before the last cached one: the last bar is replaced by
+                    # its final close, and a change in the completed one before it means FMP
+                    # adjusted past prices
+                    frame = entry['frame']
+                    since = frame.index[-min(len(frame), 2)].date() if not frame.empty else entry['start']
+                    newer = self._fetch_history_range(ticker, since, today)
+                    if _history_adjusted(frame, newer):
+                        entry = self._refetch_history(ticker, entry, entry['start'], today)
+                    else:
+                        entry['frame'] = _merge_price_frames(frame, newer)
+                        entry['refreshed_at'] = time.time()
+                    changed = True
+                if changed:
+                    price_history_cache.set(ticker, entry)
         except Exception as e:
             print(f"Error fetching FMP data for {ticker}: {str(e)}")
+            if entry is None:
+                return pd.DataFrame()
+        
+        df = entry['frame']
+        if df.empty:
             return pd.DataFrame()
+        return df[df.index >= pd.Timestamp(start)].copy()
+    
+    def _refetch_history(self, ticker: str, entry: dict, start, end) -> dict:
+        """
+        Replace a cached history with a full refetch
+        
+        FMP can answer with no bars (e.g. an error message with status 200);
+        the cached bars are then kept and only refreshed_at is bumped, so the
+        refetch is retried after HISTORY_REFRESH_INTERVAL.
+        """
+        fresh = self._fetch_full_history(ticker, start, end)
+        if fresh['frame'].empty and not entry['frame'].empty:
+            print(f"FMP returned no history for {ticker}, keeping cached bars")
+            return dict(entry, refreshed_at=fresh['refreshed_at'])
+        return fresh
+    
+    def _fetch_full_history(self, ticker: str, start, end) -> dict:
+        """A fresh price history cache entry covering start to end"""
+        now = time.time()
+        return {
+            'frame': self._fetch_history_range(ticker, start, end),
+            'start': start,
+            'refreshed_at': now,
+            'fetched_at': now,
+        }
     
+    @single_flight('fmp.historical_range')
+    def _fetch_history_range(self, ticker: str, start, end) -> pd.DataFrame:
+        """Fetch daily bars between two dates (inclusive), oldest first; raises on request errors"""
+        url = f"{self.base_url}/historical-price-full/{ticker}"
+        params = {
+            'apikey': self.api_key,
+            'from': start.strftime('%Y-%m-%d'),
+            'to': end.strftime('%Y-%m-%d')
+        }
+        
+        response = provider_client.get(url, params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        if 'historical' not in data or not data['historical']:
+            return pd.DataFrame()
+        
+        # Convert to DataFrame
+        df = pd.DataFrame(data['historical'])
+        df['date'] = pd.to_datetime(df['date'])
+        df.set_index('date', inplace=True)
+        df.sort_index(inplace=True)
+        
+        return df
+    
+    @single_flight('fmp.get_company_profile')
     def get_company_profile(self, ticker: str) -> Dict:
         """
         Get company profile information
@@ -79,7 +247,7 @@ class FMPService:
             url = f"{self.base_url}/profile/{ticker}"
             params = {'apikey': self.api_key}
             
-            response = requests.get(url, params=params)
+            response = provider_client.get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -93,6 +261,7 @@ class FMPService:
             print(f"Error fetching company profile for {ticker}: {str(e)}")
             return {}
     
+    @single_flight('fmp.get_stock_quote')
     def get_stock_quote(self, ticker: str) -> Dict:
         """
         Get current stock quote
@@ -107,7 +276,7 @@ class FMPService:
             url = f"{self.base_url}/quote/{ticker}"
             params = {'apikey': self.api_key}
             
-            response = requests.get(url, params=params)
+            response = provider_client.get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -121,6 +290,7 @@ class FMPService:
             print(f"Error fetching stock quote for {ticker}: {str(e)}")
             return {}
 
+    @single_flight('fmp.get_intraday_price_data')
     def get_intraday_price_data(self, ticker: str, interval: str = "1hour", limit: int = 200) -> pd.DataFrame:
         """
         Get intraday OHLCV data for a ticker at a specified interval.
@@ -143,7 +313,7 @@ class FMPService:
                 'apikey': self.api_key
             }
 
-            response = requests.get(url, params=params)
+            response = provider_client.get(url, params=params)
             response.raise_for_status()
             data = response.json() or []
 
@@ -171,6 +341,7 @@ class FMPService:
             print(f"Error fetching intraday {interval} data for {ticker}: {str(e)}")
             return pd.DataFrame()
 
+    @single_flight('fmp.get_free_float')
     def get_free_float(self, ticker: str) -> Optional[float]:
         """
         Get free float shares count for a ticker if available.
@@ -180,7 +351,7 @@ class FMPService:
         try:
             url = f"{self.base_url}/shares_float/{ticker}"
             params = {'apikey': self.api_key}
-            response = requests.get(url, params=params)
+            response = provider_client.get(url, params=params)
             response.raise_for_status()
             data = response.json() or []
             if isinstance(data, list) and data:
@@ -196,6 +367,60 @@ class FMPService:
             print(f"Error fetching free float for {ticker}: {str(e)}")
             return None
 
+    @single_flight('fmp.get_fundamentals_snapshot')
+    def get_fundamentals_snapshot(self, ticker: str) -> Dict:
+        """
+        Get average volume, market cap and free float for a ticker
+
+        Quote, profile and free float are fetched concurrently and the
+        combined snapshot is kept in the shared cache, so every worker and
+        endpoint reuses one set of FMP calls per ticker.
+
+        Returns:
+            Dictionary with average_volume, market_cap and free_float (each may be None)
+        """
+        ticker = ticker.upper()
+        key = f'fmp:fundamentals:{ticker}'
+        try:
+            snapshot = cache.get(key)
+        except Exception:
+            snapshot = None
+        if snapshot is not None:
+            return snapshot
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            quote_future = executor.submit(self.get_stock_quote, ticker)
+            profile_future = executor.submit(self.get_company_profile, ticker)
+            free_float_future = executor.submit(self.get_free_float, ticker)
+            quote = quote_future.result() or {}
+            profile = profile_future.result() or {}
+            free_float = free_float_future.result()
+
+        snapshot = {
+            # Average volume: prefer profile avgVolume, fallback to quote volume
+            'average_volume': (
+                profile.get('volAvg')
+                or profile.get('avgVolume')
+                or quote.get('avgVolume')
+                or quote.get('volume')
+            ),
+            'market_cap': (
+                profile.get('mktCap')
+                or profile.get('marketCap')
+                or quote.get('marketCap')
+            ),
+            'free_float': free_float
+        }
+
+        # Don't pin an empty snapshot from a failed fetch
+        if any(value is not None for value in snapshot.values()):
+            try:
+                cache.set(key, snapshot, FUNDAMENTALS_CACHE_TIMEOUT)
+            except Exception as e:
+                print(f"Error caching fundamentals for {ticker}: {str(e)}")
+        return snapshot
+
+    @single_flight('fmp.get_most_active_stocks')
     def get_most_active_stocks(self, limit: int = 20) -> List[Dict]:
         """
         Get list of most active stocks (by volume) from FMP.
@@ -211,7 +436,7 @@ class FMPService:
             params = {
                 'apikey': self.api_key
             }
-            response = requests.get(url, params=params)
+            response = provider_client.get(url, params=params)
             response.raise_for_status()
             data = response.json() or []
             trimmed = []
@@ -229,5 +454,6 @@ class FMPService:
             print(f"Error fetching most active stocks: {str(e)}")
             return []
 
-# Global FMP service instance
+# Global price history cache and FMP service instance
+price_history_cache = PriceHistoryCache()
 fmp_service = FMPService() 
\ No newline at end of file
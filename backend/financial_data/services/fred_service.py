@@ -1,17 +1,40 @@
 #internal
 from financial_data.config import FRED_API_KEY
+from financial_data.models import FredSeries
+from financial_data.services.provider_client import provider_client
 
 # external
 import requests
 
 # built-in
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.db import DatabaseError, connections
 from django.http import JsonResponse
+from django.utils import timezone
 
 FRED_BASE_URL = 'https://api.stlouisfed.org/fred/series/observations'
+FRED_MAX_OBSERVATIONS = 1000
 
-# Helper to fetch FRED data with improved error handling
-def fetch_fred_data(series_id, frequency):
-    """Fetch FRED data with improved error handling and null value protection"""
+# How long stored observations are served before asking FRED for updates
+FRED_TTL_BY_FREQUENCY = {
+    'd': timedelta(hours=6),
+    'w': timedelta(hours=24),
+    'bw': timedelta(hours=24),
+    'm': timedelta(days=1),
+    'q': timedelta(days=3),
+    'sa': timedelta(days=7),
+    'a': timedelta(days=7),
+}
+FRED_DEFAULT_TTL = timedelta(days=1)
+
+# Fan-out limits for the category endpoints
+FRED_BATCH_MAX_WORKERS = 8       # concurrent FRED requests per batch
+FRED_REQUEST_TIMEOUT = 10        # seconds per FRED round trip
+FRED_BATCH_DEADLINE = 15         # seconds for a whole batch
+
+def _request_fred_observations(series_id, frequency, timeout=30, observation_start=None):
+    """Request observations from FRED and keep only valid values, oldest first"""
     try:
         if not FRED_API_KEY:
             return {'error': 'FRED API key not configured'}
@@ -21,11 +44,14 @@ def fetch_fred_data(series_id, frequency):
             'api_key': FRED_API_KEY,
             'file_type': 'json',
             'frequency': frequency,
-            'limit': 1000,  # Increased limit to get more data
+            'limit': FRED_MAX_OBSERVATIONS,
             'sort_order': 'desc'  # Get most recent first
         }
+        if observation_start:
+            # Incremental refresh: only what changed since the last stored date
+            params['observation_start'] = observation_start
         
-        response = requests.get(FRED_BASE_URL, params=params, timeout=30)
+        response = provider_client.get(FRED_BASE_URL, params=params, timeout=timeout)
         
         if response.status_code == 200:
             data = response.json()
@@ -54,6 +80,152 @@ def fetch_fred_data(series_id, frequency):
     except Exception as e:
         return {'error': f'Unexpected error: {str(e)}'}
 
+def _merge_fred_observations(stored, fresh):
+    """Merge fresh observations into stored ones; fresh values win on the same date"""
+    by_date = {obs['date']: obs for obs in stored}
+    for obs in fresh:
+        by_date[obs['date']] = obs
+    merged = [by_date[date] for date in sorted(by_date)]
+    return merged[-FRED_MAX_OBSERVATIONS:]
+
+# Helper to fetch FRED data with improved error handling
+def fetch_fred_data(series_id, frequency, timeout=30):
+    """
+    Fetch FRED observations through the local observation store
+
+    Stored observations are served until their frequency-based TTL expires,
+    then only observations since the last stored date are requested from FRED.
+    If FRED is unavailable, stale stored observations are served instead.
+    """
+    try:
+        stored = FredSeries.objects.filter(series_id=series_id, frequency=frequency).first()
+    except DatabaseError:
+        # Store unavailable (e.g. migrations not applied); go straight to FRED
+        return _request_fred_observations(series_id, frequency, timeout)
+    
+    now = timezone.now()
+    ttl = FRED_TTL_BY_FREQUENCY.get(frequency, FRED_DEFAULT_TTL)
+    if stored and stored.refreshed_at + ttl > now:
+        return stored.observations
+    
+    observation_start = str(stored.last_observation_date) if stored and stored.last_observation_date else None
+    fresh = _request_fred_observations(series_id, frequency, timeout, observation_start)
+    
+    if isinstance(fresh, dict):
+        if stored and stored.observations:
+            return stored.observations
+        return fresh
+    
+    observations = _merge_fred_observations(stored.observations if stored else [], fresh)
+    try:
+        FredSeries.objects.update_or_create(
+            series_id=series_id,
+            frequency=frequency,
+            defaults={
+                'observations': observations,
+                'last_observation_date': observations[-1]['date'] if observations else None,
+                'refreshed_at': now,
+            }
+        )
+    except DatabaseError:
+        pass
+    return observations
+
+def _fetch_fred_data_in_worker(series_id, frequency, timeout):
+    """Run fetch_fred_data on a pool thread and release that thread's DB connection"""
+    try:
+        return fetch_fred_data(series_id, frequency, timeout)
+    finally:
+        connections.close_all()
+
+def fetch_fred_series_batch(specs, max_workers=FRED_BATCH_MAX_WORKERS,
+                            deadline=FRED_BATCH_DEADLINE, timeout=FRED_REQUEST_TIMEOUT):
+    """
+    Fetch several FRED series concurrently
+
+    Args:
+        specs: Iterable of (name, series_id, frequency) tuples
+        max_workers: Maximum number of FRED requests in flight at once
+        deadline: Seconds to wait for the whole batch
+        timeout: Seconds allowed for each individual FRED request
+
+    Returns:
+        Dictionary mapping each name to its observations list, or to an
+        {'error': ...} dict. Series that miss the deadline are reported as
+        errors so callers always get partial results.
+    """
+    specs = list(specs)
+    if not specs:
+        return {}
+
+    # Identical (series_id, frequency) pairs are only fetched once
+    keys = list(dict.fromkeys((series_id, frequency) for _, series_id, frequency in specs))
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(keys)))
+    try:
+        futures = {
+            key: executor.submit(_fetch_fred_data_in_worker, key[0], key[1], timeout)
+            for key in keys
+        }
+        wait(futures.values(), timeout=deadline)
+    finally:
+        # Don't block the request on stragglers; queued fetches are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    fetched = {}
+    for key, future in futures.items():
+        if not future.done() or future.cancelled():
+            fetched[key] = {'error': f'Timed out after {deadline}s'}
+        elif future.exception() is not None:
+            fetched[key] = {'error': f'Unexpected error: {str(future.exception())}'}
+        else:
+            fetched[key] = future.result()
+
+    return {name: fetched[(series_id, frequency)] for name, series_id, frequency in specs}
+
+def fetch_fred_recent_series(indicators, plan):
+    """
+    Fetch a category of FRED series and summarize the most recent observations
+
+    Args:
+        indicators: Dictionary mapping indicator names to FRED series IDs
+        plan: Callable taking an indicator name and returning (frequency, recent_count)
+
+    Returns:
+        Dictionary mapping each indicator name to its summary or error entry
+    """
+    specs = []
+    recent_counts = {}
+    for name, series_id in indicators.items():
+        frequency, recent_counts[name] = plan(name)
+        specs.append((name, series_id, frequency))
+
+    batch = fetch_fred_series_batch(specs)
+
+    results = {}
+    for name, series_id, frequency in specs:
+        data = batch[name]
+        if isinstance(data, dict):
+            results[name] = {
+                'series_id': series_id,
+                'error': data.get('error', 'No data available')
+            }
+        elif data:
+            latest = data[-1]
+            results[name] = {
+                'series_id': series_id,
+                'latest_value': latest.get('value', 'N/A'),
+                'latest_date': latest.get('date', 'N/A'),
+                'recent_data': data[-recent_counts[name]:],
+                'frequency': frequency
+            }
+        else:
+            results[name] = {
+                'series_id': series_id,
+                'error': 'No data available'
+            }
+    return results
+
 def fred_yearly_api(request):
     if request.method == 'POST':
         ticker = request.POST.get('ticker', '')
@@ -148,11 +320,15 @@ def fred_economic_indicators_api(request):
             'treasury_10y': 'DGS10'
         }
         
+        batch = fetch_fred_series_batch(
+            (name, series_id, 'm') for name, series_id in indicators.items()
+        )
+        
         results = {}
         for name, series_id in indicators.items():
             try:
-                data = fetch_fred_data(series_id, 'm')
-                if data and len(data) > 0:
+                data = batch[name]
+                if isinstance(data, list) and len(data) > 0:
                     latest = data[-1]
                     if latest.get('value') and latest['value'] != '.':
                         results[name] = {
@@ -180,34 +356,13 @@ def fred_market_events_api(request):
             'Real_GDP_Growth': 'A191RL1Q225SBEA', # Real GDP Growth Rate
         }
         
-        results = {}
-        for name, series_id in market_indicators.items():
-            try:
-                # Use daily frequency for market data, monthly for economic data
-                frequency = 'd' if name in ['VIX', 'SP500', 'Dollar_Index', 'Gold_Price', 'Oil_Price'] else 'm'
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    # Get recent data (last 30 for daily, last 12 for monthly)
-                    recent_count = 30 if frequency == 'd' else 12
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Use daily frequency for market data, monthly for economic data
+            frequency = 'd' if name in ['VIX', 'SP500', 'Dollar_Index', 'Gold_Price', 'Oil_Price'] else 'm'
+            # Get recent data (last 30 for daily, last 12 for monthly)
+            return frequency, 30 if frequency == 'd' else 12
+
+        results = fetch_fred_recent_series(market_indicators, plan)
         
         return JsonResponse({'market_events': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -229,12 +384,16 @@ def fred_cpi_detailed_api(request):
             'PPI': 'PPIFIS',                   # Producer Price Index
         }
         
+        batch = fetch_fred_series_batch(
+            (name, series_id, 'm') for name, series_id in cpi_indicators.items()  # Monthly frequency
+        )
+        
         results = {}
         for name, series_id in cpi_indicators.items():
             try:
-                data = fetch_fred_data(series_id, 'm')  # Monthly frequency
+                data = batch[name]
                 
-                if data and len(data) >= 2:
+                if isinstance(data, list) and len(data) >= 2:
                     latest = data[-1]
                     previous = data[-2]
                     
@@ -299,33 +458,12 @@ def fred_money_banking_api(request):
             'High_Yield_Spread': 'BAMLH0A0HYM2',         # High Yield Corporate Bond Spread
         }
         
-        results = {}
-        for name, series_id in banking_indicators.items():
-            try:
-                # Use appropriate frequency based on data type
-                frequency = 'd' if 'Treasury' in name or 'Corporate' in name or 'Exchange' in name else 'm'
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    recent_count = 30 if frequency == 'd' else 12
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Use appropriate frequency based on data type
+            frequency = 'd' if 'Treasury' in name or 'Corporate' in name or 'Exchange' in name else 'm'
+            return frequency, 30 if frequency == 'd' else 12
+
+        results = fetch_fred_recent_series(banking_indicators, plan)
         
         return JsonResponse({'money_banking': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -354,37 +492,13 @@ def fred_employment_labor_api(request):
             'Retail_Sales': 'RSXFS',                      # Retail Sales Ex Autos
         }
         
-        results = {}
-        for name, series_id in labor_indicators.items():
-            try:
-                # Use weekly for claims data, monthly for others
-                frequency = 'w' if 'Claims' in name else 'm'
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    if frequency == 'w':
-                        recent_count = 52  # 52 weeks
-                    else:
-                        recent_count = 12  # 12 months
-                    
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Use weekly for claims data (52 weeks), monthly for others (12 months)
+            if 'Claims' in name:
+                return 'w', 52
+            return 'm', 12
+
+        results = fetch_fred_recent_series(labor_indicators, plan)
         
         return JsonResponse({'employment_labor': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -412,33 +526,12 @@ def fred_price_commodities_api(request):
             'Education_CPI': 'CPIEDUSL',                  # Education CPI
         }
         
-        results = {}
-        for name, series_id in price_indicators.items():
-            try:
-                # Use daily for commodity prices, monthly for indices
-                frequency = 'd' if 'Price' in name else 'm'
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    recent_count = 30 if frequency == 'd' else 12
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Use daily for commodity prices, monthly for indices
+            frequency = 'd' if 'Price' in name else 'm'
+            return frequency, 30 if frequency == 'd' else 12
+
+        results = fetch_fred_recent_series(price_indicators, plan)
         
         return JsonResponse({'price_commodities': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -464,41 +557,15 @@ def fred_international_data_api(request):
             'Current_Account': 'NETFI',                   # Net International Investment Position
         }
         
-        results = {}
-        for name, series_id in international_indicators.items():
-            try:
-                # Use daily for FX rates, quarterly/monthly for GDP and trade
-                if 'USD' in name or 'EUR' in name or 'GBP' in name or 'DXY' in name:
-                    frequency = 'd'
-                    recent_count = 30
-                elif 'GDP' in name:
-                    frequency = 'q'  # quarterly
-                    recent_count = 8   # 8 quarters (2 years)
-                else:
-                    frequency = 'm'
-                    recent_count = 12
-                
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Use daily for FX rates, quarterly/monthly for GDP and trade
+            if 'USD' in name or 'EUR' in name or 'GBP' in name or 'DXY' in name:
+                return 'd', 30
+            elif 'GDP' in name:
+                return 'q', 8   # 8 quarters (2 years)
+            return 'm', 12
+
+        results = fetch_fred_recent_series(international_indicators, plan)
         
         return JsonResponse({'international_data': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -524,38 +591,13 @@ def fred_national_accounts_api(request):
             'Net_Exports': 'NETEXP',                      # Net Exports of Goods and Services
         }
         
-        results = {}
-        for name, series_id in national_indicators.items():
-            try:
-                # Most national account data is quarterly or monthly
-                if 'Debt' in name or 'Deficit' in name:
-                    frequency = 'a'  # annual
-                    recent_count = 10
-                else:
-                    frequency = 'q'  # quarterly
-                    recent_count = 12  # 3 years
-                
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Most national account data is quarterly or monthly
+            if 'Debt' in name or 'Deficit' in name:
+                return 'a', 10  # annual
+            return 'q', 12      # quarterly, 3 years
+
+        results = fetch_fred_recent_series(national_indicators, plan)
         
         return JsonResponse({'national_accounts': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -578,34 +620,11 @@ def fred_academic_research_api(request):
             'Market_Volatility': 'VIXCLS',                # VIX (duplicate for completeness)
         }
         
-        results = {}
-        for name, series_id in academic_indicators.items():
-            try:
-                # Most research indicators are daily or monthly
-                frequency = 'd'
-                recent_count = 60  # 60 days for research purposes
-                
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Most research indicators are daily or monthly
+            return 'd', 60  # 60 days for research purposes
+
+        results = fetch_fred_recent_series(academic_indicators, plan)
         
         return JsonResponse({'academic_research': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -630,34 +649,11 @@ def fred_housing_real_estate_api(request):
             'Home_Ownership_Vacancy': 'RHVRUSQ156N',     # Homeowner Vacancy Rate
         }
         
-        results = {}
-        for name, series_id in housing_indicators.items():
-            try:
-                # Most housing data is monthly
-                frequency = 'm'
-                recent_count = 24  # 2 years of data
-                
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Most housing data is monthly
+            return 'm', 24  # 2 years of data
+
+        results = fetch_fred_recent_series(housing_indicators, plan)
         
         return JsonResponse({'housing_real_estate': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -682,33 +678,11 @@ def fred_manufacturing_industrial_api(request):
             'Shipments': 'AMTMTS',                       # Manufacturers Total Shipments
         }
         
-        results = {}
-        for name, series_id in manufacturing_indicators.items():
-            try:
-                frequency = 'm'  # Most manufacturing data is monthly
-                recent_count = 24  # 2 years of data
-                
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            # Most manufacturing data is monthly
+            return 'm', 24  # 2 years of data
+
+        results = fetch_fred_recent_series(manufacturing_indicators, plan)
         
         return JsonResponse({'manufacturing_industrial': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -729,32 +703,10 @@ def fred_healthcare_indexes_api(request):
             'Health_Spending_GDP': 'HLTHSCPCHP',         # Health Spending as % of GDP
         }
         
-        results = {}
-        for name, series_id in healthcare_indicators.items():
-            try:
-                frequency = 'm'
-                recent_count = 24
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            return 'm', 24
+
+        results = fetch_fred_recent_series(healthcare_indicators, plan)
         
         return JsonResponse({'healthcare_indexes': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -775,40 +727,14 @@ def fred_education_productivity_api(request):
             'Patents_Granted': 'USPATGRT',               # US Patents Granted
         }
         
-        results = {}
-        for name, series_id in education_indicators.items():
-            try:
-                if 'Patents' in name:
-                    frequency = 'a'
-                    recent_count = 10
-                elif 'Productivity' in name:
-                    frequency = 'q'
-                    recent_count = 20
-                else:
-                    frequency = 'm'
-                    recent_count = 24
-                    
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            if 'Patents' in name:
+                return 'a', 10
+            elif 'Productivity' in name:
+                return 'q', 20
+            return 'm', 24
+
+        results = fetch_fred_recent_series(education_indicators, plan)
         
         return JsonResponse({'education_productivity': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -832,32 +758,10 @@ def fred_trade_transportation_api(request):
             'Exports_Goods': 'EXPGS',                    # Exports of Goods
         }
         
-        results = {}
-        for name, series_id in trade_indicators.items():
-            try:
-                frequency = 'm'
-                recent_count = 24
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            return 'm', 24
+
+        results = fetch_fred_recent_series(trade_indicators, plan)
         
         return JsonResponse({'trade_transportation': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -880,40 +784,14 @@ def fred_income_demographics_api(request):
             'Living_Wage': 'LIVINGWAGE',                 # Living Wage Estimate
         }
         
-        results = {}
-        for name, series_id in income_indicators.items():
-            try:
-                if 'Income' in name or 'Poverty' in name:
-                    frequency = 'a'
-                    recent_count = 15
-                elif 'Population' in name:
-                    frequency = 'm'
-                    recent_count = 60
-                else:
-                    frequency = 'm'
-                    recent_count = 24
-                    
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            if 'Income' in name or 'Poverty' in name:
+                return 'a', 15
+            elif 'Population' in name:
+                return 'm', 60
+            return 'm', 24
+
+        results = fetch_fred_recent_series(income_indicators, plan)
         
         return JsonResponse({'income_demographics': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -934,32 +812,11 @@ def fred_cryptocurrency_fintech_api(request):
             'Blockchain_Adoption': 'BLOCKCHAIN',         # Blockchain Adoption Index
         }
         
-        results = {}
-        for name, series_id in crypto_indicators.items():
-            try:
-                frequency = 'd' if 'Price' in name else 'm'
-                recent_count = 30 if frequency == 'd' else 24
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            frequency = 'd' if 'Price' in name else 'm'
+            return frequency, 30 if frequency == 'd' else 24
+
+        results = fetch_fred_recent_series(crypto_indicators, plan)
         
         return JsonResponse({'cryptocurrency_fintech': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -982,40 +839,14 @@ def fred_historical_academic_api(request):
             'Financial_Stress_Index': 'STLFSI4',         # St. Louis Fed Financial Stress
         }
         
-        results = {}
-        for name, series_id in academic_indicators.items():
-            try:
-                if 'Weekly' in name:
-                    frequency = 'w'
-                    recent_count = 52
-                elif 'Daily' in name or 'Policy' in name:
-                    frequency = 'd'
-                    recent_count = 90
-                else:
-                    frequency = 'm'
-                    recent_count = 60
-                    
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            if 'Weekly' in name:
+                return 'w', 52
+            elif 'Daily' in name or 'Policy' in name:
+                return 'd', 90
+            return 'm', 60
+
+        results = fetch_fred_recent_series(academic_indicators, plan)
         
         return JsonResponse({'historical_academic': results})
     return JsonResponse({'error': 'POST required'}, status=400)
@@ -1038,40 +869,14 @@ def fred_sector_specific_api(request):
             'Digital_Economy': 'DIGITALECO',             # Digital Economy Indicators
         }
         
-        results = {}
-        for name, series_id in sector_indicators.items():
-            try:
-                if 'Production' in name:
-                    frequency = 'm'
-                    recent_count = 24
-                elif 'Investment' in name or 'Profits' in name:
-                    frequency = 'q'
-                    recent_count = 20
-                else:
-                    frequency = 'm'
-                    recent_count = 24
-                    
-                data = fetch_fred_data(series_id, frequency)
-                
-                if data and len(data) > 0:
-                    latest = data[-1]
-                    results[name] = {
-                        'series_id': series_id,
-                        'latest_value': latest.get('value', 'N/A'),
-                        'latest_date': latest.get('date', 'N/A'),
-                        'recent_data': data[-recent_count:],
-                        'frequency': frequency
-                    }
-                else:
-                    results[name] = {
-                        'series_id': series_id,
-                        'error': 'No data available'
-                    }
-            except Exception as e:
-                results[name] = {
-                    'series_id': series_id,
-                    'error': str(e)
-                }
+        def plan(name):
+            if 'Production' in name:
+                return 'm', 24
+            elif 'Investment' in name or 'Profits' in name:
+                return 'q', 20
+            return 'm', 24
+
+        results = fetch_fred_recent_series(sector_indicators, plan)
         
         return JsonResponse({'sector_specific': results})
     return JsonResponse({'error': 'POST required'}, status=400)
\ No newline at end of file
@@ -6,9 +6,32 @@ from .fmp_service import fmp_service
 import requests
 import pandas as pd
 import numpy as np
+from django.core.cache import cache
 from django.http import JsonResponse
 import json
 
+# built-in
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Precomputed correlation matrix for the NYSE universe
+CORRELATION_PERIOD = '6mo'
+CORRELATION_MIN_COVERAGE = 0.9       # share of trading days a ticker needs to be included in the matrix
+CORRELATION_MIN_OBSERVATIONS = 30    # aligned daily returns needed for a correlation
+CORRELATION_MAX_WORKERS = 8          # concurrent history fetches while building
+CORRELATION_CACHE_KEY = 'nyse:correlation_matrix'
+CORRELATION_CACHE_TIMEOUT = 3 * 24 * 3600
+CORRELATION_RELOAD_INTERVAL = 60     # seconds between checks for a matrix built by another worker
+CORRELATION_MAX_AGE = 24 * 3600      # matrices older than this are rebuilt in the background
+CORRELATION_REFRESH_LOCK_KEY = 'nyse:correlation_matrix:refresh'
+CORRELATION_REFRESH_LOCK_TIMEOUT = 15 * 60
+CORRELATION_TOP_K_MAX = 50
+
 # NYSE Stock Data - Comprehensive list of major NYSE stocks with their industries/sectors
 NYSE_STOCKS = {
     # Technology (50+ stocks)
@@ -375,6 +398,237 @@ NYSE_STOCKS = {
     'PRU': {'name': 'Prudential Financial Inc.', 'sector': 'Financial', 'industry': 'Insurance'},
 }
 
+class CorrelationMatrix:
+    """
+    Pearson correlation matrix of aligned daily returns
+
+    Built with a single np.corrcoef over a (days x tickers) returns matrix,
+    so any pair is a position lookup and a row gives a ticker's correlation
+    with the whole universe.
+    """
+
+    def __init__(self, tickers: List[str], matrix: np.ndarray, last_prices: Dict[str, float],
+                 data_points: int, as_of: str, built_at: float):
+        self.tickers = list(tickers)
+        self.positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.matrix = matrix
+        self.last_prices = last_prices
+        self.data_points = data_points
+        self.as_of = as_of
+        self.built_at = built_at
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.positions
+
+    def pair(self, ticker1: str, ticker2: str) -> Optional[float]:
+        """Correlation of two tickers, or None if either isn't in the matrix"""
+        i, j = self.positions.get(ticker1), self.positions.get(ticker2)
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+    def top(self, ticker: str, k: int, least: bool = False) -> List[Tuple[str, float]]:
+        """The k tickers most (or least) correlated with ticker, strongest first"""
+        row = self.matrix[self.positions[ticker]].astype(float)
+        row[self.positions[ticker]] = np.inf if least else -np.inf  # exclude the ticker itself
+        k = min(k, len(row) - 1)
+        if k <= 0:
+            return []
+        scores = row if least else -row
+        candidates = np.argpartition(scores, k - 1)[:k]
+        ordered = candidates[np.argsort(scores[candidates])]
+        return [(self.tickers[i], float(row[i])) for i in ordered]
+
+    def to_dict(self) -> dict:
+        return {
+            'tickers': self.tickers,
+            'matrix': self.matrix,
+            'last_prices': self.last_prices,
+            'data_points': self.data_points,
+            'as_of': self.as_of,
+            'built_at': self.built_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CorrelationMatrix':
+        return cls(**data)
+
+
+def build_correlation_matrix(closes: pd.DataFrame) -> CorrelationMatrix:
+    """
+    Build the correlation matrix from a (dates x tickers) frame of closing prices
+
+    Tickers missing too many trading days are left out, and the remaining
+    returns are aligned on the days every ticker traded. Raises ValueError if
+    fewer than two tickers or too few days are left.
+    """
+    closes = closes.sort_index()
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    returns = returns.loc[:, returns.notna().mean() >= CORRELATION_MIN_COVERAGE].dropna()
+    returns = returns.loc[:, returns.std() > 0]
+
+    if returns.shape[1] < 2 or len(returns) < CORRELATION_MIN_OBSERVATIONS:
+        raise ValueError('Insufficient overlapping data for correlation matrix')
+
+    matrix = np.corrcoef(returns.to_numpy(dtype=float), rowvar=False).astype(np.float32)
+    last_prices = closes[returns.columns].ffill().iloc[-1]
+    return CorrelationMatrix(
+        tickers=list(returns.columns),
+        matrix=matrix,
+        last_prices={ticker: float(price) for ticker, price in last_prices.items()},
+        data_points=len(returns),
+        as_of=pd.Timestamp(returns.index[-1]).strftime('%Y-%m-%d'),
+        built_at=time.time(),
+    )
+
+
+class NYSECorrelationService:
+    """
+    Keeps the NYSE correlation matrix built and shared between workers
+
+    refresh() pulls every ticker's history through the FMP price history
+    cache (so after the first build only new daily bars are fetched),
+    rebuilds the matrix and publishes it to the shared cache. Other workers
+    pick the published matrix up on their next lookup. A matrix older than
+    CORRELATION_MAX_AGE is still served while one worker rebuilds it.
+    """
+
+    def __init__(self, tickers: Optional[List[str]] = None):
+        self.tickers = tickers or list(NYSE_STOCKS)
+        self._matrix = None
+        self._checked_at = 0.0
+        self._refresh_thread = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[CorrelationMatrix]:
+        """The latest matrix, or None if none has been built yet; starts a rebuild when it is too old"""
+        now = time.monotonic()
+        if now - self._checked_at >= CORRELATION_RELOAD_INTERVAL or self._matrix is None:
+            self._checked_at = now
+            try:
+                shared = cache.get(CORRELATION_CACHE_KEY)
+            except Exception:
+                shared = None
+            if shared is not None and (self._matrix is None or shared['built_at'] > self._matrix.built_at):
+                self._matrix = CorrelationMatrix.from_dict(shared)
+            if self._matrix is not None and time.time() - self._matrix.built_at >= CORRELATION_MAX_AGE:
+                self.refresh_in_background()
+        return self._matrix
+
+    def _fetch_closes(self) -> pd.DataFrame:
+        def fetch(ticker):
+            try:
+                df = fmp_service.get_historical_price_data(ticker, period=CORRELATION_PERIOD)
+                return ticker, df['close'] if not df.empty else None
+            except Exception as e:
+                logger.warning("Skipping %s in correlation matrix: %s", ticker, e)
+                return ticker, None
+
+        with ThreadPoolExecutor(max_workers=CORRELATION_MAX_WORKERS) as executor:
+            closes = {ticker: series for ticker, series in executor.map(fetch, self.tickers) if series is not None}
+        return pd.DataFrame(closes)
+
+    def refresh(self) -> CorrelationMatrix:
+        """Rebuild the matrix from current histories and publish it"""
+        matrix = build_correlation_matrix(self._fetch_closes())
+        self._matrix = matrix
+        try:
+            cache.set(CORRELATION_CACHE_KEY, matrix.to_dict(), CORRELATION_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning("Could not publish correlation matrix: %s", e)
+        return matrix
+
+    def refresh_in_background(self):
+        """Start a refresh in a daemon thread unless one is already running in any worker"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            try:
+                if not cache.add(CORRELATION_REFRESH_LOCK_KEY, 1, CORRELATION_REFRESH_LOCK_TIMEOUT):
+                    return
+            except Exception:
+                pass
+
+            def run():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Correlation matrix refresh failed: %s", e)
+                finally:
+                    try:
+                        cache.delete(CORRELATION_REFRESH_LOCK_KEY)
+                    except Exception:
+                        pass
+
+            self._refresh_thread = threading.Thread(target=run, name='nyse-correlation-refresh', daemon=True)
+            self._refresh_thread.start()
+
+
+# Global NYSE correlation service
+nyse_correlation_service = NYSECorrelationService()
+
+
+def describe_correlation(correlation: float) -> Tuple[str, str]:
+    """Strength and direction labels for a correlation value"""
+    if abs(correlation) >= 0.7:
+        strength = "Strong"
+    elif abs(correlation) >= 0.4:
+        strength = "Moderate"
+    elif abs(correlation) >= 0.2:
+        strength = "Weak"
+    else:
+        strength = "Very Weak"
+    
+    if correlation > 0:
+        direction = "Positive"
+    elif correlation < 0:
+        direction = "Negative"
+    else:
+        direction = "No Correlation"
+    return strength, direction
+
+
+def correlation_from_matrix(matrix: CorrelationMatrix, ticker1: str, ticker2: str) -> Optional[dict]:
+    """Pair correlation response from the precomputed matrix, or None if a ticker isn't in it"""
+    correlation = matrix.pair(ticker1, ticker2)
+    if correlation is None:
+        return None
+    
+    stock1_info = NYSE_STOCKS.get(ticker1, {})
+    stock2_info = NYSE_STOCKS.get(ticker2, {})
+    strength, direction = describe_correlation(correlation)
+    
+    return {
+        'ticker1': {
+            'symbol': ticker1,
+            'name': stock1_info.get('name', 'Unknown'),
+            'sector': stock1_info.get('sector', 'Unknown'),
+            'industry': stock1_info.get('industry', 'Unknown'),
+            'current_price': round(matrix.last_prices[ticker1], 2)
+        },
+        'ticker2': {
+            'symbol': ticker2,
+            'name': stock2_info.get('name', 'Unknown'),
+            'sector': stock2_info.get('sector', 'Unknown'),
+            'industry': stock2_info.get('industry', 'Unknown'),
+            'current_price': round(matrix.last_prices[ticker2], 2)
+        },
+        'correlation': {
+            'value': round(correlation, 4),
+            'strength': strength,
+            'direction': direction,
+            'data_points': matrix.data_points,
+            'period': '6 months',
+            'as_of': matrix.as_of
+        },
+        'analysis': {
+            'same_sector': stock1_info.get('sector') == stock2_info.get('sector'),
+            'sector_correlation': stock1_info.get('sector') == stock2_info.get('sector'),
+            'industry_correlation': stock1_info.get('industry') == stock2_info.get('industry')
+        }
+    }
+
+
 def get_nyse_stocks_api(request):
     """Get list of NYSE stocks with their industries and sectors"""
     if request.method == 'GET':
@@ -439,8 +693,13 @@ def get_stock_correlation_api(request):
                     'error': f'Ticker {ticker2} not found in NYSE stocks list'
                 }, status=400)
             
-            # Calculate correlation
-            correlation_data = calculate_stock_correlation(ticker1, ticker2)
+            # Answer from the precomputed matrix; compute the pair directly until it's built
+            matrix = nyse_correlation_service.current()
+            correlation_data = correlation_from_matrix(matrix, ticker1, ticker2) if matrix else None
+            if correlation_data is None:
+                if matrix is None:
+                    nyse_correlation_service.refresh_in_background()
+                correlation_data = calculate_stock_correlation(ticker1, ticker2)
             
             return JsonResponse(correlation_data)
             
@@ -451,6 +710,63 @@ def get_stock_correlation_api(request):
     
     return JsonResponse({'error': 'POST method required'}, status=405)
 
+def get_top_correlations_api(request):
+    """Get the stocks most and least correlated with a ticker from the precomputed matrix"""
+    if request.method == 'GET':
+        ticker = request.GET.get('ticker', '').strip().upper()
+        if not ticker:
+            return JsonResponse({'error': 'ticker is required'}, status=400)
+        
+        if ticker not in NYSE_STOCKS:
+            return JsonResponse({
+                'error': f'Ticker {ticker} not found in NYSE stocks list'
+            }, status=400)
+        
+        try:
+            k = int(request.GET.get('k', 10))
+        except ValueError:
+            return JsonResponse({'error': 'k must be an integer'}, status=400)
+        k = max(1, min(k, CORRELATION_TOP_K_MAX))
+        
+        try:
+            matrix = nyse_correlation_service.current()
+            if matrix is None:
+                nyse_correlation_service.refresh_in_background()
+                return JsonResponse({
+                    'error': 'Correlation matrix is being built, try again shortly'
+                }, status=503)
+            
+            if ticker not in matrix:
+                return JsonResponse({
+                    'error': f'Insufficient data for {ticker} in the correlation matrix'
+                }, status=404)
+            
+            def describe(pairs):
+                return [{
+                    'symbol': symbol,
+                    'name': NYSE_STOCKS.get(symbol, {}).get('name', 'Unknown'),
+                    'sector': NYSE_STOCKS.get(symbol, {}).get('sector', 'Unknown'),
+                    'correlation': round(value, 4),
+                    'strength': describe_correlation(value)[0]
+                } for symbol, value in pairs]
+            
+            return JsonResponse({
+                'ticker': ticker,
+                'most_correlated': describe(matrix.top(ticker, k)),
+                'least_correlated': describe(matrix.top(ticker, k, least=True)),
+                'universe_size': len(matrix.tickers),
+                'data_points': matrix.data_points,
+                'period': '6 months',
+                'as_of': matrix.as_of
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'error': f'Failed to fetch correlations: {str(e)}'
+            }, status=500)
+    
+    return JsonResponse({'error': 'GET method required'}, status=405)
+
 def calculate_stock_correlation(ticker1: str, ticker2: str) -> dict:
     """Calculate correlation between two stocks using 6 months of price data from FMP"""
     try:
@@ -505,23 +821,8 @@ def calculate_stock_correlation(ticker1: str, ticker2: str) -> dict:
         stock2_sector = stock2_profile.get('sector', stock2_info.get('sector', 'Unknown'))
         stock2_industry = stock2_profile.get('industry', stock2_info.get('industry', 'Unknown'))
         
-        # Determine correlation strength
-        if abs(correlation) >= 0.7:
-            strength = "Strong"
-        elif abs(correlation) >= 0.4:
-            strength = "Moderate"
-        elif abs(correlation) >= 0.2:
-            strength = "Weak"
-        else:
-            strength = "Very Weak"
-        
-        # Determine correlation direction
-        if correlation > 0:
-            direction = "Positive"
-        elif correlation < 0:
-            direction = "Negative"
-        else:
-            direction = "No Correlation"
+        # Determine correlation strength and direction
+        strength, direction = describe_correlation(correlation)
         
         return {
             'ticker1': {
@@ -0,0 +1,60 @@
+# internal
+
+# external
+import numpy as np
+import pandas as pd
+
+# built-in
+from typing import Dict, List, Optional, Sequence
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+DEFAULT_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def serialize_ohlcv(df: pd.DataFrame, date_format: str = '%Y-%m-%d', decimals: int = 2,
+                    positive_prices: bool = False, volume_filter: Optional[str] = None,
+                    fields: Sequence[str] = DEFAULT_FIELDS) -> List[Dict]:
+    """
+    Convert a date-indexed OHLCV frame into JSON-ready rows in one vectorized pass
+
+    Column names are matched case-insensitively, so both yfinance ('Open', ...)
+    and FMP ('open', ...) frames work.
+
+    Args:
+        df: DataFrame indexed by date with open/high/low/close/volume columns
+        date_format: strftime format for the 'date' key
+        decimals: Decimal places prices are rounded to
+        positive_prices: Drop rows where any price is not strictly positive
+        volume_filter: None to treat missing volume as 0, 'nonnegative' or
+            'positive' to drop rows whose volume is missing or out of range
+        fields: Output keys after 'date', in order
+
+    Returns:
+        List of dicts with 'date' followed by `fields`; rows with a missing
+        price are always dropped
+    """
+    if df is None or df.empty:
+        return []
+
+    frame = df.rename(columns=str.lower)
+    prices = frame[list(PRICE_FIELDS)].to_numpy(dtype=float)
+    volume = frame['volume'].to_numpy(dtype=float)
+
+    valid = ~np.isnan(prices).any(axis=1)
+    if positive_prices:
+        valid &= (prices > 0).all(axis=1)
+    if volume_filter == 'positive':
+        valid &= volume > 0
+    elif volume_filter == 'nonnegative':
+        valid &= volume >= 0
+
+    if not valid.any():
+        return []
+
+    dates = pd.DatetimeIndex(frame.index[valid]).strftime(date_format).tolist()
+    rounded = np.round(prices[valid], decimals)
+    columns = {field: rounded[:, i].tolist() for i, field in enumerate(PRICE_FIELDS)}
+    columns['volume'] = np.nan_to_num(volume[valid], nan=0.0).astype(np.int64).tolist()
+
+    keys = ('date',) + tuple(fields)
+    return [dict(zip(keys, values)) for values in zip(dates, *(columns[field] for field in fields))]
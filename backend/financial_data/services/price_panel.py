@@ -0,0 +1,80 @@
+# internal
+from financial_data.services.yfinance_service import get_yf_history
+
+# external
+import pandas as pd
+from django.core.cache import cache
+from django.utils import timezone
+
+# built-in
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+PANEL_MAX_WORKERS = 8              # concurrent history downloads per panel
+PANEL_CACHE_TIMEOUT = 24 * 3600    # panels are also keyed by date, so they turn over daily
+PANEL_PARTIAL_CACHE_TIMEOUT = 5 * 60  # panels missing a ticker are retried sooner
+
+
+def build_price_panel(tickers: Iterable[str], period: str = "6mo", interval: str = "1d",
+                      max_workers: int = PANEL_MAX_WORKERS) -> pd.DataFrame:
+    """
+    Download closing prices for many tickers in parallel
+
+    Returns:
+        DataFrame of closes indexed by date with one column per ticker;
+        tickers whose download failed or came back empty are left out
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return pd.DataFrame()
+
+    def fetch(ticker):
+        try:
+            df = get_yf_history(ticker, period=period, interval=interval)
+            return ticker, df['Close'] if df is not None and not df.empty else None
+        except Exception as e:
+            logger.warning("Skipping %s in price panel: %s", ticker, e)
+            return ticker, None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+        closes = {ticker: series for ticker, series in executor.map(fetch, tickers) if series is not None}
+    return pd.DataFrame(closes).sort_index()
+
+
+def get_returns_panel(tickers: Iterable[str], period: str = "6mo", interval: str = "1d") -> pd.DataFrame:
+    """
+    Daily returns for many tickers, aligned by date and cached for the day
+
+    Each column is the ticker's percentage change between consecutive bars;
+    days a ticker didn't trade are NaN. The panel is shared between workers
+    through the cache and rebuilt on the first request of each day. A panel
+    missing tickers whose download failed is only kept for
+    PANEL_PARTIAL_CACHE_TIMEOUT, so one failed download doesn't drop a
+    ticker for the rest of the day.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    digest = hashlib.sha1(','.join(sorted(tickers)).encode('utf-8')).hexdigest()
+    key = f'price_panel:returns:{timezone.localdate()}:{period}:{interval}:{digest}'
+
+    try:
+        panel = cache.get(key)
+    except Exception:
+        panel = None
+    if panel is not None:
+        return panel
+
+    closes = build_price_panel(tickers, period=period, interval=interval)
+    # Returns are taken over each ticker's own consecutive bars, then aligned
+    panel = pd.DataFrame({ticker: closes[ticker].dropna().pct_change().iloc[1:] for ticker in closes.columns})
+
+    if not panel.empty:
+        complete = set(closes.columns) == set(tickers)
+        try:
+            cache.set(key, panel, PANEL_CACHE_TIMEOUT if complete else PANEL_PARTIAL_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning("Could not cache returns panel: %s", e)
+    return panel
@@ -0,0 +1,138 @@
+# internal
+
+# external
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# built-in
+from typing import Tuple
+from urllib.parse import urlsplit
+import threading
+import time
+
+# Defaults shared by every market-data provider
+DEFAULT_TIMEOUT = (5, 20)        # (connect, read) seconds
+DEFAULT_POOL_MAXSIZE = 20        # keep-alive connections per host, shared by all threads
+DEFAULT_RETRIES = 2              # retries for idempotent requests on connection errors / 429 / 5xx
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HostStats:
+    """Latency and pool usage counters for one upstream host"""
+
+    def __init__(self, pool_maxsize: int):
+        self.pool_maxsize = pool_maxsize
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated = 0  # requests issued while every pooled connection was busy
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else None,
+            'max_latency_ms': round(self.max_latency * 1000, 1),
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'pool_maxsize': self.pool_maxsize,
+            'saturated': self.saturated,
+        }
+
+
+class ProviderClient:
+    """
+    Pooled HTTP client shared by all market-data providers
+
+    Keeps one keep-alive requests.Session per host so TCP/TLS connections are
+    reused across calls and gunicorn threads, applies a default timeout to every
+    request, retries idempotent requests on transient failures, and records
+    per-host latency and pool-saturation counters.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 retries: int = DEFAULT_RETRIES):
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self._hosts = {}  # host -> (session, stats), published together
+        self._lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=0.3,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _host(self, url: str) -> Tuple[requests.Session, HostStats]:
+        """Session and counters for the host of a URL, created together on first use"""
+        host = urlsplit(url).netloc
+        entry = self._hosts.get(host)
+        if entry is None:
+            with self._lock:
+                entry = self._hosts.get(host)
+                if entry is None:
+                    entry = (self._build_session(), HostStats(self.pool_maxsize))
+                    self._hosts[host] = entry
+        return entry
+
+    def session_for(self, url: str) -> requests.Session:
+        """Get the shared session for the host of a URL, creating it on first use"""
+        return self._host(url)[0]
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        """Send a request through the host's pooled session; raises requests exceptions like requests.request"""
+        session, stats = self._host(url)
+
+        with self._lock:
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            if stats.in_flight > stats.pool_maxsize:
+                stats.saturated += 1
+
+        started = time.monotonic()
+        failed = True
+        try:
+            response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                stats.in_flight -= 1
+                stats.requests += 1
+                stats.total_latency += elapsed
+                stats.max_latency = max(stats.max_latency, elapsed)
+                if failed:
+                    stats.errors += 1
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        return self.request('GET', url, params=params, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs) -> requests.Response:
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+    def stats(self) -> dict:
+        """Snapshot of per-host counters"""
+        with self._lock:
+            return {host: stats.as_dict() for host, (_, stats) in self._hosts.items()}
+
+
+# Global provider client instance
+provider_client = ProviderClient()
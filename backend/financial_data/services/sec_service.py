@@ -1,27 +1,281 @@
 # internal
+from financial_data.responses import json_bytes
+from financial_data.services.provider_client import provider_client
 
 # external
-import pandas as pd
-import requests
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
 import json
 
 # built-in
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+import logging
 import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Optional incremental JSON parser for large SEC payloads
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+    logging.warning("ijson not available, SEC company facts will be parsed in one piece. Install with: pip install ijson")
+
+SEC_HEADERS = {'User-Agent': 'Financial Data API (contact@example.com)'}
+SEC_COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+CIK_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "cik.csv"
+)
+CIK_RELOAD_CHECK_INTERVAL = 5  # seconds between checks of the CIK file's modification time
+
+# SEC fair-access limit, shared by every worker through the cache
+SEC_RATE_LIMIT = 10             # requests per second
+SEC_RATE_LIMIT_MAX_WAIT = 5     # seconds a request may wait for budget before giving up
+
+# Submissions (filing index) cache
+SUBMISSIONS_FRESH_FOR = 10 * 60          # seconds before a cached index is revalidated
+SUBMISSIONS_CACHE_TIMEOUT = 7 * 24 * 3600
+SUBMISSIONS_FIELDS = ('accessionNumber', 'filingDate', 'reportDate', 'form', 'primaryDocument', 'primaryDocDescription')
+
+# Parsed company facts kept per CIK
+COMPANY_FACTS_CACHE_SIZE = 16
+COMPANY_FACTS_CACHE_TTL = 6 * 3600
+# Keys of a single XBRL fact, in the order SEC returns them
+FACT_FIELDS = ('start', 'end', 'val', 'accn', 'fy', 'fp', 'form', 'filed', 'frame')
+
+
+class SECRequestError(Exception):
+    """SEC request that failed or could not be made; carries the HTTP status to return"""
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SECRateLimiter:
+    """
+    Token bucket for SEC requests shared by all workers
+
+    Every wall-clock second gets `rate` tokens, counted with an atomic
+    increment in the shared cache, so gunicorn workers and processes on the
+    same cache draw from one budget. Callers wait for the next second when
+    the current one is spent, up to `max_wait`. If the cache is unavailable,
+    a per-process count is used instead.
+    """
+
+    def __init__(self, rate: int = SEC_RATE_LIMIT, max_wait: float = SEC_RATE_LIMIT_MAX_WAIT):
+        self.rate = rate
+        self.max_wait = max_wait
+        self._local_window = None
+        self._local_count = 0
+        self._lock = threading.Lock()
+
+    def _take(self, window: int) -> int:
+        key = f'sec:ratelimit:{window}'
+        try:
+            cache.add(key, 0, 5)
+            return cache.incr(key)
+        except Exception:
+            with self._lock:
+                if self._local_window != window:
+                    self._local_window = window
+                    self._local_count = 0
+                self._local_count += 1
+                return self._local_count
+
+    def acquire(self):
+        """Block until a request may be sent; raises SECRequestError after max_wait"""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            now = time.time()
+            window = int(now)
+            if self._take(window) <= self.rate:
+                return
+            wait = window + 1 - now
+            if time.monotonic() + wait > deadline:
+                raise SECRequestError('SEC rate limit reached, try again shortly', status_code=503)
+            time.sleep(wait)
+
+
+# Global SEC rate limiter
+sec_rate_limiter = SECRateLimiter()
+
+
+def sec_get(url: str, headers: Optional[dict] = None, **kwargs):
+    """GET an SEC URL through the shared rate limiter and pooled client"""
+    sec_rate_limiter.acquire()
+    return provider_client.get(url, headers={**SEC_HEADERS, **(headers or {})}, **kwargs)
+
+
+def get_recent_filings(cik: str) -> Dict[str, list]:
+    """
+    Get the `filings.recent` columns of a company's submissions index
+
+    Indexes are cached per CIK in the shared cache. Once an entry is older
+    than SUBMISSIONS_FRESH_FOR it is revalidated with a conditional GET, so an
+    unchanged index costs SEC a 304 instead of a full download. If SEC fails
+    and a cached copy exists, the cached copy is returned.
+
+    Raises:
+        SECRequestError: SEC failed and nothing is cached
+    """
+    key = f'sec:submissions:{cik}'
+    try:
+        entry = cache.get(key)
+    except Exception:
+        entry = None
+
+    if entry is not None and time.time() - entry['checked_at'] < SUBMISSIONS_FRESH_FOR:
+        return entry['recent']
+
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        response = sec_get(f"https://data.sec.gov/submissions/CIK{cik}.json", headers=headers)
+    except Exception as e:
+        if entry is not None:
+            logger.warning("Serving cached SEC submissions for %s: %s", cik, e)
+            return entry['recent']
+        if isinstance(e, SECRequestError):
+            raise
+        raise SECRequestError(f'SEC API error: {str(e)}')
+
+    if response.status_code == 304 and entry is not None:
+        entry = {**entry, 'checked_at': time.time()}
+    elif response.status_code == 200:
+        recent = response.json().get('filings', {}).get('recent', {})
+        entry = {
+            'recent': {field: recent.get(field, []) for field in SUBMISSIONS_FIELDS},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        }
+    elif entry is not None:
+        logger.warning("Serving cached SEC submissions for %s after status %s", cik, response.status_code)
+        return entry['recent']
+    else:
+        raise SECRequestError(f'SEC API error: {response.status_code}', status_code=response.status_code)
+
+    try:
+        cache.set(key, entry, SUBMISSIONS_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning("Could not cache SEC submissions for %s: %s", cik, e)
+    return entry['recent']
+
+
+class CIKIndex:
+    """
+    In-memory ticker -> CIK index backed by the tab-separated data/cik.csv
+
+    The file is parsed once into a dict of lowercase tickers to zero-padded
+    10-digit CIKs on first use. Lookups are plain dict reads; at most every
+    few seconds the file's modification time is checked and the index is
+    rebuilt and swapped in if the file changed.
+    """
+
+    def __init__(self, path: str = CIK_FILE_PATH, check_interval: float = CIK_RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._index = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, mtime: float):
+        index = {}
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                ticker, _, cik = line.strip().partition('\t')
+                if ticker and cik.isdigit():
+                    # Keep the first entry for duplicated tickers
+                    index.setdefault(ticker.lower(), cik.zfill(10))
+        self._index = index
+        self._mtime = mtime
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.check_interval:
+                return
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                self._load(mtime)
+            self._checked_at = now
+
+    def lookup(self, ticker: str) -> Optional[str]:
+        """Get the 10-digit CIK for a ticker, or None if it isn't listed"""
+        self._ensure_fresh()
+        return self._index.get(ticker.strip().lower())
+
+    def __len__(self) -> int:
+        self._ensure_fresh()
+        return len(self._index)
+
+    def write(self, mapping: Dict[str, int]):
+        """Atomically replace the CIK file with a ticker -> CIK mapping and reload it"""
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for ticker, cik in mapping.items():
+                    f.write(f"{ticker.lower()}\t{int(cik)}\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._load(os.stat(self.path).st_mtime)
+            self._checked_at = time.monotonic()
+
+
+# Global CIK index, loaded on first lookup
+cik_index = CIKIndex()
+
+
+def refresh_cik_index(index: CIKIndex = cik_index) -> int:
+    """
+    Rebuild the CIK file from SEC's company_tickers.json
+
+    Returns:
+        Number of tickers written
+    """
+    response = sec_get(SEC_COMPANY_TICKERS_URL)
+    response.raise_for_status()
+
+    mapping = {}
+    for entry in response.json().values():
+        ticker = str(entry.get('ticker', '')).strip()
+        cik = entry.get('cik_str')
+        if ticker and cik is not None:
+            mapping.setdefault(ticker.lower(), int(cik))
+
+    if not mapping:
+        raise ValueError('SEC company_tickers.json contained no tickers')
+
+    index.write(mapping)
+    logger.info("Refreshed CIK index with %d tickers", len(mapping))
+    return len(mapping)
+
 
 def get_CIK(ticker: str) -> str:
     """Get CIK (Central Index Key) for a given stock ticker"""
     try:
-        # Use absolute path to ensure we can find the file
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        cik_file_path = os.path.join(base_dir, "data", "cik.csv")
-        
-        cik_data = pd.read_csv(cik_file_path, delimiter='\t', header=None)
-        data = cik_data.set_index(0)
-        
-        ticker_cik = str(int(data.loc[ticker.lower(), 1]))
-        # Pad with zeros to make it 10 digits
-        cik = ticker_cik.zfill(10)
+        cik = cik_index.lookup(ticker)
+        if cik is None:
+            return f"Ticker {ticker} not found"
         return cik
     except Exception as e:
         return str(e)
@@ -40,39 +294,33 @@ def get_sec_filings_api(request):
             if not cik.isdigit():
                 return JsonResponse({'error': f'Invalid ticker: {ticker}'}, status=404)
             
-            sec_api_url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-            headers = {'User-Agent': 'Financial Data API (contact@example.com)'}
+            try:
+                recent_filings = get_recent_filings(cik)
+            except SECRequestError as e:
+                return JsonResponse({'error': str(e)}, status=e.status_code)
             
-            response = requests.get(sec_api_url, headers=headers)
+            # Get only the latest 5 filings with valid data
+            filing_links = []
+            accession_numbers = recent_filings.get('accessionNumber', [])
+            filing_dates = recent_filings.get('filingDate', [])
+            forms = recent_filings.get('form', [])
+            primary_documents = recent_filings.get('primaryDocument', [])
             
-            if response.status_code == 200:
-                data = response.json()
-                recent_filings = data.get('filings', {}).get('recent', {})
-                
-                # Get only the latest 5 filings with valid data
-                filing_links = []
-                accession_numbers = recent_filings.get('accessionNumber', [])
-                filing_dates = recent_filings.get('filingDate', [])
-                forms = recent_filings.get('form', [])
-                primary_documents = recent_filings.get('primaryDocument', [])
-                
-                for i in range(min(5, len(accession_numbers))):
-                    if all([accession_numbers[i], filing_dates[i], forms[i], primary_documents[i]]):
-                        accession_formatted = accession_numbers[i].replace('-', '')
-                        filing_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession_formatted}/{primary_documents[i]}"
-                        
-                        filing_links.append({
-                            'form': forms[i],
-                            'date': filing_dates[i],
-                            'url': filing_url
-                        })
-                
-                return JsonResponse({
-                    'ticker': ticker,
-                    'filings': filing_links
-                })
-            else:
-                return JsonResponse({'error': f'SEC API error: {response.status_code}'}, status=response.status_code)
+            for i in range(min(5, len(accession_numbers))):
+                if all([accession_numbers[i], filing_dates[i], forms[i], primary_documents[i]]):
+                    accession_formatted = accession_numbers[i].replace('-', '')
+                    filing_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession_formatted}/{primary_documents[i]}"
+                    
+                    filing_links.append({
+                        'form': forms[i],
+                        'date': filing_dates[i],
+                        'url': filing_url
+                    })
+            
+            return JsonResponse({
+                'ticker': ticker,
+                'filings': filing_links
+            })
                 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -80,8 +328,225 @@ def get_sec_filings_api(request):
     else:
         return JsonResponse({'error': 'GET required'}, status=405)
 
+class CompanyFactsCache:
+    """
+    In-process LRU of parsed company facts per CIK
+
+    Each unit's facts are stored column by column (one list per fact field,
+    fields that are never present dropped), which is far smaller than SEC's
+    list of per-fact dicts. Entries are dicts with `entity_name`, `facts`
+    ({taxonomy: {concept: {'label', 'description', 'units'}}}) and
+    `fetched_at`.
+    """
+
+    def __init__(self, maxsize: int = COMPANY_FACTS_CACHE_SIZE, ttl: int = COMPANY_FACTS_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cik: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(cik)
+            if entry is None:
+                return None
+            if time.time() - entry['fetched_at'] > self.ttl:
+                del self._entries[cik]
+                return None
+            self._entries.move_to_end(cik)
+            return entry
+
+    def set(self, cik: str, entity_name: Optional[str], facts: dict):
+        with self._lock:
+            self._entries[cik] = {'entity_name': entity_name, 'facts': facts, 'fetched_at': time.time()}
+            self._entries.move_to_end(cik)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global company facts cache
+company_facts_cache = CompanyFactsCache()
+
+
+class CompanyFactsFilter:
+    """Taxonomy / concept / unit / period-end filter for company facts; empty criteria match everything"""
+
+    def __init__(self, taxonomies=None, concepts=None, units=None,
+                 from_date: Optional[str] = None, to_date: Optional[str] = None):
+        self.taxonomies = {t.lower() for t in taxonomies} if taxonomies else None
+        self.concepts = {c.lower() for c in concepts} if concepts else None
+        self.units = {u.lower() for u in units} if units else None
+        self.from_date = from_date
+        self.to_date = to_date
+
+    @classmethod
+    def from_request(cls, request) -> 'CompanyFactsFilter':
+        """Build a filter from comma-separated query parameters; raises ValueError on bad dates"""
+        def csv_param(name):
+            return [v.strip() for v in request.GET.get(name, '').split(',') if v.strip()]
+
+        dates = {}
+        for name in ('from_date', 'to_date'):
+            value = request.GET.get(name, '').strip()
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+                dates[name] = value
+        return cls(csv_param('taxonomy'), csv_param('concept'), csv_param('unit'), **dates)
+
+    def apply(self, taxonomy: str, concept: str, body: dict) -> Optional[dict]:
+        """Render a columnar concept as SEC-shaped JSON, or None if nothing in it matches"""
+        if self.taxonomies and taxonomy.lower() not in self.taxonomies:
+            return None
+        if self.concepts and concept.lower() not in self.concepts:
+            return None
+
+        units = {}
+        for unit, columns in body['units'].items():
+            if self.units and unit.lower() not in self.units:
+                continue
+            fields = [field for field in FACT_FIELDS if field in columns]
+            rows = []
+            for i, end in enumerate(columns.get('end') or []):
+                # ISO dates compare correctly as strings
+                if (self.from_date and (end is None or end < self.from_date)) or \
+                        (self.to_date and (end is None or end > self.to_date)):
+                    continue
+                rows.append({field: columns[field][i] for field in fields if columns[field][i] is not None})
+            if rows:
+                units[unit] = rows
+
+        if not units:
+            return None
+        return {'label': body.get('label'), 'description': body.get('description'), 'units': units}
+
+
+def _columnar_concept(body: dict) -> dict:
+    """Convert one concept's per-fact dicts into per-field columns"""
+    units = {}
+    for unit, facts in (body.get('units') or {}).items():
+        columns = {}
+        for field in FACT_FIELDS:
+            column = [fact.get(field) for fact in facts]
+            if any(value is not None for value in column):
+                columns[field] = column
+        units[unit] = columns
+    return {'label': body.get('label'), 'description': body.get('description'), 'units': units}
+
+
+def _iter_company_facts(stream) -> Iterator[tuple]:
+    """
+    Parse a companyfacts document from a file-like object
+
+    Yields ('entity', name) and ('concept', (taxonomy, concept, body)) items.
+    With ijson only one concept is held in memory at a time.
+    """
+    if not IJSON_AVAILABLE:
+        data = json.load(stream)
+        yield 'entity', data.get('entityName')
+        for taxonomy, concepts in (data.get('facts') or {}).items():
+            for concept, body in concepts.items():
+                yield 'concept', (taxonomy, concept, body)
+        return
+
+    events = ijson.parse(stream, use_float=True)
+    for prefix, event, value in events:
+        if prefix == 'entityName' and event == 'string':
+            yield 'entity', value
+        elif event == 'map_key' and prefix.startswith('facts.') and prefix.count('.') == 1:
+            # Build this concept's object from the events up to its closing bracket
+            builder = ijson.ObjectBuilder()
+            depth = 0
+            for _, inner_event, inner_value in events:
+                builder.event(inner_event, inner_value)
+                if inner_event in ('start_map', 'start_array'):
+                    depth += 1
+                elif inner_event in ('end_map', 'end_array'):
+                    depth -= 1
+                if depth == 0:
+                    break
+            yield 'concept', (prefix[len('facts.'):], value, builder.value)
+
+
+def _parse_and_cache_company_facts(cik: str, response) -> Iterator[tuple]:
+    """Stream-parse a companyfacts response, caching the columnar facts once it is fully read"""
+    facts = {}
+    entity_name = None
+    try:
+        response.raw.decode_content = True
+        for kind, payload in _iter_company_facts(response.raw):
+            if kind == 'entity':
+                entity_name = payload
+                yield kind, payload
+                continue
+            taxonomy, concept, body = payload
+            columnar = _columnar_concept(body)
+            facts.setdefault(taxonomy, {})[concept] = columnar
+            yield kind, (taxonomy, concept, columnar)
+        company_facts_cache.set(cik, entity_name, facts)
+    finally:
+        response.close()
+
+
+def _iter_cached_company_facts(entry: dict) -> Iterator[tuple]:
+    yield 'entity', entry['entity_name']
+    for taxonomy, concepts in entry['facts'].items():
+        for concept, body in concepts.items():
+            yield 'concept', (taxonomy, concept, body)
+
+
+def _render_company_facts(ticker: str, cik: str, items: Iterator[tuple],
+                          facts_filter: CompanyFactsFilter) -> Iterator[bytes]:
+    """
+    Yield the company facts response body chunk by chunk
+
+    company_name and status come after facts so nothing has to be buffered;
+    a failure mid-stream closes the JSON with status 'error'.
+    """
+    yield b'{"ticker":' + json_bytes(ticker) + b',"cik":' + json_bytes(cik) + b',"facts":{'
+
+    entity_name = None
+    current_taxonomy = None
+    first_concept = True
+    tail = {'status': 'success'}
+    try:
+        for kind, payload in items:
+            if kind == 'entity':
+                entity_name = payload
+                continue
+            taxonomy, concept, body = payload
+            rendered = facts_filter.apply(taxonomy, concept, body)
+            if rendered is None:
+                continue
+            if taxonomy != current_taxonomy:
+                opener = b'},' if current_taxonomy is not None else b''
+                yield opener + json_bytes(taxonomy) + b':{'
+                current_taxonomy = taxonomy
+                first_concept = True
+            yield (b'' if first_concept else b',') + json_bytes(concept) + b':' + json_bytes(rendered)
+            first_concept = False
+    except Exception as e:
+        logger.warning("Company facts stream for %s failed: %s", ticker, e)
+        tail = {'status': 'error', 'error': f'An error occurred: {str(e)}'}
+
+    if current_taxonomy is not None:
+        yield b'}'
+    tail = {'company_name': entity_name or 'N/A', **tail}
+    yield b'},' + json_bytes(tail)[1:]
+
+
 def get_sec_company_facts_api(request):
-    """Get SEC company facts for a given stock ticker"""
+    """
+    Get SEC company facts for a given stock ticker
+
+    Optional query parameters narrow the response: comma-separated `taxonomy`
+    (e.g. us-gaap,dei), `concept` (e.g. Revenues,EarningsPerShareBasic) and
+    `unit` (e.g. USD,shares), plus `from_date` / `to_date` (YYYY-MM-DD) on each
+    fact's period end. The body is streamed as it is produced.
+    """
     if request.method == 'GET':
         ticker = request.GET.get('ticker', '').upper()
         
@@ -91,6 +556,14 @@ def get_sec_company_facts_api(request):
                 'status': 'error'
             }, status=400)
         
+        try:
+            facts_filter = CompanyFactsFilter.from_request(request)
+        except ValueError:
+            return JsonResponse({
+                'error': 'from_date and to_date must be in YYYY-MM-DD format',
+                'status': 'error'
+            }, status=400)
+        
         try:
             # Get CIK for the ticker
             cik = get_CIK(ticker)
@@ -102,33 +575,32 @@ def get_sec_company_facts_api(request):
                     'status': 'error'
                 }, status=404)
             
-            # SEC Edgar API endpoint for company facts
-            sec_api_url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
-            
-            # SEC requires a User-Agent header
-            headers = {
-                'User-Agent': 'Financial Data API (contact@example.com)'
-            }
-            
-            # Make request to SEC API
-            response = requests.get(sec_api_url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                return JsonResponse({
-                    'ticker': ticker,
-                    'cik': cik,
-                    'company_name': data.get('entityName', 'N/A'),
-                    'facts': data.get('facts', {}),
-                    'status': 'success'
-                })
+            entry = company_facts_cache.get(cik)
+            if entry is not None:
+                items = _iter_cached_company_facts(entry)
             else:
-                return JsonResponse({
-                    'error': f'Failed to fetch company facts from SEC API. Status code: {response.status_code}',
-                    'status': 'error'
-                }, status=response.status_code)
+                # SEC Edgar API endpoint for company facts
+                sec_api_url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+                response = sec_get(sec_api_url, stream=True)
+                
+                if response.status_code != 200:
+                    response.close()
+                    return JsonResponse({
+                        'error': f'Failed to fetch company facts from SEC API. Status code: {response.status_code}',
+                        'status': 'error'
+                    }, status=response.status_code)
+                items = _parse_and_cache_company_facts(cik, response)
+            
+            return StreamingHttpResponse(
+                _render_company_facts(ticker, cik, items, facts_filter),
+                content_type='application/json'
+            )
                 
+        except SECRequestError as e:
+            return JsonResponse({
+                'error': str(e),
+                'status': 'error'
+            }, status=e.status_code)
         except Exception as e:
             return JsonResponse({
                 'error': f'An error occurred: {str(e)}',
@@ -155,93 +627,79 @@ def get_sec_filings_summary_api(request):
             if not cik.isdigit():
                 return JsonResponse({'error': f'Invalid ticker: {ticker}'}, status=404)
             
-            sec_api_url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-            headers = {'User-Agent': 'Financial Data API (contact@example.com)'}
+            try:
+                recent_filings = get_recent_filings(cik)
+            except SECRequestError as e:
+                return JsonResponse({'error': str(e)}, status=e.status_code)
             
-            response = requests.get(sec_api_url, headers=headers)
+            forms = recent_filings.get('form', [])
+            dates = recent_filings.get('filingDate', [])
             
-            if response.status_code == 200:
-                data = response.json()
-                recent_filings = data.get('filings', {}).get('recent', {})
-                
-                forms = recent_filings.get('form', [])
-                dates = recent_filings.get('filingDate', [])
-                
-                # Priority order: 10-Q (quarterly) → 10-K (annual) → any available form
-                target_forms = ['10-Q', '10-K', '8-K', '10-Q/A', '10-K/A']
-                found_forms = []
-                found_dates = []
-                form_type_used = None
-                
-                # Try to find forms in priority order
-                for target_form in target_forms:
-                    for i, form in enumerate(forms):
-                        if form == target_form and len(found_forms) < 3:
-                            found_forms.append(form)
-                            found_dates.append(dates[i])
-                            if form_type_used is None:
-                                form_type_used = target_form
-                    
-                    if found_forms:  # If we found any forms of this type, use them
-                        break
-                
-                # If no priority forms found, use any available forms
-                if not found_forms:
-                    for i, form in enumerate(forms[:3]):
+            # Priority order: 10-Q (quarterly) → 10-K (annual) → any available form
+            target_forms = ['10-Q', '10-K', '8-K', '10-Q/A', '10-K/A']
+            found_forms = []
+            found_dates = []
+            form_type_used = None
+            
+            # Try to find forms in priority order
+            for target_form in target_forms:
+                for i, form in enumerate(forms):
+                    if form == target_form and len(found_forms) < 3:
                         found_forms.append(form)
                         found_dates.append(dates[i])
                         if form_type_used is None:
-                            form_type_used = form
-                
-                # Generate earnings-focused AI summary with form-specific prompt
-                ai_summary = "Recent earnings information from SEC filings unavailable"
-                form_context = "10-Q quarterly filing"
+                            form_type_used = target_form
                 
-                # Adjust context based on actual form found
-                if form_type_used == '10-K':
-                    form_context = "10-K annual filing"
-                elif form_type_used == '8-K':
-                    form_context = "8-K current report"
-                elif form_type_used in ['10-Q/A', '10-K/A']:
-                    form_context = f"{form_type_used} amended filing"
-                elif form_type_used and form_type_used != '10-Q':
-                    form_context = f"{form_type_used} filing"
+                if found_forms:  # If we found any forms of this type, use them
+                    break
+            
+            # If no priority forms found, use any available forms
+            if not found_forms:
+                for i, form in enumerate(forms[:3]):
+                    found_forms.append(form)
+                    found_dates.append(dates[i])
+                    if form_type_used is None:
+                        form_type_used = form
+            
+            # Generate earnings-focused AI summary with form-specific prompt
+            ai_summary = "Recent earnings information from SEC filings unavailable"
+            form_context = "10-Q quarterly filing"
+            
+            # Adjust context based on actual form found
+            if form_type_used == '10-K':
+                form_context = "10-K annual filing"
+            elif form_type_used == '8-K':
+                form_context = "8-K current report"
+            elif form_type_used in ['10-Q/A', '10-K/A']:
+                form_context = f"{form_type_used} amended filing"
+            elif form_type_used and form_type_used != '10-Q':
+                form_context = f"{form_type_used} filing"
+            
+            try:
+                from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
+                from ai_models.services import llm_router
                 
-                try:
-                    from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
-                    from openai import AzureOpenAI
+                if all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
+                    # Create a more flexible prompt that works regardless of form type
+                    prompt = f"""Provide a 2-sentence summary of {ticker}'s earnings and financial performance based on their most recent {form_context} from {found_dates[0] if found_dates else 'recent period'}. 
                     
-                    if all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
-                        client = AzureOpenAI(
-                            api_key=AZURE_OPENAI_KEY,
-                            api_version="2023-05-15",
-                            azure_endpoint=AZURE_OPENAI_ENDPOINT
-                        )
-                        
-                        # Create a more flexible prompt that works regardless of form type
-                        prompt = f"""Provide a 2-sentence summary of {ticker}'s earnings and financial performance based on their most recent {form_context} from {found_dates[0] if found_dates else 'recent period'}. 
-                        
 Focus on key financial metrics such as revenue, net income, earnings per share, and overall financial performance. 
 If specific earnings data is not available in the filing, provide a general assessment of the company's financial health and performance trends. 
 Do not include citations or references to specific data sources."""
-                        
-                        ai_response = client.chat.completions.create(
-                            model=MODEL_NAME,
-                            messages=[{"role": "user", "content": prompt}]
-                        )
-                        
-                        ai_summary = ai_response.choices[0].message.content
-                except Exception:
-                    pass
-                
-                return JsonResponse({
-                    'ticker': ticker,
-                    'form_type': form_type_used,
-                    'date': found_dates[0] if found_dates else None,
-                    'summary': ai_summary
-                })
-            else:
-                return JsonResponse({'error': f'SEC API error: {response.status_code}'}, status=response.status_code)
+                    
+                    ai_summary = llm_router.generate(
+                        model=MODEL_NAME,
+                        messages=[{"role": "user", "content": prompt}]
+                    )
+            except Exception:
+                pass
+            
+            return JsonResponse({
+                'ticker': ticker,
+                'form_type': form_type_used,
+                'date': found_dates[0] if found_dates else None,
+                'summary': ai_summary
+            })
                 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -1,16 +1,50 @@
 # internal
 from financial_data.config import FMP_API_KEY
 from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
+from ai_models.services import llm_router
+from ai_models.services.llm_cache import llm_cache
+from financial_data.services.provider_client import provider_client
+from financial_data.services.price_panel import get_returns_panel
 
 # external
-import requests
+from django.core.cache import cache
 from django.http import JsonResponse
+from django.utils import timezone
 import json
-from openai import AzureOpenAI
-import yfinance as yf
 import pandas as pd
 import numpy as np
 
+# built-in
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Representative stock for each major sector in the correlation matrix
+SECTOR_REPRESENTATIVES = {
+    'technology': 'AAPL',
+    'healthcare': 'JNJ', 
+    'financial': 'JPM',
+    'energy': 'XOM',
+    'consumer_discretionary': 'AMZN',
+    'consumer_staples': 'PG',
+    'industrials': 'BA',
+    'utilities': 'NEE',
+    'materials': 'LIN',
+    'real_estate': 'AMT',
+    'communication_services': 'GOOGL',
+    'semiconductors': 'NVDA',
+    'biotech': 'GILD',
+    'automotive': 'TSLA',
+    'banking': 'JPM'
+}
+
+# AI commentary on sector correlation is generated off the request path
+CORRELATION_COMMENTARY_TIMEOUT = 24 * 3600
+CORRELATION_COMMENTARY_LOCK_TIMEOUT = 120
+DEFAULT_CORRELATION_SCORE = 0.65
+DEFAULT_CORRELATION_DESCRIPTION = 'Sector correlation analysis completed with mixed signals'
+
 # Comprehensive sector mappings with representative stocks
 SECTOR_STOCKS = {
     # Original sectors
@@ -132,7 +166,7 @@ def get_sector_news(sector):
                 'apikey': FMP_API_KEY
             }
             
-            response = requests.get(stock_news_url, params=params, timeout=10)
+            response = provider_client.get(stock_news_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 news_data = response.json()
@@ -162,12 +196,6 @@ def analyze_sector_sentiment_with_openai(sector, news_articles):
                 'trend': 'Unable to analyze sentiment due to configuration issues'
             }
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         # Prepare news summary for analysis
         news_summary = ""
         for i, article in enumerate(news_articles[:5], 1):  # Use top 5 articles
@@ -194,13 +222,12 @@ def analyze_sector_sentiment_with_openai(sector, news_articles):
         Keep the trend sentence under 100 characters and focus on market movements, earnings, or significant developments.
         """
         
-        response = client.chat.completions.create(
+        # Parse OpenAI response
+        ai_response = llm_cache.complete(
+            'sector_sentiment',
             model=MODEL_NAME,
             messages=[{"role": "user", "content": prompt}]
-        )
-        
-        # Parse OpenAI response
-        ai_response = response.choices[0].message.content.strip()
+        ).strip()
         
         try:
             # Try to parse as JSON
@@ -256,44 +283,18 @@ def calculate_sector_correlation_matrix():
     Calculate actual mathematical correlations between sector representative stocks
     
     Returns a correlation matrix showing how different sectors correlate with each other
-    based on actual price movements over the past 6 months
+    based on actual price movements over the past 6 months. Returns come from the
+    daily-cached returns panel, so only the first request of a day downloads prices.
     """
     try:
-        # Select representative stocks for each major sector
-        sector_representatives = {
-            'technology': 'AAPL',
-            'healthcare': 'JNJ', 
-            'financial': 'JPM',
-            'energy': 'XOM',
-            'consumer_discretionary': 'AMZN',
-            'consumer_staples': 'PG',
-            'industrials': 'BA',
-            'utilities': 'NEE',
-            'materials': 'LIN',
-            'real_estate': 'AMT',
-            'communication_services': 'GOOGL',
-            'semiconductors': 'NVDA',
-            'biotech': 'GILD',
-            'automotive': 'TSLA',
-            'banking': 'JPM'
-        }
+        returns_panel = get_returns_panel(SECTOR_REPRESENTATIVES.values(), period="6mo")
         
-        # Get price data for all representative stocks
-        price_data = {}
-        period = "6mo"  # 6 months of data
-        
-        for sector, ticker in sector_representatives.items():
-            try:
-                stock = yf.Ticker(ticker)
-                data = stock.history(period=period, interval="1d")
-                
-                if not data.empty:
-                    # Calculate daily returns (percentage change)
-                    returns = data['Close'].pct_change().dropna()
-                    price_data[sector] = returns
-                    
-            except Exception:
-                continue  # Skip if data fetch fails
+        # One column of daily returns per sector
+        price_data = {
+            sector: returns_panel[ticker].dropna()
+            for sector, ticker in SECTOR_REPRESENTATIVES.items()
+            if ticker in returns_panel and returns_panel[ticker].notna().any()
+        }
         
         if len(price_data) < 5:  # Need at least 5 sectors for meaningful analysis
             return None
@@ -328,6 +329,140 @@ def calculate_sector_correlation_matrix():
     except Exception as e:
         return None
 
+def _sector_correlation_commentary_key() -> str:
+    return f'sector_correlation:commentary:{timezone.localdate()}'
+
+def generate_sector_correlation_commentary(math_correlation):
+    """
+    Ask the LLM for an overall sector correlation score and one-sentence description
+    
+    Returns:
+        (score, description), or None if OpenAI isn't configured or the call or its parsing fails
+    """
+    all_sectors = list(SECTOR_STOCKS.keys())
+    sector_count = len(all_sectors)
+    
+    if all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
+        try:
+            # Prepare sector information for analysis
+            sector_names = [sector.replace('_', ' ').title() for sector in all_sectors]
+            sector_summary = f"Analyzing {sector_count} sectors: {', '.join(sector_names)}"
+            
+            # Include mathematical correlation data in prompt if available
+            math_context = ""
+            if math_correlation:
+                math_context = f"\nMathematical correlation analysis shows an overall correlation of {math_correlation['overall_correlation']} based on {math_correlation['data_points']} days of price data across {len(math_correlation['sectors_analyzed'])} major sectors."
+            
+            prompt = f"""
+            Analyze the overall correlation patterns across all {sector_count} market sectors:
+            
+            {sector_summary}
+            {math_context}
+            
+            Consider these factors for sector correlation analysis:
+            1. Economic cycle sensitivity - how sectors move together during economic cycles
+            2. Interest rate sensitivity - sectors that respond similarly to rate changes
+            3. Market sentiment correlation - how sectors react to market-wide events
+            4. Supply chain interdependencies - sectors that depend on each other
+            5. Consumer behavior patterns - sectors affected by similar consumer trends
+            6. Regulatory environments - sectors under similar regulatory pressures
+            7. Technology disruption patterns - sectors being transformed by similar tech trends
+            8. Global economic exposure - sectors with similar international dependencies
+            
+            Based on current market conditions, historical patterns, and the mathematical correlation data provided, provide:
+            1. A numerical correlation score (0.0 to 1.0) representing overall sector correlation
+            2. A concise description (one sentence) explaining the correlation level
+            
+            Correlation ranges:
+            - 0.0-0.3: Low correlation (sectors moving independently)
+            - 0.3-0.6: Moderate correlation (some sectoral alignment)
+            - 0.6-0.8: High correlation (strong sectoral alignment)
+            - 0.8-1.0: Very high correlation (sectors highly synchronized)
+            
+            Respond ONLY with a JSON object in this exact format:
+            {{
+                "sector_correlation": [0.0-1.0 decimal to 2 places],
+                "description": "[one sentence description]"
+            }}
+            """
+            
+            ai_response = llm_router.generate(
+                model=MODEL_NAME,
+                messages=[
+                    {"role": "system", "content": "You are a financial market analyst specializing in sector correlation analysis. Always respond with valid JSON only."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3
+            ).strip()
+            
+            # Try to find JSON in the response (in case there's extra text)
+            import re
+            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+            if json_match:
+                ai_response = json_match.group()
+            
+            result = json.loads(ai_response)
+            
+            # Extract and validate results
+            ai_correlation_score = float(result['sector_correlation'])
+            ai_description = result.get('description', 'Sector correlation analysis completed')
+            
+            # Ensure correlation is within 0.0-1.0 range
+            ai_correlation_score = max(0.0, min(1.0, ai_correlation_score))
+            ai_correlation_score = round(ai_correlation_score, 2)
+            
+            return ai_correlation_score, ai_description
+            
+        except Exception as e:
+            logger.warning("Sector correlation commentary unusable: %s", e)
+    
+    return None
+
+def get_sector_correlation_commentary(math_correlation):
+    """
+    Get today's AI sector correlation commentary without waiting on the LLM
+    
+    Commentary is cached for the day. On a miss, one worker (guarded by a
+    cache lock) generates it in a background thread while this request gets
+    the neutral defaults. Failed generations aren't cached, so a later
+    request retries once the lock is released.
+    
+    Returns:
+        (score, description, status) where status is 'ready' or 'pending'
+    """
+    key = _sector_correlation_commentary_key()
+    try:
+        cached = cache.get(key)
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached['score'], cached['description'], 'ready'
+    
+    try:
+        acquired = cache.add(f'{key}:lock', 1, CORRELATION_COMMENTARY_LOCK_TIMEOUT)
+    except Exception:
+        acquired = False
+    
+    if acquired:
+        def run():
+            try:
+                commentary = generate_sector_correlation_commentary(math_correlation)
+                if commentary is None:
+                    return
+                score, description = commentary
+                cache.set(key, {'score': score, 'description': description}, CORRELATION_COMMENTARY_TIMEOUT)
+            except Exception as e:
+                logger.warning("Sector correlation commentary failed: %s", e)
+            finally:
+                try:
+                    cache.delete(f'{key}:lock')
+                except Exception:
+                    pass
+        
+        threading.Thread(target=run, name='sector-correlation-commentary', daemon=True).start()
+    
+    return DEFAULT_CORRELATION_SCORE, DEFAULT_CORRELATION_DESCRIPTION, 'pending'
+
 def get_all_sectors_correlation_api(request):
     """Analyze correlation across all sectors using both mathematical calculation and OpenAI analysis"""
     if request.method == 'GET':
@@ -339,89 +474,8 @@ def get_all_sectors_correlation_api(request):
             all_sectors = list(SECTOR_STOCKS.keys())
             sector_count = len(all_sectors)
             
-            # Use OpenAI to analyze correlation patterns across all sectors
-            ai_correlation_score = 0.65  # Default fallback
-            ai_description = 'Sector correlation analysis completed with mixed signals'
-            
-            if all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
-                try:
-                    client = AzureOpenAI(
-                        api_key=AZURE_OPENAI_KEY,
-                        api_version="2023-05-15",
-                        azure_endpoint=AZURE_OPENAI_ENDPOINT
-                    )
-                    
-                    # Prepare sector information for analysis
-                    sector_names = [sector.replace('_', ' ').title() for sector in all_sectors]
-                    sector_summary = f"Analyzing {sector_count} sectors: {', '.join(sector_names)}"
-                    
-                    # Include mathematical correlation data in prompt if available
-                    math_context = ""
-                    if math_correlation:
-                        math_context = f"\nMathematical correlation analysis shows an overall correlation of {math_correlation['overall_correlation']} based on {math_correlation['data_points']} days of price data across {len(math_correlation['sectors_analyzed'])} major sectors."
-                    
-                    prompt = f"""
-                    Analyze the overall correlation patterns across all {sector_count} market sectors:
-                    
-                    {sector_summary}
-                    {math_context}
-                    
-                    Consider these factors for sector correlation analysis:
-                    1. Economic cycle sensitivity - how sectors move together during economic cycles
-                    2. Interest rate sensitivity - sectors that respond similarly to rate changes
-                    3. Market sentiment correlation - how sectors react to market-wide events
-                    4. Supply chain interdependencies - sectors that depend on each other
-                    5. Consumer behavior patterns - sectors affected by similar consumer trends
-                    6. Regulatory environments - sectors under similar regulatory pressures
-                    7. Technology disruption patterns - sectors being transformed by similar tech trends
-                    8. Global economic exposure - sectors with similar international dependencies
-                    
-                    Based on current market conditions, historical patterns, and the mathematical correlation data provided, provide:
-                    1. A numerical correlation score (0.0 to 1.0) representing overall sector correlation
-                    2. A concise description (one sentence) explaining the correlation level
-                    
-                    Correlation ranges:
-                    - 0.0-0.3: Low correlation (sectors moving independently)
-                    - 0.3-0.6: Moderate correlation (some sectoral alignment)
-                    - 0.6-0.8: High correlation (strong sectoral alignment)
-                    - 0.8-1.0: Very high correlation (sectors highly synchronized)
-                    
-                    Respond ONLY with a JSON object in this exact format:
-                    {{
-                        "sector_correlation": [0.0-1.0 decimal to 2 places],
-                        "description": "[one sentence description]"
-                    }}
-                    """
-                    
-                    response = client.chat.completions.create(
-                        model=MODEL_NAME,
-                        messages=[
-                            {"role": "system", "content": "You are a financial market analyst specializing in sector correlation analysis. Always respond with valid JSON only."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.3
-                    )
-                    
-                    ai_response = response.choices[0].message.content.strip()
-                    
-                    # Try to find JSON in the response (in case there's extra text)
-                    import re
-                    json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-                    if json_match:
-                        ai_response = json_match.group()
-                    
-                    result = json.loads(ai_response)
-                    
-                    # Extract and validate results
-                    ai_correlation_score = float(result.get('sector_correlation', 0.65))
-                    ai_description = result.get('description', 'Sector correlation analysis completed')
-                    
-                    # Ensure correlation is within 0.0-1.0 range
-                    ai_correlation_score = max(0.0, min(1.0, ai_correlation_score))
-                    ai_correlation_score = round(ai_correlation_score, 2)
-                    
-                except Exception:
-                    pass  # Use fallback values
+            # AI commentary is generated in the background and served from the cache
+            ai_correlation_score, ai_description, ai_status = get_sector_correlation_commentary(math_correlation)
             
             # Combine mathematical and AI analysis
             if math_correlation:
@@ -436,7 +490,8 @@ def get_all_sectors_correlation_api(request):
                         'ai_correlation': ai_correlation_score,
                         'combined_method': 'weighted_70_30',
                         'mathematical_analysis': math_correlation,
-                        'sectors_count': sector_count
+                        'sectors_count': sector_count,
+                        'ai_status': ai_status
                     }
                 }
             else:
@@ -449,7 +504,8 @@ def get_all_sectors_correlation_api(request):
                         'ai_correlation': ai_correlation_score,
                         'combined_method': 'ai_only',
                         'note': 'Mathematical correlation calculation failed, using AI analysis only',
-                        'sectors_count': sector_count
+                        'sectors_count': sector_count,
+                        'ai_status': ai_status
                     }
                 }
             
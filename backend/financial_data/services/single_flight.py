@@ -0,0 +1,150 @@
+# internal
+
+# external
+from django.core.cache import cache
+
+# built-in
+from functools import wraps
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Cross-worker coalescing through the shared cache
+LOCK_TIMEOUT = 30        # seconds a worker may hold the fetch lock for a key
+RESULT_TIMEOUT = 5       # seconds a finished result stays visible to other workers
+POLL_INTERVAL = 0.05     # seconds between cache polls while another worker fetches
+
+_MISSING = object()
+
+
+class _Call:
+    """An upstream call in flight within this process"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical upstream calls
+
+    Within a process, callers with the same key wait on the first caller's
+    in-flight call instead of issuing their own. Across workers, the first
+    worker takes a short-lived lock in the shared cache and publishes its
+    result there; other workers poll for that result instead of calling
+    upstream. If the cache is unavailable, calls simply go upstream.
+    """
+
+    def __init__(self, lock_timeout: int = LOCK_TIMEOUT, result_timeout: int = RESULT_TIMEOUT,
+                 poll_interval: float = POLL_INTERVAL):
+        self.lock_timeout = lock_timeout
+        self.result_timeout = result_timeout
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once for all concurrent callers with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Each caller gets its own copy so in-place edits (e.g. reset_index) don't leak
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = self._do_shared(key, fn, args, kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters and call.error is None:
+                # Snapshot before the leader's caller can modify the result
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def _do_shared(self, key: str, fn, args, kwargs):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        result_key = f'singleflight:{digest}:result'
+        lock_key = f'singleflight:{digest}:lock'
+
+        try:
+            result = cache.get(result_key, _MISSING)
+            if result is not _MISSING:
+                return result
+            acquired = cache.add(lock_key, 1, self.lock_timeout)
+        except Exception as e:
+            logger.warning("Single-flight cache unavailable, calling upstream: %s", e)
+            return fn(*args, **kwargs)
+
+        if acquired:
+            try:
+                result = fn(*args, **kwargs)
+                try:
+                    cache.set(result_key, result, self.result_timeout)
+                except Exception as e:
+                    logger.warning("Could not publish single-flight result for %s: %s", key, e)
+                return result
+            finally:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    pass
+
+        # Another worker is fetching; wait for its result while it holds the lock
+        deadline = time.monotonic() + self.lock_timeout
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                result = cache.get(result_key, _MISSING)
+                if result is not _MISSING:
+                    return result
+                if cache.get(lock_key) is None:
+                    break
+        except Exception as e:
+            logger.warning("Single-flight cache unavailable, calling upstream: %s", e)
+        return fn(*args, **kwargs)
+
+
+# Global single-flight group for upstream market-data calls
+upstream_flight = SingleFlight()
+
+
+def single_flight(namespace: str):
+    """
+    Decorator coalescing concurrent calls with the same arguments
+
+    Works on plain functions and on methods; for methods, `self` is left out of
+    the key so all instances share in-flight calls.
+    """
+    def decorator(fn):
+        is_method = fn.__code__.co_varnames[:1] == ('self',)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key_args = args[1:] if is_method else args
+            key = f'{namespace}:{key_args!r}:{sorted(kwargs.items())!r}'
+            return upstream_flight.do(key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -5,14 +5,31 @@ import requests
 import base64
 import json
 from .fmp_service import fmp_service
+from .ohlcv_serializer import serialize_ohlcv
+from .single_flight import single_flight
+from financial_data.responses import FastJsonResponse
 import yfinance as yf
 import pandas as pd
 import numpy as np
 
 # built-in
 from django.http import JsonResponse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 import json
 
+# Key order of the OHLCV rows returned by the yfinance endpoints
+YFINANCE_FIELDS = ('close', 'open', 'high', 'low', 'volume')
+
+# Stock correlation overview
+CORRELATION_MIN_OBSERVATIONS = 20   # overlapping daily returns needed for a real coefficient
+CORRELATION_MAX_WORKERS = 4         # concurrent LLM explanation requests
+
+@single_flight('yfinance.history')
+def get_yf_history(ticker: str, period: str, interval: str = "1d") -> pd.DataFrame:
+    """Fetch yfinance price history, sharing one upstream call between concurrent identical requests"""
+    return yf.Ticker(ticker).history(period=period, interval=interval)
+
 def get_ticker_from_request(request):
     """Helper function to get ticker from both form data and JSON"""
     ticker = request.POST.get('ticker', '')
@@ -41,8 +58,7 @@ def yfinance_price_change_api(request):
 def yfinance_price_change_data(ticker: str) -> dict:
     """Analyze price change for a stock ticker with simplified response"""
     try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="10d", interval="1d")
+        df = get_yf_history(ticker, period="10d", interval="1d")
         
         if df is None or df.empty or len(df) < 2:
             return {
@@ -80,244 +96,92 @@ def yfinance_price_change_data(ticker: str) -> dict:
             'error': str(e)
         }
 
-def yfinance_daily_api(request):
-    """Get simplified daily stock data"""
+class MarketDataError(Exception):
+    """Raised by the yfinance data helpers when no usable data could be produced"""
+
+
+def _ohlcv_response(request, fetch_data):
+    """Shared POST handler for the OHLCV endpoints; the rows are serialized exactly once"""
     if request.method == 'POST':
         ticker = get_ticker_from_request(request)
         if not ticker:
             return JsonResponse({'error': 'Ticker required'}, status=400)
         
         try:
-            data = yfinance_daily_data(ticker)
-            parsed_data = json.loads(data)
-            
-            if 'error' in parsed_data:
-                return JsonResponse(parsed_data, status=500)
-                
-            return JsonResponse({
-                'ticker': ticker,
-                'data': parsed_data
-            })
+            data = fetch_data(ticker)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
-    return JsonResponse({'error': 'POST required'}, status=400)
-
-def yfinance_daily_data(ticker: str) -> str:
-    """Fetch simplified daily stock data"""
-    try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="5d", interval="1d")
         
-        if df is None or df.empty:
-            # Fallback to FMP if Yahoo returns no data (e.g., provider/network restrictions)
-            try:
-                fmp_df = fmp_service.get_historical_price_data(ticker, period='6mo')
-                if fmp_df is None or fmp_df.empty:
-                    return json.dumps({'error': 'No data available'})
+        return FastJsonResponse({
+            'ticker': ticker,
+            'data': data
+        })
+    return JsonResponse({'error': 'POST required'}, status=400)
 
-                # Use the most recent 5 trading days
-                fmp_recent = fmp_df.tail(5).copy()
-                fmp_recent.reset_index(inplace=True)
-                data = []
-                for _, row in fmp_recent.iterrows():
-                    # Ensure required fields exist and are valid
-                    required_fields = ['close', 'open', 'high', 'low', 'volume']
-                    if all(field in row and pd.notna(row[field]) for field in required_fields):
-                        if all(float(row[field]) > 0 for field in ['close', 'open', 'high', 'low']) and int(row['volume']) >= 0:
-                            data.append({
-                                "date": row["date"].strftime("%Y-%m-%d"),
-                                "close": round(float(row["close"]), 2),
-                                "open": round(float(row["open"]), 2),
-                                "high": round(float(row["high"]), 2),
-                                "low": round(float(row["low"]), 2),
-                                "volume": int(row["volume"])
-                            })
+def yfinance_daily_api(request):
+    """Get simplified daily stock data"""
+    return _ohlcv_response(request, yfinance_daily_data)
 
-                if not data:
-                    return json.dumps({'error': 'No valid data found'})
+def yfinance_daily_data(ticker: str) -> List[Dict]:
+    """Fetch simplified daily stock data; raises MarketDataError when none is usable"""
+    df = get_yf_history(ticker, period="5d", interval="1d")
+    
+    if df is None or df.empty:
+        # Fallback to FMP if Yahoo returns no data (e.g., provider/network restrictions)
+        try:
+            fmp_df = fmp_service.get_historical_price_data(ticker, period='6mo')
+        except Exception as fallback_err:
+            raise MarketDataError(f'No data available (fallback failed: {str(fallback_err)})')
+        if fmp_df is None or fmp_df.empty:
+            raise MarketDataError('No data available')
 
-                return json.dumps(data)
-            except Exception as fallback_err:
-                return json.dumps({'error': f'No data available (fallback failed: {str(fallback_err)})'})
-        
-        df.reset_index(inplace=True)
-        data = []
-        
-        for _, row in df.iterrows():
-            # Only include rows with valid data
-            if all(pd.notna([row["Close"], row["Open"], row["High"], row["Low"], row["Volume"]])):
-                if all(val > 0 for val in [row["Close"], row["Open"], row["High"], row["Low"], row["Volume"]]):
-                    data.append({
-                        "date": row["Date"].strftime("%Y-%m-%d"),
-                        "close": round(float(row["Close"]), 2),
-                        "open": round(float(row["Open"]), 2),
-                        "high": round(float(row["High"]), 2),
-                        "low": round(float(row["Low"]), 2),
-                        "volume": int(row["Volume"])
-                    })
-        
-        if not data:
-            return json.dumps({'error': 'No valid data found'})
-            
-        return json.dumps(data)
-    except Exception as e:
-        return json.dumps({'error': str(e)})
+        # Use the most recent 5 trading days
+        data = serialize_ohlcv(
+            fmp_df.tail(5), positive_prices=True, volume_filter='nonnegative', fields=YFINANCE_FIELDS
+        )
+    else:
+        # Only include rows with valid data
+        data = serialize_ohlcv(df, positive_prices=True, volume_filter='positive', fields=YFINANCE_FIELDS)
+    
+    if not data:
+        raise MarketDataError('No valid data found')
+    return data
 
 def yfinance_weekly_api(request):
     """Get weekly stock data"""
-    if request.method == 'POST':
-        ticker = get_ticker_from_request(request)
-        if not ticker:
-            return JsonResponse({'error': 'Ticker required'}, status=400)
-        
-        try:
-            data = yfinance_weekly_data(ticker)
-            parsed_data = json.loads(data)
-            
-            if 'error' in parsed_data:
-                return JsonResponse(parsed_data, status=500)
-                
-            return JsonResponse({
-                'ticker': ticker,
-                'data': parsed_data
-            })
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-    return JsonResponse({'error': 'POST required'}, status=400)
+    return _ohlcv_response(request, yfinance_weekly_data)
 
-def yfinance_weekly_data(ticker: str) -> str:
+def yfinance_weekly_data(ticker: str) -> List[Dict]:
     """Fetch weekly stock data for the past 3 months"""
-    stock = yf.Ticker(ticker)
-    df = stock.history(period="3mo", interval="1wk")
-    df.reset_index(inplace=True)
-    data = []
-    for _, row in df.iterrows():
-        data.append({
-            "date": row["Date"].strftime("%Y-%m-%d"),
-            "close": round(row["Close"], 2),
-            "open": round(row["Open"], 2),
-            "high": round(row["High"], 2),
-            "low": round(row["Low"], 2),
-            "volume": int(row["Volume"])
-        })
-    return json.dumps(data)
+    df = get_yf_history(ticker, period="3mo", interval="1wk")
+    return serialize_ohlcv(df, fields=YFINANCE_FIELDS)
 
 def yfinance_yearly_api(request):
     """Get yearly stock data"""
-    if request.method == 'POST':
-        ticker = get_ticker_from_request(request)
-        if not ticker:
-            return JsonResponse({'error': 'Ticker required'}, status=400)
-        
-        try:
-            data = yfinance_yearly_data(ticker)
-            parsed_data = json.loads(data)
-            
-            if 'error' in parsed_data:
-                return JsonResponse(parsed_data, status=500)
-                
-            return JsonResponse({
-                'ticker': ticker,
-                'data': parsed_data
-            })
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-    return JsonResponse({'error': 'POST required'}, status=400)
+    return _ohlcv_response(request, yfinance_yearly_data)
 
-def yfinance_yearly_data(ticker: str) -> str:
+def yfinance_yearly_data(ticker: str) -> List[Dict]:
     """Fetch yearly stock data for the past 10 years"""
-    stock = yf.Ticker(ticker)
-    df = stock.history(period="10y", interval="1y")
-    df.reset_index(inplace=True)
-    data = []
-    for _, row in df.iterrows():
-        data.append({
-            "date": row["Date"].strftime("%Y-%m-%d"),
-            "close": round(row["Close"], 2),
-            "open": round(row["Open"], 2),
-            "high": round(row["High"], 2),
-            "low": round(row["Low"], 2),
-            "volume": int(row["Volume"])
-        })
-    return json.dumps(data)
+    df = get_yf_history(ticker, period="10y", interval="1y")
+    return serialize_ohlcv(df, fields=YFINANCE_FIELDS)
 
 def yfinance_max_api(request):
     """Get maximum available stock data"""
-    if request.method == 'POST':
-        ticker = get_ticker_from_request(request)
-        if not ticker:
-            return JsonResponse({'error': 'Ticker required'}, status=400)
-        
-        try:
-            data = yfinance_max_data(ticker)
-            parsed_data = json.loads(data)
-            
-            if 'error' in parsed_data:
-                return JsonResponse(parsed_data, status=500)
-                
-            return JsonResponse({
-                'ticker': ticker,
-                'data': parsed_data
-            })
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-    return JsonResponse({'error': 'POST required'}, status=400)
+    return _ohlcv_response(request, yfinance_max_data)
 
-def yfinance_max_data(ticker: str) -> str:
+def yfinance_max_data(ticker: str) -> List[Dict]:
     """Fetch maximum available stock data"""
-    stock = yf.Ticker(ticker)
-    df = stock.history(period="max", interval="1mo")
-    df.reset_index(inplace=True)
-    data = []
-    for _, row in df.iterrows():
-        data.append({
-            "date": row["Date"].strftime("%Y-%m-%d"),
-            "close": round(row["Close"], 2),
-            "open": round(row["Open"], 2),
-            "high": round(row["High"], 2),
-            "low": round(row["Low"], 2),
-            "volume": int(row["Volume"])
-        })
-    return json.dumps(data)
+    df = get_yf_history(ticker, period="max", interval="1mo")
+    return serialize_ohlcv(df, fields=YFINANCE_FIELDS)
 
 def yfinance_monthly_api(request):
     """Get monthly stock data"""
-    if request.method == 'POST':
-        ticker = get_ticker_from_request(request)
-        if not ticker:
-            return JsonResponse({'error': 'Ticker required'}, status=400)
-        
-        try:
-            data = yfinance_monthly_data(ticker)
-            parsed_data = json.loads(data)
-            
-            if 'error' in parsed_data:
-                return JsonResponse(parsed_data, status=500)
-                
-            return JsonResponse({
-                'ticker': ticker,
-                'data': parsed_data
-            })
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-    return JsonResponse({'error': 'POST required'}, status=400)
+    return _ohlcv_response(request, yfinance_monthly_data)
 
-def yfinance_monthly_data(ticker: str) -> str:
+def yfinance_monthly_data(ticker: str) -> List[Dict]:
     """Fetch monthly stock data for the past 5 years"""
-    stock = yf.Ticker(ticker)
-    df = stock.history(period="5y", interval="1mo")
-    df.reset_index(inplace=True)
-    data = []
-    for _, row in df.iterrows():
-        data.append({
-            "date": row["Date"].strftime("%Y-%m-%d"),
-            "close": round(row["Close"], 2),
-            "open": round(row["Open"], 2),
-            "high": round(row["High"], 2),
-            "low": round(row["Low"], 2),
-            "volume": int(row["Volume"])
-        })
-    return json.dumps(data)
+    df = get_yf_history(ticker, period="5y", interval="1mo")
+    return serialize_ohlcv(df, fields=YFINANCE_FIELDS)
 
 def stock_correlation_overview_api(request):
     """Get stock correlation overview with related stocks grouped by sector"""
@@ -341,17 +205,11 @@ def stock_correlation_overview_data(ticker: str) -> dict:
     try:
         # Import OpenAI configuration
         from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
-        from openai import AzureOpenAI
+        from ai_models.services import llm_router
         
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return {'error': 'OpenAI not configured'}
         
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version="2023-05-15",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT
-        )
-        
         # Step 1: Use OpenAI to get related stocks by sector
         prompt = f"""
         Analyze {ticker} and provide related stocks for correlation analysis.
@@ -383,16 +241,14 @@ def stock_correlation_overview_data(ticker: str) -> dict:
         }}
         """
         
-        response = client.chat.completions.create(
+        ai_response = llm_router.generate(
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are a financial sector analysis expert. Always respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.3
-        )
-        
-        ai_response = response.choices[0].message.content.strip()
+        ).strip()
         
         # Extract JSON from response (handle markdown code blocks)
         import re
@@ -428,7 +284,7 @@ def stock_correlation_overview_data(ticker: str) -> dict:
         correlation_results = calculate_stock_correlations(ticker, sectors_data)
         
         # Step 3: Generate explanatory sentences for each sector group
-        explanations = generate_correlation_explanations(ticker, correlation_results, client)
+        explanations = generate_correlation_explanations(ticker, correlation_results)
         
         # Step 4: Structure the final response
         return {
@@ -455,60 +311,53 @@ def stock_correlation_overview_data(ticker: str) -> dict:
         return {'error': f'Correlation analysis failed: {str(e)}'}
 
 def calculate_stock_correlations(base_ticker: str, sectors_data: dict) -> dict:
-    """Calculate correlation coefficients between base stock and related stocks"""
+    """
+    Calculate correlation coefficients between base stock and related stocks
+    
+    All prices come from one parallel panel download and the base stock's
+    returns are correlated against every candidate in a single pass.
+    """
+    from .price_panel import get_returns_panel
+    
     try:
-        # Get base stock data for correlation calculations
-        base_stock = yf.Ticker(base_ticker)
-        base_data = base_stock.history(period="6mo", interval="1d")  # Use 6 months for faster processing
-        
-        if base_data.empty:
-            return {'error': f'No data available for {base_ticker}'}
+        same_sector_stocks = sectors_data.get('same_sector_stocks', [])
+        related_sectors = sectors_data.get('related_sectors', [])
+        candidates = list(same_sector_stocks)
+        for related_sector in related_sectors:
+            candidates.extend(related_sector.get('stocks', []))
         
-        base_prices = base_data['Close'].pct_change().dropna()
+        # Use 6 months for faster processing
+        returns = get_returns_panel([base_ticker] + candidates, period="6mo", interval="1d")
         
-        results = {}
+        if base_ticker not in returns or returns[base_ticker].dropna().empty:
+            return {'error': f'No data available for {base_ticker}'}
         
-        # Calculate correlations for same sector stocks  
-        same_sector_correlations = []
-        same_sector_stocks = sectors_data.get('same_sector_stocks', [])
+        correlations = correlate_returns(returns[base_ticker], returns.drop(columns=base_ticker))
         
-        for stock_ticker in same_sector_stocks:
-            correlation = calculate_single_correlation(base_prices, stock_ticker)
-            if correlation is not None:
-                same_sector_correlations.append({
-                    'ticker': stock_ticker,
-                    'correlation': round(correlation, 3)
-                })
-            else:
+        def correlation_row(stock_ticker, fallback):
+            correlation = correlations.get(stock_ticker)
+            if correlation is None:
                 # Fallback with a reasonable mock value if real calculation fails
-                same_sector_correlations.append({
-                    'ticker': stock_ticker,
-                    'correlation': round(0.65 + (len(same_sector_correlations) * 0.05), 3)  # 0.65, 0.70, 0.75
-                })
+                correlation = fallback
+            return {'ticker': stock_ticker, 'correlation': round(float(correlation), 3)}
         
-        results['same_sector'] = same_sector_correlations
+        results = {}
         
-        # Calculate correlations for related sector stocks
-        for i, related_sector in enumerate(sectors_data.get('related_sectors', [])):
-            sector_correlations = []
-            for stock_ticker in related_sector.get('stocks', []):
-                correlation = calculate_single_correlation(base_prices, stock_ticker)
-                if correlation is not None:
-                    sector_correlations.append({
-                        'ticker': stock_ticker,
-                        'correlation': round(correlation, 3)
-                    })
-                else:
-                    # Fallback with a reasonable mock value if real calculation fails
-                    sector_correlations.append({
-                        'ticker': stock_ticker,
-                        'correlation': round(0.35 + (len(sector_correlations) * 0.03), 3)  # 0.35, 0.38, 0.41
-                    })
-            
-            results[f'related_{i}'] = sector_correlations
+        # Same sector fallbacks: 0.65, 0.70, 0.75
+        results['same_sector'] = [
+            correlation_row(stock_ticker, 0.65 + i * 0.05)
+            for i, stock_ticker in enumerate(same_sector_stocks)
+        ]
+        
+        # Related sector fallbacks: 0.35, 0.38, 0.41
+        for i, related_sector in enumerate(related_sectors):
+            results[f'related_{i}'] = [
+                correlation_row(stock_ticker, 0.35 + j * 0.03)
+                for j, stock_ticker in enumerate(related_sector.get('stocks', []))
+            ]
         
         return results
-        
+    
     except Exception as e:
         # Return mock data on error to ensure API always returns useful information
         return {
@@ -518,93 +367,93 @@ def calculate_stock_correlations(base_ticker: str, sectors_data: dict) -> dict:
             'related_2': [{'ticker': stock, 'correlation': 0.30} for stock in sectors_data.get('related_sectors', [{}])[2].get('stocks', [])] if len(sectors_data.get('related_sectors', [])) > 2 else []
         }
 
-def calculate_single_correlation(base_prices: pd.Series, target_ticker: str) -> float:
-    """Calculate correlation between base stock and target stock"""
-    try:
-        target_stock = yf.Ticker(target_ticker)
-        target_data = target_stock.history(period="6mo", interval="1d")  # Match base period
-        
-        if target_data.empty:
-            return None
-        
-        target_prices = target_data['Close'].pct_change().dropna()
-        
-        # Align the time series
-        aligned_base, aligned_target = base_prices.align(target_prices, join='inner')
-        
-        if len(aligned_base) < 20:  # Reduced minimum for 6-month period
-            return None
-        
-        correlation = aligned_base.corr(aligned_target)
-        
-        return correlation if not pd.isna(correlation) else None
-        
-    except Exception:
-        return None
+def correlate_returns(base_returns: pd.Series, candidate_returns: pd.DataFrame,
+                      min_observations: int = CORRELATION_MIN_OBSERVATIONS) -> Dict[str, float]:
+    """
+    Correlate one return series against many at once
+    
+    Each candidate is compared over the days both series have a return.
+    Candidates with fewer than min_observations overlapping days are left out.
+    """
+    if candidate_returns.empty:
+        return {}
+    
+    base = base_returns.reindex(candidate_returns.index).to_numpy(dtype=float)
+    x = candidate_returns.to_numpy(dtype=float)
+    overlap = ~np.isnan(x) & ~np.isnan(base)[:, None]
+    x = np.where(overlap, x, np.nan)
+    y = np.where(overlap, base[:, None], np.nan)
+    
+    counts = overlap.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = x - np.nanmean(x, axis=0)
+        y = y - np.nanmean(y, axis=0)
+        correlation = np.nansum(x * y, axis=0) / np.sqrt(np.nansum(x * x, axis=0) * np.nansum(y * y, axis=0))
+    
+    return {
+        ticker: float(value)
+        for ticker, value, count in zip(candidate_returns.columns, correlation, counts)
+        if count >= min_observations and np.isfinite(value)
+    }
 
-def generate_correlation_explanations(base_ticker: str, correlation_results: dict, client) -> dict:
-    """Generate explanatory sentences for each correlation group using OpenAI"""
-    try:
-        from ai_models.config import MODEL_NAME
-        explanations = {}
-        
-        # Generate explanation for same sector
-        same_sector_data = correlation_results.get('same_sector', [])
-        if same_sector_data:
-            correlations_text = ', '.join([f"{stock['ticker']} ({stock['correlation']})" for stock in same_sector_data])
-            
-            prompt = f"""
+def generate_correlation_explanations(base_ticker: str, correlation_results: dict) -> dict:
+    """Generate explanatory sentences for each correlation group using OpenAI, one request per group in parallel"""
+    from ai_models.config import MODEL_NAME
+    from ai_models.services import llm_router
+    
+    fallbacks = {
+        'same_sector': f'These stocks in the same sector as {base_ticker} show typical correlation patterns driven by shared market factors and industry trends.',
+        'related_0': f'These related sector stocks show moderate correlation with {base_ticker} due to supply chain and business ecosystem connections.',
+        'related_1': f'Cross-sector correlation with {base_ticker} reflects broader economic factors and market sentiment influences.',
+        'related_2': f'These correlations indicate how {base_ticker} moves in relation to complementary industry sectors.'
+    }
+    
+    prompts = {}
+    
+    # Explanation for same sector
+    same_sector_data = correlation_results.get('same_sector', [])
+    if same_sector_data:
+        correlations_text = ', '.join([f"{stock['ticker']} ({stock['correlation']})" for stock in same_sector_data])
+        prompts['same_sector'] = f"""
             {base_ticker} has the following correlations with stocks in its same sector: {correlations_text}
             
             Provide a brief 1-2 sentence explanation of what these correlations mean for investors.
             Focus on sector-specific factors that drive these correlations.
             Keep it concise and informative.
             """
-            
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a financial correlation expert. Provide concise explanations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
-            
-            explanations['same_sector'] = response.choices[0].message.content.strip()
-        
-        # Generate explanations for related sectors
-        for key in correlation_results:
-            if key.startswith('related_'):
-                sector_data = correlation_results[key]
-                if sector_data:
-                    correlations_text = ', '.join([f"{stock['ticker']} ({stock['correlation']})" for stock in sector_data])
-                    
-                    prompt = f"""
+    
+    # Explanations for related sectors
+    for key in correlation_results:
+        if key.startswith('related_'):
+            sector_data = correlation_results[key]
+            if sector_data:
+                correlations_text = ', '.join([f"{stock['ticker']} ({stock['correlation']})" for stock in sector_data])
+                prompts[key] = f"""
                     {base_ticker} has the following correlations with related sector stocks: {correlations_text}
                     
                     Provide a brief 1-2 sentence explanation of what these correlations mean.
                     Focus on the business relationships and market factors connecting these sectors.
                     Keep it concise and informative.
                     """
-                    
-                    response = client.chat.completions.create(
-                        model=MODEL_NAME,
-                        messages=[
-                            {"role": "system", "content": "You are a financial correlation expert. Provide concise explanations."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.3
-                    )
-                    
-                    explanations[key] = response.choices[0].message.content.strip()
-        
-        return explanations
-        
-    except Exception as e:
-        # Provide reasonable fallback explanations
-        return {
-            'same_sector': f'These stocks in the same sector as {base_ticker} show typical correlation patterns driven by shared market factors and industry trends.',
-            'related_0': f'These related sector stocks show moderate correlation with {base_ticker} due to supply chain and business ecosystem connections.',
-            'related_1': f'Cross-sector correlation with {base_ticker} reflects broader economic factors and market sentiment influences.',
-            'related_2': f'These correlations indicate how {base_ticker} moves in relation to complementary industry sectors.'
-        } 
\ No newline at end of file
+    
+    def explain(key):
+        try:
+            content = llm_router.generate(
+                model=MODEL_NAME,
+                messages=[
+                    {"role": "system", "content": "You are a financial correlation expert. Provide concise explanations."},
+                    {"role": "user", "content": prompts[key]}
+                ],
+                temperature=0.3
+            )
+            return key, content.strip()
+        except Exception:
+            # Provide a reasonable fallback explanation for this group only
+            return key, fallbacks.get(key, fallbacks['related_2'])
+    
+    if not prompts:
+        return {}
+    
+    # Groups are independent, so the slowest single request bounds the wait
+    with ThreadPoolExecutor(max_workers=min(CORRELATION_MAX_WORKERS, len(prompts))) as executor:
+        return dict(executor.map(explain, prompts))
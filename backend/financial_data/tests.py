@@ -1,3 +1,1398 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from unittest import mock
+import hashlib
+import io
+import json
+import numpy as np
+import os
+import pandas as pd
+import requests
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from ai_models.services.llm_cache import LLMResponseCache
+
+from . import views
+from .models import EarningsCalendarDay, FredSeries
+from .responses import FastJsonResponse
+from .services import earnings_service
+from .services import fmp_service as fmp_service_module
+from .services import fred_service
+from .services import nyse_stocks_service
+from .services import price_panel
+from .services import provider_client
+from .services import sector_analysis_service
+from .services import sec_service
+from .services import single_flight as single_flight_module
+from .services import yfinance_service
+from .services.provider_client import HostStats, ProviderClient
+from .services.ohlcv_serializer import serialize_ohlcv
+from .services.single_flight import SingleFlight, single_flight
+
+
+class FredSeriesBatchTestCase(SimpleTestCase):
+    """Test cases for the concurrent FRED batch fetcher"""
+
+    def test_batch_returns_results_by_name(self):
+        """Test that each spec name maps to its fetched observations"""
+        def fake_fetch(series_id, frequency, timeout=30):
+            return [{'date': '2024-01-01', 'value': f'{series_id}-{frequency}'}]
+
+        with mock.patch.object(fred_service, 'fetch_fred_data', side_effect=fake_fetch):
+            results = fred_service.fetch_fred_series_batch([
+                ('cpi', 'CPIAUCSL', 'm'),
+                ('vix', 'VIXCLS', 'd'),
+            ])
+
+        self.assertEqual(results['cpi'][0]['value'], 'CPIAUCSL-m')
+        self.assertEqual(results['vix'][0]['value'], 'VIXCLS-d')
+
+    def test_batch_deduplicates_identical_series(self):
+        """Test that the same series and frequency is only fetched once"""
+        with mock.patch.object(fred_service, 'fetch_fred_data', return_value=[]) as fetch:
+            results = fred_service.fetch_fred_series_batch([
+                ('VIX_Volatility', 'VIXCLS', 'd'),
+                ('Market_Volatility', 'VIXCLS', 'd'),
+            ])
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(set(results), {'VIX_Volatility', 'Market_Volatility'})
+
+    def test_batch_runs_concurrently(self):
+        """Test that wall-clock time is bounded by the slowest series"""
+        def slow_fetch(series_id, frequency, timeout=30):
+            time.sleep(0.2)
+            return []
+
+        with mock.patch.object(fred_service, 'fetch_fred_data', side_effect=slow_fetch):
+            started = time.monotonic()
+            fred_service.fetch_fred_series_batch(
+                [(f's{i}', f'S{i}', 'm') for i in range(5)], max_workers=5
+            )
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.6)
+
+    def test_batch_returns_partial_results_on_deadline(self):
+        """Test that series missing the deadline are reported as errors"""
+        release = threading.Event()
+
+        def fake_fetch(series_id, frequency, timeout=30):
+            if series_id == 'SLOW':
+                release.wait(5)
+            return [{'date': '2024-01-01', 'value': '1.0'}]
+
+        try:
+            with mock.patch.object(fred_service, 'fetch_fred_data', side_effect=fake_fetch):
+                results = fred_service.fetch_fred_series_batch(
+                    [('fast', 'FAST', 'm'), ('slow', 'SLOW', 'm')], deadline=0.2
+                )
+        finally:
+            release.set()
+
+        self.assertEqual(results['fast'][0]['value'], '1.0')
+        self.assertIn('error', results['slow'])
+
+    def test_batch_reports_exceptions_per_series(self):
+        """Test that one failing series does not fail the batch"""
+        def fake_fetch(series_id, frequency, timeout=30):
+            if series_id == 'BAD':
+                raise RuntimeError('boom')
+            return []
+
+        with mock.patch.object(fred_service, 'fetch_fred_data', side_effect=fake_fetch):
+            results = fred_service.fetch_fred_series_batch(
+                [('good', 'GOOD', 'm'), ('bad', 'BAD', 'm')]
+            )
+
+        self.assertEqual(results['good'], [])
+        self.assertIn('boom', results['bad']['error'])
+
+    def test_recent_series_summary(self):
+        """Test the per-category summary built on top of the batch fetcher"""
+        observations = [{'date': f'2024-0{i}-01', 'value': str(i)} for i in range(1, 6)]
+        batch = {'Rate': observations, 'Missing': [], 'Broken': {'error': 'FRED API error: Status 400'}}
+
+        with mock.patch.object(fred_service, 'fetch_fred_series_batch', return_value=batch):
+            results = fred_service.fetch_fred_recent_series(
+                {'Rate': 'RATE', 'Missing': 'MISSING', 'Broken': 'BROKEN'},
+                lambda name: ('m', 3)
+            )
+
+        self.assertEqual(results['Rate']['latest_value'], '5')
+        self.assertEqual(len(results['Rate']['recent_data']), 3)
+        self.assertEqual(results['Missing']['error'], 'No data available')
+        self.assertEqual(results['Broken']['error'], 'FRED API error: Status 400')
+
+
+class FredObservationStoreTestCase(TestCase):
+    """Test cases for the persistent FRED observation store"""
+
+    def setUp(self):
+        """Set up stored observations"""
+        self.observations = [
+            {'date': '2024-01-01', 'value': '1.0'},
+            {'date': '2024-02-01', 'value': '2.0'},
+        ]
+
+    def test_first_fetch_is_stored(self):
+        """Test that a full download is persisted per series and frequency"""
+        with mock.patch.object(fred_service, '_request_fred_observations',
+                               return_value=self.observations) as request:
+            data = fred_service.fetch_fred_data('UNRATE', 'm')
+
+        request.assert_called_once_with('UNRATE', 'm', 30, None)
+        self.assertEqual(data, self.observations)
+        stored = FredSeries.objects.get(series_id='UNRATE', frequency='m')
+        self.assertEqual(str(stored.last_observation_date), '2024-02-01')
+
+    def test_fresh_store_skips_fred(self):
+        """Test that observations within the TTL are served without a request"""
+        FredSeries.objects.create(
+            series_id='UNRATE', frequency='m', observations=self.observations,
+            last_observation_date='2024-02-01', refreshed_at=timezone.now()
+        )
+
+        with mock.patch.object(fred_service, '_request_fred_observations') as request:
+            data = fred_service.fetch_fred_data('UNRATE', 'm')
+
+        request.assert_not_called()
+        self.assertEqual(data, self.observations)
+
+    def test_stale_store_refreshes_incrementally(self):
+        """Test that an expired entry only requests observations since the last date"""
+        FredSeries.objects.create(
+            series_id='UNRATE', frequency='m', observations=self.observations,
+            last_observation_date='2024-02-01', refreshed_at=timezone.now() - timedelta(days=2)
+        )
+        fresh = [
+            {'date': '2024-02-01', 'value': '2.5'},
+            {'date': '2024-03-01', 'value': '3.0'},
+        ]
+
+        with mock.patch.object(fred_service, '_request_fred_observations',
+                               return_value=fresh) as request:
+            data = fred_service.fetch_fred_data('UNRATE', 'm')
+
+        request.assert_called_once_with('UNRATE', 'm', 30, '2024-02-01')
+        self.assertEqual([obs['value'] for obs in data], ['1.0', '2.5', '3.0'])
+        stored = FredSeries.objects.get(series_id='UNRATE', frequency='m')
+        self.assertEqual(str(stored.last_observation_date), '2024-03-01')
+
+    def test_stale_store_served_when_fred_fails(self):
+        """Test that stored observations are served if the refresh fails"""
+        FredSeries.objects.create(
+            series_id='UNRATE', frequency='m', observations=self.observations,
+            last_observation_date='2024-02-01', refreshed_at=timezone.now() - timedelta(days=2)
+        )
+
+        with mock.patch.object(fred_service, '_request_fred_observations',
+                               return_value={'error': 'Network error: timeout'}):
+            data = fred_service.fetch_fred_data('UNRATE', 'm')
+
+        self.assertEqual(data, self.observations)
+
+
+class ProviderClientTestCase(SimpleTestCase):
+    """Test cases for the pooled provider HTTP client"""
+
+    def setUp(self):
+        """Set up a client with a small pool"""
+        self.provider = ProviderClient(timeout=(1, 2), pool_maxsize=2)
+
+    def test_session_reused_per_host(self):
+        """Test that one keep-alive session is shared per host"""
+        first = self.provider.session_for('https://financialmodelingprep.com/api/v3/quote/AAPL')
+        second = self.provider.session_for('https://financialmodelingprep.com/api/v3/profile/AAPL')
+        other = self.provider.session_for('https://data.sec.gov/submissions/CIK0000320193.json')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_first_requests_to_new_host_race(self):
+        """Test that a request racing the creation of a host's session never sees it without counters"""
+        url = 'https://financialmodelingprep.com/api/v3/quote/AAPL'
+        building = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def slow_stats(pool_maxsize):
+            building.set()
+            release.wait(2)
+            return HostStats(pool_maxsize)
+
+        def get():
+            try:
+                self.provider.get(url)
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch.object(requests.Session, 'request', return_value=mock.Mock(status_code=200)), \
+                mock.patch.object(provider_client, 'HostStats', side_effect=slow_stats):
+            first = threading.Thread(target=get)
+            first.start()
+            self.assertTrue(building.wait(2))
+            # The second request arrives while the first is still setting up the host
+            get()
+            release.set()
+            first.join(2)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.provider.stats()['financialmodelingprep.com']['requests'], 2)
+
+    def test_default_timeout_and_latency_counters(self):
+        """Test that requests get the default timeout and are counted per host"""
+        url = 'https://api.stlouisfed.org/fred/series/observations'
+        session = self.provider.session_for(url)
+        response = mock.Mock(status_code=200)
+
+        with mock.patch.object(session, 'request', return_value=response) as request:
+            self.provider.get(url, params={'series_id': 'UNRATE'})
+            self.provider.get(url, params={'series_id': 'CPIAUCSL'}, timeout=5)
+
+        self.assertEqual(request.call_args_list[0].kwargs['timeout'], (1, 2))
+        self.assertEqual(request.call_args_list[1].kwargs['timeout'], 5)
+        stats = self.provider.stats()['api.stlouisfed.org']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_pool_saturation_counted(self):
+        """Test that requests beyond the pool size are counted as saturated"""
+        url = 'https://data.sec.gov/submissions/CIK0000320193.json'
+        session = self.provider.session_for(url)
+        release = threading.Event()
+        started = threading.Barrier(4)
+
+        def slow_request(*args, **kwargs):
+            started.wait(2)
+            release.wait(2)
+            return mock.Mock(status_code=200)
+
+        with mock.patch.object(session, 'request', side_effect=slow_request):
+            threads = [threading.Thread(target=self.provider.get, args=(url,)) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            started.wait(2)
+            in_flight = self.provider.stats()['data.sec.gov']['in_flight']
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        stats = self.provider.stats()['data.sec.gov']
+        self.assertEqual(in_flight, 3)
+        self.assertEqual(stats['peak_in_flight'], 3)
+        self.assertEqual(stats['saturated'], 1)
+
+    def test_errors_counted(self):
+        """Test that failed requests are recorded and re-raised"""
+        url = 'https://financialmodelingprep.com/api/v3/quote/AAPL'
+        session = self.provider.session_for(url)
+
+        with mock.patch.object(session, 'request', side_effect=requests.ConnectionError('down')):
+            with self.assertRaises(requests.ConnectionError):
+                self.provider.get(url)
+
+        self.assertEqual(self.provider.stats()['financialmodelingprep.com']['errors'], 1)
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    """Test cases for coalescing identical upstream calls"""
+
+    def setUp(self):
+        """Set up an empty shared cache"""
+        cache.clear()
+        self.flight = SingleFlight(poll_interval=0.01)
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that concurrent callers with the same key make one upstream call"""
+        calls = []
+        release = threading.Event()
+
+        def upstream():
+            calls.append(1)
+            release.wait(2)
+            return {'symbol': 'AAPL', 'price': 190.0}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.do('quote:AAPL', upstream)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == {'symbol': 'AAPL', 'price': 190.0} for result in results))
+
+    def test_followers_get_private_copies(self):
+        """Test that a caller modifying its result does not affect other callers"""
+        release = threading.Event()
+
+        def upstream():
+            release.wait(2)
+            return {'history': [1, 2, 3]}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.do('history:AAPL', upstream)))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        results[0]['history'].append(4)
+        self.assertEqual(results[1]['history'], [1, 2, 3])
+        self.assertEqual(results[2]['history'], [1, 2, 3])
+
+    def test_errors_propagate_to_all_callers(self):
+        """Test that an upstream failure is raised to every waiting caller"""
+        release = threading.Event()
+
+        def upstream():
+            release.wait(2)
+            raise ValueError('rate limited')
+
+        errors = []
+
+        def caller():
+            try:
+                self.flight.do('quote:MSFT', upstream)
+            except ValueError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=caller) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, ['rate limited'] * 3)
+
+    def test_other_worker_result_used_from_cache(self):
+        """Test that a caller waits for the result published by the worker holding the lock"""
+        flight = SingleFlight(poll_interval=0.01)
+        upstream = mock.Mock(return_value='fetched here')
+        digest = hashlib.sha1(b'quote:NVDA').hexdigest()
+        cache.add(f'singleflight:{digest}:lock', 1, 30)
+
+        def other_worker():
+            time.sleep(0.05)
+            cache.set(f'singleflight:{digest}:result', 'fetched elsewhere', 5)
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        result = flight.do('quote:NVDA', upstream)
+        thread.join()
+
+        upstream.assert_not_called()
+        self.assertEqual(result, 'fetched elsewhere')
+
+    def test_decorator_ignores_self(self):
+        """Test that decorated methods coalesce across instances"""
+        class Service:
+            @single_flight('test.quote')
+            def get_quote(self, ticker):
+                return ticker
+
+        with mock.patch.object(single_flight_module.upstream_flight, 'do', return_value='AAPL') as do:
+            Service().get_quote('AAPL')
+            Service().get_quote('AAPL')
+
+        keys = [call.args[0] for call in do.call_args_list]
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(keys[0], "test.quote:('AAPL',):[]")
+
+
+class PriceHistoryCacheTestCase(SimpleTestCase):
+    """Test cases for the FMP historical price cache"""
+
+    def setUp(self):
+        """Set up an FMP service with empty caches"""
+        cache.clear()
+        fmp_service_module.price_history_cache.clear()
+        with mock.patch.dict('os.environ', {'FMP_API_KEY': 'test'}):
+            self.service = fmp_service_module.FMPService()
+        self.today = datetime.now().date()
+
+    def _bars(self, start, end):
+        dates = pd.date_range(start, end, freq='D')
+        return pd.DataFrame({
+            'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100
+        }, index=pd.Index(dates, name='date'))
+
+    def test_shorter_period_served_from_longer_history(self):
+        """Test that a shorter period is sliced from the cached longer history"""
+        fetch = mock.Mock(side_effect=lambda ticker, start, end: self._bars(start, end))
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            long_df = self.service.get_historical_price_data('AAPL', period='5y')
+            short_df = self.service.get_historical_price_data('AAPL', period='6mo')
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertLess(len(short_df), len(long_df))
+        self.assertGreaterEqual(short_df.index.min(), pd.Timestamp(self.today - timedelta(days=180)))
+
+    def test_longer_period_fetches_only_missing_older_bars(self):
+        """Test that extending the period only requests the uncovered range"""
+        fetch = mock.Mock(side_effect=lambda ticker, start, end: self._bars(start, end))
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            self.service.get_historical_price_data('AAPL', period='6mo')
+            df = self.service.get_historical_price_data('AAPL', period='1y')
+
+        older_start, older_end = fetch.call_args_list[1].args[1:]
+        self.assertEqual(older_start, self.today - timedelta(days=365))
+        self.assertEqual(older_end, self.today - timedelta(days=181))
+        self.assertEqual(len(df), 366)
+        self.assertTrue(df.index.is_monotonic_increasing)
+
+    def _cache_history(self, end, refreshed_ago, fetched_ago=0):
+        start = self.today - timedelta(days=180)
+        fmp_service_module.price_history_cache.set('AAPL', {
+            'frame': self._bars(start, end),
+            'start': start,
+            'refreshed_at': time.time() - refreshed_ago,
+            'fetched_at': time.time() - fetched_ago,
+        })
+        return start
+
+    def test_stale_history_appends_new_bars(self):
+        """Test that a stale entry only fetches bars since the last completed cached date"""
+        yesterday = self.today - timedelta(days=1)
+        self._cache_history(yesterday, fmp_service_module.HISTORY_REFRESH_INTERVAL + 1)
+
+        fetch = mock.Mock(side_effect=lambda ticker, start, end: self._bars(start, end))
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            df = self.service.get_historical_price_data('AAPL', period='6mo')
+
+        fetch.assert_called_once_with('AAPL', yesterday - timedelta(days=1), self.today)
+        self.assertEqual(df.index.max(), pd.Timestamp(self.today))
+        self.assertFalse(df.index.duplicated().any())
+
+    def test_adjusted_close_refetches_history(self):
+        """Test that a changed close on an already cached bar triggers a full refetch"""
+        yesterday = self.today - timedelta(days=1)
+        start = self._cache_history(yesterday, fmp_service_module.HISTORY_REFRESH_INTERVAL + 1)
+
+        def split(ticker, start, end):
+            bars = self._bars(start, end)
+            bars['close'] = 0.75
+            return bars
+
+        fetch = mock.Mock(side_effect=split)
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            df = self.service.get_historical_price_data('AAPL', period='6mo')
+
+        self.assertEqual(fetch.call_args_list[-1], mock.call('AAPL', start, self.today))
+        self.assertTrue((df['close'] == 0.75).all())
+
+    def test_old_history_refetched_in_full(self):
+        """Test that a history past its max age is refetched in full at its next refresh"""
+        start = self._cache_history(
+            self.today, fmp_service_module.HISTORY_REFRESH_INTERVAL + 1, fmp_service_module.HISTORY_MAX_AGE + 1
+        )
+
+        fetch = mock.Mock(side_effect=lambda ticker, start, end: self._bars(start, end))
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            self.service.get_historical_price_data('AAPL', period='6mo')
+            self.service.get_historical_price_data('AAPL', period='6mo')
+
+        fetch.assert_called_once_with('AAPL', start, self.today)
+
+    def test_empty_refetch_keeps_cached_history(self):
+        """Test that a full refetch returning no bars keeps the cached history and isn't retried at once"""
+        self._cache_history(
+            self.today, fmp_service_module.HISTORY_REFRESH_INTERVAL + 1, fmp_service_module.HISTORY_MAX_AGE + 1
+        )
+
+        fetch = mock.Mock(return_value=pd.DataFrame())
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            first = self.service.get_historical_price_data('AAPL', period='6mo')
+            second = self.service.get_historical_price_data('AAPL', period='6mo')
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(len(first), 181)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_empty_refetch_after_adjustment_keeps_cached_history(self):
+        """Test that an adjustment followed by an empty full refetch keeps the cached history"""
+        yesterday = self.today - timedelta(days=1)
+        self._cache_history(yesterday, fmp_service_module.HISTORY_REFRESH_INTERVAL + 1)
+
+        def adjusted_then_empty(ticker, start, end):
+            if fetch.call_count > 1:
+                return pd.DataFrame()
+            bars = self._bars(start, end)
+            bars['close'] = 0.75
+            return bars
+
+        fetch = mock.Mock(side_effect=adjusted_then_empty)
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            df = self.service.get_historical_price_data('AAPL', period='6mo')
+
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(df.index.max(), pd.Timestamp(yesterday))
+        self.assertTrue((df['close'] == 1.5).all())
+
+    def test_history_shared_through_django_cache(self):
+        """Test that another process can reuse a history from the shared cache"""
+        fetch = mock.Mock(side_effect=lambda ticker, start, end: self._bars(start, end))
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            self.service.get_historical_price_data('MSFT', period='1y')
+            fmp_service_module.price_history_cache.clear()  # simulate another worker
+            df = self.service.get_historical_price_data('MSFT', period='6mo')
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertFalse(df.empty)
+
+    def test_returned_frames_do_not_alias_cache(self):
+        """Test that callers modifying the result do not corrupt the cache"""
+        fetch = mock.Mock(side_effect=lambda ticker, start, end: self._bars(start, end))
+        with mock.patch.object(self.service, '_fetch_history_range', fetch):
+            df = self.service.get_historical_price_data('AAPL', period='6mo')
+            df['close'] = 0.0
+            again = self.service.get_historical_price_data('AAPL', period='6mo')
+
+        self.assertTrue((again['close'] == 1.5).all())
+
+
+class OHLCVSerializerTestCase(SimpleTestCase):
+    """Test cases for the vectorized OHLCV serializer"""
+
+    def setUp(self):
+        """Set up a yfinance-style frame with one invalid row"""
+        self.df = pd.DataFrame({
+            'Open': [10.123, float('nan'), 12.0],
+            'High': [11.456, 12.0, 13.0],
+            'Low': [9.999, 10.0, 11.0],
+            'Close': [10.5, 11.0, 12.556],
+            'Volume': [1000.0, 2000.0, float('nan')],
+        }, index=pd.DatetimeIndex(['2024-01-02', '2024-01-03', '2024-01-04'], name='Date'))
+
+    def test_rows_rounded_and_masked(self):
+        """Test rounding, date formatting and dropping rows with missing prices"""
+        data = serialize_ohlcv(self.df)
+
+        self.assertEqual(data, [
+            {'date': '2024-01-02', 'open': 10.12, 'high': 11.46, 'low': 10.0, 'close': 10.5, 'volume': 1000},
+            {'date': '2024-01-04', 'open': 12.0, 'high': 13.0, 'low': 11.0, 'close': 12.56, 'volume': 0},
+        ])
+
+    def test_field_order_and_volume_filter(self):
+        """Test custom key order and dropping rows with missing volume"""
+        data = serialize_ohlcv(
+            self.df, volume_filter='positive', fields=('close', 'open', 'high', 'low', 'volume')
+        )
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(list(data[0]), ['date', 'close', 'open', 'high', 'low', 'volume'])
+
+    def test_positive_prices(self):
+        """Test that non-positive prices are dropped when requested"""
+        df = self.df.copy()
+        df.iloc[0, df.columns.get_loc('Low')] = 0.0
+
+        self.assertEqual([row['date'] for row in serialize_ohlcv(df, positive_prices=True)], ['2024-01-04'])
+
+    def test_empty_frame(self):
+        """Test that an empty frame serializes to no rows"""
+        self.assertEqual(serialize_ohlcv(pd.DataFrame()), [])
+
+
+class YFinanceEndpointTestCase(SimpleTestCase):
+    """Test cases for the structured yfinance data helpers and their endpoints"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.df = pd.DataFrame({
+            'Open': [10.0, 11.0],
+            'High': [11.0, 12.0],
+            'Low': [9.5, 10.5],
+            'Close': [10.5, 11.5],
+            'Volume': [1000.0, 2000.0],
+        }, index=pd.DatetimeIndex(['2024-01-02', '2024-01-03'], name='Date'))
+
+    def post(self, view):
+        return view(self.factory.post('/', {'ticker': 'aapl'}))
+
+    def test_helper_returns_rows(self):
+        """Test that data helpers return rows rather than a JSON string"""
+        with mock.patch.object(yfinance_service, 'get_yf_history', return_value=self.df):
+            data = yfinance_service.yfinance_weekly_data('AAPL')
+
+        self.assertIsInstance(data, list)
+        self.assertEqual(data[0]['close'], 10.5)
+
+    def test_daily_error_raised(self):
+        """Test that the daily helper signals missing data with MarketDataError"""
+        with mock.patch.object(yfinance_service, 'get_yf_history', return_value=pd.DataFrame()), \
+                mock.patch.object(yfinance_service.fmp_service, 'get_historical_price_data',
+                                  return_value=pd.DataFrame()):
+            with self.assertRaisesMessage(yfinance_service.MarketDataError, 'No data available'):
+                yfinance_service.yfinance_daily_data('AAPL')
+
+    def test_endpoint_payload(self):
+        """Test the endpoint response body and error status"""
+        with mock.patch.object(yfinance_service, 'get_yf_history', return_value=self.df):
+            response = self.post(yfinance_service.yfinance_daily_api)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {
+            'ticker': 'AAPL',
+            'data': [
+                {'date': '2024-01-02', 'close': 10.5, 'open': 10.0, 'high': 11.0, 'low': 9.5, 'volume': 1000},
+                {'date': '2024-01-03', 'close': 11.5, 'open': 11.0, 'high': 12.0, 'low': 10.5, 'volume': 2000},
+            ],
+        })
+
+        with mock.patch.object(yfinance_service, 'get_yf_history', side_effect=ValueError('boom')):
+            response = self.post(yfinance_service.yfinance_monthly_api)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(json.loads(response.content), {'error': 'boom'})
+
+    def test_fast_json_response(self):
+        """Test that FastJsonResponse encodes NumPy values and keeps JsonResponse's safe check"""
+        response = FastJsonResponse({'value': np.float64(1.5), 'count': np.int64(3), 'day': date(2024, 1, 2)})
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {'value': 1.5, 'count': 3, 'day': '2024-01-02'})
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+
+
+class PriceTargetViewTestCase(SimpleTestCase):
+    """Test cases for caching of AI price targets"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.generate = mock.Mock(return_value='{"price_target": 200.0, "rationale": "Steady growth."}')
+        self.llm_cache = LLMResponseCache(generate=self.generate)
+        self.hist = pd.DataFrame(
+            {'close': [180.0, 185.0]},
+            index=pd.DatetimeIndex(['2026-10-15', '2026-10-16'], name='date')
+        )
+        self.quotes = iter([{'price': 186.1}, {'price': 186.4}, {'price': 186.9}])
+
+    def post(self):
+        with mock.patch.object(views, 'llm_cache', self.llm_cache), \
+                mock.patch.multiple(views, AZURE_OPENAI_KEY='key', MODEL_NAME='gpt', AZURE_OPENAI_ENDPOINT='https://example'), \
+                mock.patch.object(views.fmp_service, 'get_stock_quote', side_effect=lambda ticker: next(self.quotes)), \
+                mock.patch.object(views.fmp_service, 'get_company_profile', return_value={'pe': 30, 'beta': 1.2}), \
+                mock.patch.object(views.fmp_service, 'get_historical_price_data', return_value=self.hist):
+            request = self.factory.post('/', json.dumps({'ticker': 'aapl'}), content_type='application/json')
+            return json.loads(views.price_target_view(request).content)
+
+    def test_cached_per_trading_day(self):
+        """Test that requests with moving prices on the same trading day share one model call"""
+        first = self.post()
+        second = self.post()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first['price_target'], 200.0)
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_parsing_fallback_not_cached(self):
+        """Test that an unparseable answer falls back without being cached"""
+        self.generate.side_effect = ['I cannot provide a price target.', '{"price_target": 200.0, "rationale": "Steady growth."}']
+
+        fallback = self.post()
+        retried = self.post()
+
+        self.assertEqual(fallback['rationale'], 'Model parsing fallback.')
+        self.assertEqual(retried['price_target'], 200.0)
+        self.assertEqual(self.generate.call_count, 2)
+
+
+class CIKIndexTestCase(SimpleTestCase):
+    """Test cases for the in-memory ticker -> CIK index"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cik.csv')
+        with open(self.path, 'w') as f:
+            f.write("aapl\t320193\nmsft\t789019\naapl\t1\n")
+        self.index = sec_service.CIKIndex(self.path, check_interval=0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lookup(self):
+        """Test padded CIKs, case-insensitive tickers and first-entry-wins for duplicates"""
+        self.assertEqual(self.index.lookup('AAPL'), '0000320193')
+        self.assertEqual(self.index.lookup(' msft '), '0000789019')
+        self.assertIsNone(self.index.lookup('ZZZZ'))
+
+    def test_hot_reload(self):
+        """Test that a changed file is picked up without restarting"""
+        self.assertEqual(len(self.index), 2)
+
+        with open(self.path, 'w') as f:
+            f.write("nvda\t1045810\n")
+        os.utime(self.path, (time.time() + 10, time.time() + 10))
+
+        self.assertEqual(self.index.lookup('NVDA'), '0001045810')
+        self.assertIsNone(self.index.lookup('AAPL'))
+
+    def test_refresh_from_sec(self):
+        """Test rebuilding the file from SEC's company_tickers.json"""
+        response = mock.Mock()
+        response.json.return_value = {
+            '0': {'cik_str': 320193, 'ticker': 'AAPL', 'title': 'Apple Inc.'},
+            '1': {'cik_str': 1067983, 'ticker': 'BRK-B', 'title': 'Berkshire Hathaway'},
+        }
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=response):
+            count = sec_service.refresh_cik_index(self.index)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(self.index.lookup('brk-b'), '0001067983')
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "aapl\t320193\nbrk-b\t1067983\n")
+
+    def test_get_cik(self):
+        """Test get_CIK against the shipped index"""
+        self.assertEqual(sec_service.get_CIK('AAPL'), '0000320193')
+        self.assertFalse(sec_service.get_CIK('NOT-A-TICKER').isdigit())
+
+
+class SECCompanyFactsTestCase(SimpleTestCase):
+    """Test cases for the streamed, filtered SEC company facts endpoint"""
+
+    document = {
+        'cik': 320193,
+        'entityName': 'Apple Inc.',
+        'facts': {
+            'dei': {
+                'EntityCommonStockSharesOutstanding': {
+                    'label': 'Shares Outstanding', 'description': 'Shares',
+                    'units': {'shares': [
+                        {'end': '2023-10-20', 'val': 15552752000, 'accn': 'a1', 'fy': 2023, 'fp': 'FY',
+                         'form': '10-K', 'filed': '2023-11-03'},
+                    ]},
+                },
+            },
+            'us-gaap': {
+                'Revenues': {
+                    'label': 'Revenues', 'description': 'Revenue',
+                    'units': {'USD': [
+                        {'start': '2021-10-01', 'end': '2022-09-24', 'val': 394328000000, 'accn': 'a0',
+                         'fy': 2022, 'fp': 'FY', 'form': '10-K', 'filed': '2022-10-28', 'frame': 'CY2022'},
+                        {'start': '2022-09-25', 'end': '2023-09-30', 'val': 383285000000, 'accn': 'a1',
+                         'fy': 2023, 'fp': 'FY', 'form': '10-K', 'filed': '2023-11-03'},
+                    ]},
+                },
+                'NetIncomeLoss': {
+                    'label': 'Net Income', 'description': 'Profit',
+                    'units': {'USD': [
+                        {'start': '2022-09-25', 'end': '2023-09-30', 'val': 96995000000.5, 'accn': 'a1',
+                         'fy': 2023, 'fp': 'FY', 'form': '10-K', 'filed': '2023-11-03'},
+                    ]},
+                },
+            },
+        },
+    }
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        sec_service.company_facts_cache.clear()
+
+    def get(self, **params):
+        upstream = mock.Mock(status_code=200, raw=io.BytesIO(json.dumps(self.document).encode()))
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=upstream) as get:
+            response = sec_service.get_sec_company_facts_api(self.factory.get('/', {'ticker': 'aapl', **params}))
+            body = json.loads(b''.join(response.streaming_content)) if response.streaming else None
+        return response, body, get
+
+    def test_unfiltered_matches_sec_document(self):
+        """Test that an unfiltered request streams SEC's facts unchanged"""
+        response, body, _ = self.get()
+
+        self.assertEqual(body, {
+            'ticker': 'AAPL',
+            'cik': '0000320193',
+            'facts': self.document['facts'],
+            'company_name': 'Apple Inc.',
+            'status': 'success',
+        })
+
+    def test_filters(self):
+        """Test taxonomy, concept, unit and period-end filters"""
+        _, body, _ = self.get(taxonomy='us-gaap', concept='revenues', unit='usd', from_date='2023-01-01')
+
+        self.assertEqual(list(body['facts']), ['us-gaap'])
+        self.assertEqual(list(body['facts']['us-gaap']), ['Revenues'])
+        self.assertEqual([row['end'] for row in body['facts']['us-gaap']['Revenues']['units']['USD']], ['2023-09-30'])
+
+        _, body, _ = self.get(taxonomy='dei', to_date='2020-01-01')
+        self.assertEqual(body['facts'], {})
+
+    def test_columnar_cache(self):
+        """Test that facts are cached per CIK in columnar form and reused"""
+        self.get()
+        entry = sec_service.company_facts_cache.get('0000320193')
+        self.assertEqual(entry['facts']['us-gaap']['Revenues']['units']['USD']['val'], [394328000000, 383285000000])
+        self.assertEqual(entry['facts']['us-gaap']['Revenues']['units']['USD']['frame'], ['CY2022', None])
+        self.assertNotIn('frame', entry['facts']['dei']['EntityCommonStockSharesOutstanding']['units']['shares'])
+
+        _, body, get = self.get(concept='NetIncomeLoss')
+        get.assert_not_called()
+        self.assertEqual(body['facts']['us-gaap']['NetIncomeLoss']['units']['USD'][0]['val'], 96995000000.5)
+
+    def test_bad_date(self):
+        """Test that malformed dates are rejected before calling SEC"""
+        response, _, get = self.get(from_date='2023/01/01')
+
+        self.assertEqual(response.status_code, 400)
+        get.assert_not_called()
+
+
+class SECSubmissionsCacheTestCase(SimpleTestCase):
+    """Test cases for the cached SEC submissions index and the shared SEC rate limiter"""
+
+    recent = {
+        'accessionNumber': ['0000320193-23-000106'],
+        'filingDate': ['2023-11-03'],
+        'reportDate': ['2023-09-30'],
+        'form': ['10-K'],
+        'primaryDocument': ['aapl-20230930.htm'],
+        'primaryDocDescription': ['10-K'],
+        'items': [''],
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def upstream(self, status_code, recent=None):
+        response = mock.Mock(status_code=status_code, headers={'ETag': '"v1"', 'Last-Modified': 'Fri, 03 Nov 2023'})
+        response.json.return_value = {'filings': {'recent': recent or {}}}
+        return response
+
+    def expire(self, cik):
+        key = f'sec:submissions:{cik}'
+        cache.set(key, {**cache.get(key), 'checked_at': 0})
+
+    def test_cached_and_revalidated(self):
+        """Test that fresh entries skip SEC and stale ones revalidate with a conditional GET"""
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=self.upstream(200, self.recent)) as get:
+            first = sec_service.get_recent_filings('0000320193')
+            second = sec_service.get_recent_filings('0000320193')
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertNotIn('items', first)
+
+        self.expire('0000320193')
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=self.upstream(304)) as get:
+            self.assertEqual(sec_service.get_recent_filings('0000320193'), first)
+
+        headers = get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Fri, 03 Nov 2023')
+        self.assertIn('User-Agent', headers)
+
+    def test_errors(self):
+        """Test serving the cached index when SEC fails, and raising when nothing is cached"""
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=self.upstream(503)):
+            with self.assertRaises(sec_service.SECRequestError) as ctx:
+                sec_service.get_recent_filings('0000320193')
+        self.assertEqual(ctx.exception.status_code, 503)
+
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=self.upstream(200, self.recent)):
+            sec_service.get_recent_filings('0000320193')
+        self.expire('0000320193')
+        with mock.patch.object(sec_service.provider_client, 'get', side_effect=requests.ConnectionError('down')):
+            self.assertEqual(sec_service.get_recent_filings('0000320193')['form'], ['10-K'])
+
+    def test_filings_view(self):
+        """Test the filings endpoint built from the cached index"""
+        request = RequestFactory().get('/', {'ticker': 'aapl'})
+        with mock.patch.object(sec_service.provider_client, 'get', return_value=self.upstream(200, self.recent)):
+            response = sec_service.get_sec_filings_api(request)
+
+        self.assertEqual(json.loads(response.content)['filings'], [{
+            'form': '10-K',
+            'date': '2023-11-03',
+            'url': 'https://www.sec.gov/Archives/edgar/data/320193/000032019323000106/aapl-20230930.htm',
+        }])
+
+    def test_rate_limiter(self):
+        """Test that requests beyond the per-second budget are refused once max_wait is exhausted"""
+        limiter = sec_service.SECRateLimiter(rate=2, max_wait=0)
+        with mock.patch.object(sec_service.time, 'time', return_value=1000.5):
+            limiter.acquire()
+            limiter.acquire()
+            with self.assertRaises(sec_service.SECRequestError) as ctx:
+                limiter.acquire()
+
+        self.assertEqual(ctx.exception.status_code, 503)
+
+
+class EarningsInsightsEngineTestCase(SimpleTestCase):
+    """Test cases for the batched earnings insights engine"""
+
+    histories = {
+        'BEAT': [
+            {'date': '2024-05-02', 'quarter': 'Q2', 'epsEstimated': 1.0, 'eps': 1.2,
+             'revenueEstimated': 100.0, 'revenueActual': 110.0},
+            {'date': '2024-02-01', 'epsEstimated': 0.9, 'eps': 1.0},
+        ],
+        'MISS': [
+            {'date': '2024-05-03', 'quarter': 'Q2', 'epsEstimated': 2.0, 'eps': 1.5,
+             'revenueEstimated': 100.0, 'revenueActual': 90.0},
+            {'date': '2024-02-02', 'epsEstimated': 2.5, 'eps': 2.5},
+        ],
+        'SOON': [{'date': '2024-08-01', 'quarter': 'Q3', 'epsEstimated': 0.5, 'eps': None}],
+        'EMPTY': [],
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def fake_history(self, symbol):
+        if symbol == 'BOOM':
+            raise requests.ConnectionError('down')
+        return self.histories.get(symbol)
+
+    def test_aggregates(self):
+        """Test beat/miss, guidance and averages over a batch"""
+        with mock.patch.object(earnings_service, 'get_earnings_history', side_effect=self.fake_history):
+            insights = earnings_service.build_earnings_insights(['BEAT', 'MISS', 'SOON', 'EMPTY', 'BOOM'])
+
+        self.assertEqual(insights['symbols_analyzed'], 3)
+        self.assertEqual(insights['earnings'], {'beat': 1, 'missed': 1, 'inline': 0, 'beat_rate': 50.0, 'miss_rate': 50.0})
+        self.assertEqual(insights['guidance'], {
+            'raised': 1, 'lowered': 1, 'beat_expectations': 0, 'miss_expectations': 2, 'accuracy': 77.5,
+        })
+        self.assertEqual(insights['avg_surprise'], -2.5)
+        self.assertEqual(insights['avg_revenue_growth'], 0.0)
+
+        companies = {company['symbol']: company for company in insights['companies']}
+        self.assertEqual(list(companies), ['BEAT', 'MISS', 'SOON', 'EMPTY', 'BOOM'])
+        self.assertEqual(companies['BEAT']['surprise_percentage'], 20.0)
+        self.assertEqual(companies['BEAT']['guidance_direction'], 'raised')
+        self.assertEqual(companies['BEAT']['kpi_score'], 2)
+        self.assertEqual(companies['SOON']['earnings_status'], 'not_reported')
+        self.assertEqual(companies['SOON']['type'], 'upcoming')
+        self.assertNotIn('guidance_direction', companies['SOON'])
+        self.assertEqual(companies['EMPTY']['status'], 'no_data')
+        self.assertEqual(companies['BOOM'], {'symbol': 'BOOM', 'status': 'error', 'error': 'down'})
+
+    def test_surprise_matches_scalar_helper(self):
+        """Test that the vectorized surprise follows calculate_earnings_surprise_percentage"""
+        pairs = [(1.2, 1.0), (-0.5, -1.0), (0.5, 0.0), (-0.5, 0.0), (0.0, 0.0), (100.0, 1.0), (-0.1, 0.2)]
+        frame = pd.DataFrame({
+            'eps_actual': [a for a, _ in pairs], 'eps_estimated': [e for _, e in pairs],
+            'revenue_estimated': None, 'revenue_actual': None,
+            'prev_eps_estimated': None, 'prev_eps_actual': None, 'has_previous': False,
+        })
+
+        result = earnings_service.analyze_earnings_frame(frame)
+
+        for (actual, estimated), surprise in zip(pairs, result['surprise_percentage']):
+            self.assertAlmostEqual(surprise, earnings_service.calculate_earnings_surprise_percentage(actual, estimated))
+
+    def test_history_shared_cache(self):
+        """Test that histories are fetched once and then served from the shared cache"""
+        response = mock.Mock(status_code=200)
+        response.json.return_value = self.histories['BEAT']
+        with mock.patch.object(earnings_service.provider_client, 'get', return_value=response) as get:
+            histories = earnings_service.get_earnings_histories(['BEAT', 'BEAT'])
+            earnings_service.get_earnings_history('BEAT')
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(histories, {'BEAT': self.histories['BEAT']})
+
+
+class EarningsCalendarStoreTestCase(TestCase):
+    """Test cases for the date-partitioned earnings calendar store"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+        self.calendar = [
+            {'symbol': 'AAPL', 'date': self.yesterday.isoformat(), 'eps': 1.5, 'epsEstimated': 1.4},
+            {'symbol': 'MSFT', 'date': self.today.isoformat(), 'eps': None, 'epsEstimated': 2.8},
+        ]
+
+    def fake_request(self, start, end):
+        return [e for e in self.calendar if start.isoformat() <= e['date'] <= end.isoformat()]
+
+    def test_partitions_reused(self):
+        """Test that stored days are assembled locally and only missing days are fetched"""
+        with mock.patch.object(earnings_service, '_request_earnings_calendar', side_effect=self.fake_request) as request:
+            first = earnings_service.get_earnings_calendar(self.yesterday, self.today)
+            second = earnings_service.get_earnings_calendar(self.yesterday - timedelta(days=2), self.today)
+
+        self.assertEqual([e['symbol'] for e in first], ['AAPL', 'MSFT'])
+        self.assertEqual(second, first)
+        self.assertEqual(request.call_args_list, [
+            mock.call(self.yesterday, self.today),
+            mock.call(self.yesterday - timedelta(days=2), self.yesterday - timedelta(days=1)),
+        ])
+        self.assertEqual(EarningsCalendarDay.objects.count(), 4)
+        self.assertTrue(EarningsCalendarDay.objects.get(day=self.today).has_pending)
+
+    def test_upcoming_days_refresh_sooner(self):
+        """Test that pending days go stale before settled past days"""
+        with mock.patch.object(earnings_service, '_request_earnings_calendar', side_effect=self.fake_request):
+            earnings_service.get_earnings_calendar(self.yesterday, self.today)
+
+        three_hours_ago = timezone.now() - timedelta(hours=3)
+        EarningsCalendarDay.objects.update(refreshed_at=three_hours_ago)
+
+        with mock.patch.object(earnings_service, '_request_earnings_calendar', side_effect=self.fake_request) as request:
+            earnings_service.get_earnings_calendar(self.yesterday, self.today)
+
+        request.assert_called_once_with(self.today, self.today)
+
+    def test_stale_days_served_when_fmp_fails(self):
+        """Test serving stored days when FMP fails, and failing for days never stored"""
+        with mock.patch.object(earnings_service, '_request_earnings_calendar', side_effect=self.fake_request):
+            earnings_service.get_earnings_calendar(self.yesterday, self.today)
+        EarningsCalendarDay.objects.update(refreshed_at=timezone.now() - timedelta(days=30))
+
+        failure = earnings_service.EarningsCalendarError('API error: 503', 503)
+        with mock.patch.object(earnings_service, '_request_earnings_calendar', side_effect=failure):
+            self.assertEqual(len(earnings_service.get_earnings_calendar(self.yesterday, self.today)), 2)
+            with self.assertRaises(earnings_service.EarningsCalendarError):
+                earnings_service.get_earnings_calendar(self.today, self.today + timedelta(days=1))
+
+    def test_date_runs(self):
+        """Test grouping days into contiguous runs capped at the request span"""
+        start = date(2024, 1, 1)
+        days = [start + timedelta(days=i) for i in (0, 1, 2, 5, 6)]
+
+        self.assertEqual(earnings_service._date_runs(days), [
+            (date(2024, 1, 1), date(2024, 1, 3)), (date(2024, 1, 6), date(2024, 1, 7)),
+        ])
+        self.assertEqual(earnings_service._date_runs(days, max_span=2), [
+            (date(2024, 1, 1), date(2024, 1, 2)), (date(2024, 1, 3), date(2024, 1, 3)),
+            (date(2024, 1, 6), date(2024, 1, 7)),
+        ])
+
+
+class NYSECorrelationMatrixTestCase(SimpleTestCase):
+    """Test cases for the precomputed NYSE correlation matrix"""
+
+    def setUp(self):
+        cache.clear()
+        rng = np.random.default_rng(7)
+        market = rng.standard_normal(80)
+        dates = pd.bdate_range('2024-01-01', periods=81)
+
+        def prices(returns):
+            return 100 * np.cumprod(np.concatenate([[1.0], 1 + returns / 100]))
+
+        self.closes = pd.DataFrame({
+            'AAPL': prices(market + 0.1 * rng.standard_normal(80)),
+            'MSFT': prices(market + 0.5 * rng.standard_normal(80)),
+            'XOM': prices(rng.standard_normal(80)),
+            'KO': prices(-market + 0.3 * rng.standard_normal(80)),
+        }, index=dates)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_matrix_matches_pairwise_corr(self):
+        """Test that matrix entries equal the pairwise Pearson correlation of daily returns"""
+        matrix = nyse_stocks_service.build_correlation_matrix(self.closes)
+        returns = self.closes.pct_change().dropna()
+
+        self.assertEqual(matrix.data_points, 80)
+        self.assertAlmostEqual(matrix.pair('AAPL', 'KO'), returns['AAPL'].corr(returns['KO']), places=5)
+        self.assertAlmostEqual(matrix.pair('MSFT', 'MSFT'), 1.0, places=5)
+        self.assertIsNone(matrix.pair('AAPL', 'GE'))
+
+    def test_sparse_tickers_dropped(self):
+        """Test that tickers missing too many days are left out rather than shrinking the window"""
+        closes = self.closes.copy()
+        closes.loc[closes.index[:40], 'XOM'] = np.nan
+
+        matrix = nyse_stocks_service.build_correlation_matrix(closes)
+
+        self.assertNotIn('XOM', matrix)
+        self.assertEqual(matrix.data_points, 80)
+
+    def test_top_k(self):
+        """Test most and least correlated ordering"""
+        matrix = nyse_stocks_service.build_correlation_matrix(self.closes)
+
+        self.assertEqual([t for t, _ in matrix.top('AAPL', 2)], ['MSFT', 'XOM'])
+        self.assertEqual([t for t, _ in matrix.top('AAPL', 1, least=True)], ['KO'])
+        self.assertEqual(len(matrix.top('AAPL', 10)), 3)
+
+    def test_service_shares_matrix(self):
+        """Test that a refreshed matrix is published and answers pair requests without FMP calls"""
+        def history(ticker, period):
+            return pd.DataFrame({'close': self.closes[ticker]})
+
+        builder = nyse_stocks_service.NYSECorrelationService(list(self.closes.columns))
+        with mock.patch.object(nyse_stocks_service.fmp_service, 'get_historical_price_data', side_effect=history):
+            builder.refresh()
+
+        reader = nyse_stocks_service.NYSECorrelationService()
+        request = RequestFactory().post('/', {'ticker1': 'AAPL', 'ticker2': 'KO'})
+        with mock.patch.object(nyse_stocks_service, 'nyse_correlation_service', reader), \
+                mock.patch.object(nyse_stocks_service.fmp_service, 'get_historical_price_data') as fmp:
+            body = json.loads(nyse_stocks_service.get_stock_correlation_api(request).content)
+            top = json.loads(nyse_stocks_service.get_top_correlations_api(
+                RequestFactory().get('/', {'ticker': 'AAPL', 'k': 1})
+            ).content)
+
+        fmp.assert_not_called()
+        self.assertEqual(body['correlation']['direction'], 'Negative')
+        self.assertEqual(body['ticker1']['name'], 'Apple Inc.')
+        self.assertEqual(top['most_correlated'][0]['symbol'], 'MSFT')
+        self.assertEqual(top['least_correlated'][0]['symbol'], 'KO')
+
+    def test_old_matrix_rebuilt_in_background(self):
+        """Test that a matrix past its max age is still served while a rebuild starts, once across workers"""
+        matrix = nyse_stocks_service.build_correlation_matrix(self.closes)
+        matrix.built_at = time.time() - nyse_stocks_service.CORRELATION_MAX_AGE - 60
+        cache.set(nyse_stocks_service.CORRELATION_CACHE_KEY, matrix.to_dict())
+        rebuilding = threading.Event()
+        release = threading.Event()
+
+        def refresh():
+            rebuilding.set()
+            release.wait(5)
+
+        first = nyse_stocks_service.NYSECorrelationService()
+        second = nyse_stocks_service.NYSECorrelationService()
+        with mock.patch.object(first, 'refresh', side_effect=refresh), \
+                mock.patch.object(second, 'refresh') as second_refresh:
+            served = first.current()
+            self.assertTrue(rebuilding.wait(5))
+            second.current()
+            release.set()
+            first._refresh_thread.join(5)
+
+        self.assertEqual(served.built_at, matrix.built_at)
+        second_refresh.assert_not_called()
+
+    def test_fresh_matrix_not_rebuilt(self):
+        """Test that a matrix within its max age doesn't trigger a rebuild"""
+        cache.set(nyse_stocks_service.CORRELATION_CACHE_KEY,
+                  nyse_stocks_service.build_correlation_matrix(self.closes).to_dict())
+        service = nyse_stocks_service.NYSECorrelationService()
+
+        with mock.patch.object(service, 'refresh_in_background') as refresh:
+            self.assertIsNotNone(service.current())
+
+        refresh.assert_not_called()
+
+
+class SectorCorrelationPanelTestCase(SimpleTestCase):
+    """Test cases for the cached price panel behind the sector correlation matrix"""
+
+    def setUp(self):
+        cache.clear()
+        index = pd.bdate_range('2024-01-01', periods=60)
+        rng = np.random.default_rng(3)
+        self.histories = {
+            ticker: pd.DataFrame({'Close': 100 + rng.standard_normal(60).cumsum()}, index=index)
+            for ticker in set(sector_analysis_service.SECTOR_REPRESENTATIVES.values())
+        }
+
+    def history(self, ticker, period, interval):
+        return self.histories[ticker]
+
+    def test_returns_panel_cached(self):
+        """Test that the returns panel is downloaded once and reused"""
+        with mock.patch.object(price_panel, 'get_yf_history', side_effect=self.history) as history:
+            first = price_panel.get_returns_panel(['AAPL', 'JNJ', 'AAPL'])
+            second = price_panel.get_returns_panel(['JNJ', 'AAPL'])
+
+        self.assertEqual(history.call_count, 2)
+        self.assertEqual(list(first.columns), ['AAPL', 'JNJ'])
+        self.assertEqual(len(first), 59)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_returns_skip_failed_tickers(self):
+        """Test that a failed download drops only that ticker"""
+        def history(ticker, period, interval):
+            if ticker == 'XOM':
+                raise RuntimeError('rate limited')
+            return self.histories[ticker]
+
+        with mock.patch.object(price_panel, 'get_yf_history', side_effect=history):
+            panel = price_panel.get_returns_panel(['AAPL', 'XOM'])
+
+        self.assertEqual(list(panel.columns), ['AAPL'])
+
+    def test_partial_panel_cached_briefly(self):
+        """Test that a panel missing a failed ticker is kept only briefly, so the ticker is retried"""
+        failures = {'XOM': RuntimeError('timeout')}
+
+        def history(ticker, period, interval):
+            if ticker in failures:
+                raise failures.pop(ticker)
+            return self.histories[ticker]
+
+        with mock.patch.object(price_panel, 'get_yf_history', side_effect=history), \
+                mock.patch.object(price_panel.cache, 'set', wraps=price_panel.cache.set) as cache_set:
+            partial = price_panel.get_returns_panel(['AAPL', 'XOM'])
+            cache.clear()
+            complete = price_panel.get_returns_panel(['AAPL', 'XOM'])
+
+        self.assertEqual(list(partial.columns), ['AAPL'])
+        self.assertEqual(list(complete.columns), ['AAPL', 'XOM'])
+        self.assertEqual([call.args[2] for call in cache_set.call_args_list],
+                         [price_panel.PANEL_PARTIAL_CACHE_TIMEOUT, price_panel.PANEL_CACHE_TIMEOUT])
+
+    def test_sector_matrix_from_panel(self):
+        """Test that every sector, including shared representatives, gets a column"""
+        with mock.patch.object(price_panel, 'get_yf_history', side_effect=self.history):
+            result = sector_analysis_service.calculate_sector_correlation_matrix()
+
+        self.assertEqual(set(result['sectors_analyzed']), set(sector_analysis_service.SECTOR_REPRESENTATIVES))
+        self.assertEqual(result['data_points'], 59)
+        self.assertEqual(result['correlation_matrix']['financial']['banking'], 1.0)
+
+    def test_commentary_off_request_path(self):
+        """Test that the API answers with defaults while commentary is generated in the background"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def generate(math_correlation):
+            started.set()
+            release.wait(5)
+            return 0.4, 'Sectors are moving independently'
+
+        request = RequestFactory().get('/')
+        with mock.patch.object(price_panel, 'get_yf_history', side_effect=self.history), \
+                mock.patch.object(sector_analysis_service, 'generate_sector_correlation_commentary', side_effect=generate) as llm:
+            body = json.loads(sector_analysis_service.get_all_sectors_correlation_api(request).content)
+            self.assertTrue(started.wait(5))
+            # A second request while the first is still generating doesn't start another
+            sector_analysis_service.get_all_sectors_correlation_api(request)
+            release.set()
+            for _ in range(100):
+                if cache.get(sector_analysis_service._sector_correlation_commentary_key()):
+                    break
+                time.sleep(0.01)
+            ready = json.loads(sector_analysis_service.get_all_sectors_correlation_api(request).content)
+
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(body['analysis_details']['ai_status'], 'pending')
+        self.assertEqual(body['description'], sector_analysis_service.DEFAULT_CORRELATION_DESCRIPTION)
+        self.assertEqual(ready['analysis_details']['ai_status'], 'ready')
+        self.assertEqual(ready['analysis_details']['ai_correlation'], 0.4)
+
+    def test_failed_commentary_not_cached(self):
+        """Test that a failed generation stays pending and is retried by a later request"""
+        calls = []
+
+        def generate(math_correlation):
+            calls.append(math_correlation)
+            return None if len(calls) == 1 else (0.4, 'Sectors are moving independently')
+
+        def wait_for_lock_release():
+            for _ in range(100):
+                if cache.get(f'{sector_analysis_service._sector_correlation_commentary_key()}:lock') is None:
+                    return
+                time.sleep(0.01)
+
+        with mock.patch.object(sector_analysis_service, 'generate_sector_correlation_commentary', side_effect=generate):
+            first = sector_analysis_service.get_sector_correlation_commentary(None)
+            wait_for_lock_release()
+            retried = sector_analysis_service.get_sector_correlation_commentary(None)
+            wait_for_lock_release()
+            ready = sector_analysis_service.get_sector_correlation_commentary(None)
+
+        self.assertEqual(first[2], 'pending')
+        self.assertEqual(retried[2], 'pending')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(ready, (0.4, 'Sectors are moving independently', 'ready'))
+
+    def test_unparseable_commentary_is_failure(self):
+        """Test that an unparseable answer yields None instead of the defaults"""
+        with mock.patch.multiple(sector_analysis_service, AZURE_OPENAI_KEY='key', MODEL_NAME='gpt',
+                                 AZURE_OPENAI_ENDPOINT='https://example'), \
+                mock.patch.object(sector_analysis_service.llm_router, 'generate', return_value='No opinion today.'):
+            self.assertIsNone(sector_analysis_service.generate_sector_correlation_commentary(None))
+
+
+class StockCorrelationOverviewTestCase(SimpleTestCase):
+    """Test cases for the staged stock correlation overview pipeline"""
+
+    def setUp(self):
+        cache.clear()
+        index = pd.bdate_range('2024-01-01', periods=60)
+        rng = np.random.default_rng(11)
+        base = 100 + rng.standard_normal(60).cumsum()
+        self.histories = {
+            'TSLA': pd.DataFrame({'Close': base}, index=index),
+            'RIVN': pd.DataFrame({'Close': base * 0.5 + rng.standard_normal(60) * 0.05}, index=index),
+            'NVDA': pd.DataFrame({'Close': 100 + rng.standard_normal(60).cumsum()}, index=index),
+            'NEW': pd.DataFrame({'Close': base[-10:]}, index=index[-10:]),
+        }
+        self.sectors = {
+            'primary_sector': 'Electric Vehicles',
+            'same_sector_stocks': ['RIVN', 'NIO'],
+            'related_sectors': [{'sector_name': 'Semiconductors', 'stocks': ['NVDA', 'NEW']}],
+        }
+
+    def history(self, ticker, period, interval):
+        if ticker not in self.histories:
+            raise ValueError(f'No data for {ticker}')
+        return self.histories[ticker]
+
+    def test_correlate_returns_matches_pandas(self):
+        """Test that the vectorized pass matches pairwise pandas correlations"""
+        returns = pd.DataFrame({t: h['Close'].pct_change().iloc[1:] for t, h in self.histories.items()})
+        returns.loc[returns.index[5:8], 'NVDA'] = np.nan
+
+        result = yfinance_service.correlate_returns(returns['TSLA'], returns.drop(columns='TSLA'))
+
+        self.assertAlmostEqual(result['RIVN'], returns['TSLA'].corr(returns['RIVN']))
+        self.assertAlmostEqual(result['NVDA'], returns['TSLA'].corr(returns['NVDA']))
+        self.assertNotIn('NEW', result)  # only 9 overlapping returns
+
+    def test_correlations_from_one_panel(self):
+        """Test that every ticker is fetched once and missing ones get fallbacks"""
+        with mock.patch.object(price_panel, 'get_yf_history', side_effect=self.history) as history:
+            results = yfinance_service.calculate_stock_correlations('TSLA', self.sectors)
+
+        self.assertEqual(sorted(c.args[0] for c in history.call_args_list), ['NEW', 'NIO', 'NVDA', 'RIVN', 'TSLA'])
+        self.assertEqual([row['ticker'] for row in results['same_sector']], ['RIVN', 'NIO'])
+        self.assertGreater(results['same_sector'][0]['correlation'], 0.5)
+        self.assertEqual(results['same_sector'][1]['correlation'], 0.7)
+        self.assertEqual(results['related_0'][1]['correlation'], 0.38)
+
+    def test_explanations_in_parallel(self):
+        """Test that explanation requests overlap and a failed group falls back alone"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def generate(model, messages, temperature):
+            barrier.wait()
+            if 'related sector' in messages[1]['content']:
+                raise RuntimeError('timeout')
+            return ' Same sector moves together. '
+
+        results = {'same_sector': [{'ticker': 'RIVN', 'correlation': 0.8}],
+                   'related_0': [{'ticker': 'NVDA', 'correlation': 0.3}]}
+
+        with mock.patch('ai_models.services.llm_router.generate', side_effect=generate):
+            explanations = yfinance_service.generate_correlation_explanations('TSLA', results)
+
+        self.assertEqual(explanations['same_sector'], 'Same sector moves together.')
+        self.assertIn('supply chain', explanations['related_0'])
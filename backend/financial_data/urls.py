@@ -79,6 +79,9 @@ urlpatterns = [
     # NYSE Stocks endpoints
     path('nyse/stocks/', views.nyse_stocks_view, name='nyse_stocks'),
     path('nyse/correlation/', views.stock_correlation_view, name='stock_correlation'),
+    path('nyse/correlation/top/', views.stock_correlation_top_view, name='stock_correlation_top'),
     # Trending assets
     path('trending/', views.trending_assets_view, name='trending_assets'),
+    # Upstream provider client metrics
+    path('providers/stats/', views.provider_stats_view, name='provider_stats'),
 ] 
\ No newline at end of file
@@ -5,8 +5,10 @@ import json
 import pandas as pd
 from .services.yfinance_service import get_ticker_from_request
 from .services.fmp_service import fmp_service
+from .services.ohlcv_serializer import serialize_ohlcv
+from .services.provider_client import provider_client
 from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
-from openai import AzureOpenAI
+from ai_models.services.llm_cache import is_json_response, llm_cache, llm_scoped_key
 
 
 @csrf_exempt
@@ -71,12 +73,13 @@ def price_target_view(request):
 
         last_close = float(hist['close'].iloc[-1]) if not hist.empty else None
         avg_30d = float(hist['close'].tail(30).mean()) if not hist.empty else None
+        # The prompt embeds live prices, so answers are shared per ticker and trading day
+        trading_day = hist.index[-1].date() if not hist.empty else now().date()
 
         # Ensure OpenAI configured
         if not all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
             return JsonResponse({'error': 'OpenAI not configured'}, status=503)
 
-        client = AzureOpenAI(api_key=AZURE_OPENAI_KEY, api_version="2023-05-15", azure_endpoint=AZURE_OPENAI_ENDPOINT)
         prompt = f"""
 You are an equity research analyst. Propose a 6-12 month price target for {ticker}.
 Use the data below and output ONLY valid JSON with keys price_target (float) and rationale (string).
@@ -90,16 +93,17 @@ Data:
 - sector: {sector}
 """
 
-        response = client.chat.completions.create(
+        content = llm_cache.complete(
+            'price_target',
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are a concise equity research model. Output only JSON."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.2
-        )
-
-        content = response.choices[0].message.content.strip()
+            temperature=0.2,
+            key=llm_scoped_key('price_target', MODEL_NAME, ticker, trading_day.isoformat()),
+            validate=is_json_response
+        ).strip()
         # Extract JSON
         import re, json as pyjson
         if '```' in content:
@@ -140,7 +144,7 @@ from financial_data.services.sec_service import (
 )
 from financial_data.services.earnings_service import get_earnings_calendar_api, get_earnings_for_symbol_api, get_upcoming_earnings_api, get_earnings_insights_api, get_earnings_insights_by_date_api, get_comprehensive_earnings_insights_api, get_earnings_correlation_api, get_earnings_correlation_impact_api
 from financial_data.services.sector_analysis_service import get_sector_trends_api, get_available_sectors_api, get_all_sectors_correlation_api
-from financial_data.services.nyse_stocks_service import get_nyse_stocks_api, get_stock_correlation_api
+from financial_data.services.nyse_stocks_service import get_nyse_stocks_api, get_stock_correlation_api, get_top_correlations_api
 
 # external
 
@@ -375,6 +379,11 @@ def stock_correlation_view(request):
     """Get correlation between two stocks from the NYSE list"""
     return get_stock_correlation_api(request)
 
+@csrf_exempt
+def stock_correlation_top_view(request):
+    """Get the NYSE stocks most and least correlated with a ticker"""
+    return get_top_correlations_api(request)
+
 
 @csrf_exempt
 def fmp_daily_view(request):
@@ -388,22 +397,7 @@ def fmp_daily_view(request):
         df = fmp_service.get_historical_price_data(ticker, period='6mo')
         if df is None or df.empty:
             return JsonResponse({'error': 'No data available'}, status=503)
-        recent = df.tail(5).copy()
-        recent = recent[['open', 'high', 'low', 'close', 'volume']]
-        recent.index = pd.to_datetime(recent.index)
-        recent = recent.reset_index().rename(columns={'index': 'date'})
-        data = [
-            {
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'open': round(float(row['open']), 2),
-                'high': round(float(row['high']), 2),
-                'low': round(float(row['low']), 2),
-                'close': round(float(row['close']), 2),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-            }
-            for _, row in recent.iterrows()
-            if pd.notna(row['open']) and pd.notna(row['high']) and pd.notna(row['low']) and pd.notna(row['close'])
-        ]
+        data = serialize_ohlcv(df.tail(5))
         if not data:
             return JsonResponse({'error': 'No valid data found'}, status=503)
         return JsonResponse({'ticker': ticker, 'data': data})
@@ -432,18 +426,7 @@ def fmp_weekly_view(request):
             'close': daily['close'].resample('W-FRI').last(),
             'volume': daily['volume'].resample('W-FRI').sum(),
         }).dropna()
-        weekly = weekly.tail(12).reset_index().rename(columns={'date': 'Date'})
-        data = [
-            {
-                'date': row['index'].strftime('%Y-%m-%d'),
-                'open': round(float(row['open']), 2),
-                'high': round(float(row['high']), 2),
-                'low': round(float(row['low']), 2),
-                'close': round(float(row['close']), 2),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-            }
-            for _, row in weekly.iterrows()
-        ]
+        data = serialize_ohlcv(weekly.tail(12))
         if not data:
             return JsonResponse({'error': 'No valid data found'}, status=503)
         return JsonResponse({'ticker': ticker, 'data': data})
@@ -472,18 +455,7 @@ def fmp_monthly_view(request):
             'close': daily['close'].resample('M').last(),
             'volume': daily['volume'].resample('M').sum(),
         }).dropna()
-        monthly = monthly.tail(24).reset_index()
-        data = [
-            {
-                'date': row['date'].strftime('%Y-%m-%d') if 'date' in monthly.columns else row['index'].strftime('%Y-%m-%d'),
-                'open': round(float(row['open']), 2),
-                'high': round(float(row['high']), 2),
-                'low': round(float(row['low']), 2),
-                'close': round(float(row['close']), 2),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-            }
-            for _, row in monthly.iterrows()
-        ]
+        data = serialize_ohlcv(monthly.tail(24))
         if not data:
             return JsonResponse({'error': 'No valid data found'}, status=503)
         return JsonResponse({'ticker': ticker, 'data': data})
@@ -512,18 +484,7 @@ def fmp_yearly_view(request):
             'close': daily['close'].resample('Y').last(),
             'volume': daily['volume'].resample('Y').sum(),
         }).dropna()
-        yearly = yearly.tail(10).reset_index()
-        data = [
-            {
-                'date': row['date'].strftime('%Y-%m-%d') if 'date' in yearly.columns else row['index'].strftime('%Y-%m-%d'),
-                'open': round(float(row['open']), 2),
-                'high': round(float(row['high']), 2),
-                'low': round(float(row['low']), 2),
-                'close': round(float(row['close']), 2),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-            }
-            for _, row in yearly.iterrows()
-        ]
+        data = serialize_ohlcv(yearly.tail(10))
         if not data:
             return JsonResponse({'error': 'No valid data found'}, status=503)
         return JsonResponse({'ticker': ticker, 'data': data})
@@ -544,22 +505,7 @@ def fmp_hourly_view(request):
         if df is None or df.empty:
             return JsonResponse({'error': 'No data available'}, status=503)
 
-        df = df[['open', 'high', 'low', 'close', 'volume']].copy()
-        df.index = pd.to_datetime(df.index)
-        df = df.reset_index().rename(columns={'index': 'date'})
-
-        data = [
-            {
-                'date': row['date'].strftime('%Y-%m-%d %H:%M:%S'),
-                'open': round(float(row['open']), 2),
-                'high': round(float(row['high']), 2),
-                'low': round(float(row['low']), 2),
-                'close': round(float(row['close']), 2),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-            }
-            for _, row in df.iterrows()
-            if pd.notna(row['open']) and pd.notna(row['high']) and pd.notna(row['low']) and pd.notna(row['close'])
-        ]
+        data = serialize_ohlcv(df, date_format='%Y-%m-%d %H:%M:%S')
         if not data:
             return JsonResponse({'error': 'No valid data found'}, status=503)
         return JsonResponse({'ticker': ticker, 'data': data})
@@ -577,7 +523,6 @@ def trending_assets_view(request):
         stocks = fmp_service.get_most_active_stocks(limit=20)
 
         # Trending crypto from CoinGecko simple/markets endpoint
-        import requests
         crypto = []
         try:
             cg_url = 'https://api.coingecko.com/api/v3/coins/markets'
@@ -589,7 +534,7 @@ def trending_assets_view(request):
                 'sparkline': 'false',
                 'price_change_percentage': '24h'
             }
-            resp = requests.get(cg_url, params=params, timeout=10)
+            resp = provider_client.get(cg_url, params=params, timeout=10)
             if resp.ok:
                 data = resp.json() or []
                 for item in data:
@@ -609,6 +554,13 @@ def trending_assets_view(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def provider_stats_view(request):
+    """Get per-host latency and connection-pool counters for upstream data providers"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'GET required'}, status=400)
+    return JsonResponse({'hosts': provider_client.stats()})
+
+
 @csrf_exempt
 def fmp_minute_current_hour_view(request):
     """Get 1-minute OHLCV bars for the current hour window (based on latest data timestamp)."""
@@ -632,20 +584,7 @@ def fmp_minute_current_hour_view(request):
         if current_hour.empty:
             return JsonResponse({'error': 'No data available for current hour'}, status=503)
 
-        current_hour = current_hour[['open', 'high', 'low', 'close', 'volume']].reset_index().rename(columns={'index': 'date'})
-
-        data = [
-            {
-                'date': row['date'].strftime('%Y-%m-%d %H:%M:%S'),
-                'open': round(float(row['open']), 4),
-                'high': round(float(row['high']), 4),
-                'low': round(float(row['low']), 4),
-                'close': round(float(row['close']), 4),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-            }
-            for _, row in current_hour.iterrows()
-            if pd.notna(row['open']) and pd.notna(row['high']) and pd.notna(row['low']) and pd.notna(row['close'])
-        ]
+        data = serialize_ohlcv(current_hour, date_format='%Y-%m-%d %H:%M:%S', decimals=4)
 
         if not data:
             return JsonResponse({'error': 'No valid data found'}, status=503)
@@ -1,5 +1,6 @@
 # internal
 from news_data.config import NEWS_API_KEY
+from financial_data.services.provider_client import provider_client
 
 # external
 from newsapi import NewsApiClient
@@ -161,7 +162,7 @@ def get_news_headlines_api(request):
                 'apiKey': NEWS_API_KEY
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = provider_client.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -215,7 +216,7 @@ def get_news_sentiment_api(request):
                 'apiKey': NEWS_API_KEY
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = provider_client.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -285,7 +286,7 @@ def get_best_articles_for_stock_api(request):
                 'apikey': FMP_API_KEY
             }
             
-            response = requests.get(stock_news_url, params=stock_news_params, timeout=30)
+            response = provider_client.get(stock_news_url, params=stock_news_params, timeout=30)
             
             if response.status_code == 200:
                 stock_news_data = response.json()
@@ -299,7 +300,7 @@ def get_best_articles_for_stock_api(request):
                 'apikey': FMP_API_KEY
             }
             
-            response = requests.get(general_news_url, params=general_params, timeout=30)
+            response = provider_client.get(general_news_url, params=general_params, timeout=30)
             
             if response.status_code == 200:
                 general_data = response.json()
@@ -320,7 +321,7 @@ def get_best_articles_for_stock_api(request):
                 'apikey': FMP_API_KEY
             }
             
-            response = requests.get(press_releases_url, params=press_params, timeout=30)
+            response = provider_client.get(press_releases_url, params=press_params, timeout=30)
             
             if response.status_code == 200:
                 press_data = response.json()
@@ -423,15 +424,9 @@ def get_best_articles_for_stock_api(request):
             # Use OpenAI to analyze and enhance the articles
             try:
                 from ai_models.config import AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT
-                from openai import AzureOpenAI
+                from ai_models.services import llm_router
                 
                 if all([AZURE_OPENAI_KEY, MODEL_NAME, AZURE_OPENAI_ENDPOINT]):
-                    client = AzureOpenAI(
-                        api_key=AZURE_OPENAI_KEY,
-                        api_version="2023-05-15",
-                        azure_endpoint=AZURE_OPENAI_ENDPOINT
-                    )
-                    
                     # Analyze each article for investment insights
                     enhanced_articles = []
                     
@@ -451,7 +446,7 @@ Content: {article_text}
 Provide only the investment insight, be specific and actionable."""
                         
                         try:
-                            ai_response = client.chat.completions.create(
+                            ai_insight = llm_router.generate(
                                 model=MODEL_NAME,
                                 messages=[{
                                     "role": "system", 
@@ -461,9 +456,7 @@ Provide only the investment insight, be specific and actionable."""
                                     "content": prompt
                                 }],
                                 temperature=0.3
-                            )
-                            
-                            ai_insight = ai_response.choices[0].message.content.strip()
+                            ).strip()
                         except:
                             ai_insight = "Investment analysis unavailable"
                         
@@ -28,9 +28,11 @@ sys.exit(1)
 PY
 fi
 
-# Run migrations and collect static
-python manage.py migrate --noinput
-python manage.py collectstatic --no-input
+# Run migrations and collect static (once, from the web container)
+if [ "${RUN_MIGRATIONS:-1}" = "1" ]; then
+  python manage.py migrate --noinput
+  python manage.py collectstatic --no-input
+fi
 
 exec "$@"
 